@@ -1,3 +1,3 @@
 __version__ = '0.0.1'
 
-from .motor_model import Motor
\ No newline at end of file
+from .motor_model import Motor, declare_total_coloring
\ No newline at end of file
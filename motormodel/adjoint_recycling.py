@@ -0,0 +1,109 @@
+import numpy as np
+
+
+def _allreduce(comm, a):
+    if comm is None:
+        return a
+    return comm.allreduce(a)
+
+
+class AdjointRecycler(object):
+    """
+    Reuse linear solves against a fixed (transposed) Jacobian across the
+    right-hand sides that share it
+
+    Every functional of a state contributes its gradient to the adjoint
+    right-hand side, so the right-hand sides of all the totals that depend on
+    a state lie in the span of a handful of functional gradients. The
+    right-hand sides solved so far are kept as an orthonormal basis Q along
+    with their solutions Z. A new right-hand side b is split into its
+    projection Q Q^T b, whose solution is Z Q^T b, and a remainder that is
+    solved and added to the basis. Right-hand sides in the span cost no
+    solve at all. Call reset whenever the Jacobian changes.
+    """
+
+    def __init__(self, comm=None, max_vectors=50, span_tol=1e-10):
+        self.comm = comm
+        self.max_vectors = max_vectors
+        self.span_tol = span_tol
+        self.reset()
+        self.num_solves = 0
+        self.num_recycled = 0
+
+    def reset(self):
+        self.rhs_basis = []
+        self.solutions = []
+
+    def _dot(self, a, b):
+        return _allreduce(self.comm, np.dot(a, b))
+
+    def solve(self, rhs, solve):
+        """
+        Return the solution for rhs, where solve(vector) returns the solution
+        for a single right-hand side
+        """
+        rhs = np.asarray(rhs, dtype=float)
+        rhs_norm = np.sqrt(self._dot(rhs, rhs))
+        if rhs_norm == 0.0:
+            return np.zeros_like(rhs)
+
+        remainder = rhs.copy()
+        coefficients = np.zeros(len(self.rhs_basis))
+        # two passes of Gram-Schmidt keep the basis orthonormal
+        for _ in range(2):
+            for i, q in enumerate(self.rhs_basis):
+                c = self._dot(q, remainder)
+                coefficients[i] += c
+                remainder -= c * q
+
+        solution = np.zeros_like(rhs)
+        for c, z in zip(coefficients, self.solutions):
+            solution += c * z
+
+        remainder_norm = np.sqrt(self._dot(remainder, remainder))
+        if remainder_norm <= self.span_tol * rhs_norm:
+            self.num_recycled += 1
+            return solution
+
+        q = remainder / remainder_norm
+        z = np.asarray(solve(q), dtype=float).copy()
+        self.num_solves += 1
+        if len(self.rhs_basis) < self.max_vectors:
+            self.rhs_basis.append(q)
+            self.solutions.append(z)
+        return solution + remainder_norm * z
+
+
+if __name__ == "__main__":
+    import unittest
+
+    class TestAdjointRecycler(unittest.TestCase):
+        rng = np.random.default_rng(0)
+        n = 60
+        jac = np.eye(n) * 4 + rng.standard_normal((n, n)) / np.sqrt(n)
+        # gradients of three functionals of the state
+        gradients = rng.standard_normal((n, 3))
+
+        def solve(self, vector):
+            return np.linalg.solve(self.jac.T, vector)
+
+        def test_recycles_combinations(self):
+            recycler = AdjointRecycler()
+            weights = self.rng.standard_normal((3, 10))
+            for w in weights.T:
+                rhs = self.gradients @ w
+                np.testing.assert_allclose(recycler.solve(rhs, self.solve),
+                                           self.solve(rhs), atol=1e-10)
+            # one solve per functional, every other total is recycled
+            self.assertEqual(recycler.num_solves, 3)
+            self.assertEqual(recycler.num_recycled, 7)
+
+        def test_reset(self):
+            recycler = AdjointRecycler()
+            rhs = self.gradients[:, 0]
+            recycler.solve(rhs, self.solve)
+            recycler.reset()
+            recycler.solve(rhs, self.solve)
+            self.assertEqual(recycler.num_solves, 2)
+
+    unittest.main()
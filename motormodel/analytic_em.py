@@ -0,0 +1,644 @@
+import numpy as np
+
+import openmdao.api as om
+
+from .analytic_geometry import AnalyticGeometry
+
+_mu0 = 4e-7 * np.pi
+
+
+def carter_coefficient(slot_pitch, slot_opening, airgap):
+    """
+    Carter's coefficient for the increase in effective airgap due to slotting
+    """
+    ratio = slot_opening / (2 * airgap)
+    gamma = 4 / np.pi * (ratio * np.arctan(ratio) - np.log(np.sqrt(1 + ratio**2)))
+    return slot_pitch / (slot_pitch - gamma * airgap)
+
+
+class AnalyticEMState(om.ExplicitComponent):
+    """
+    Component that estimates the airgap field, flux linkage, torque, and
+    inductance of a surface mounted Halbach machine in closed form
+
+    The magnets are treated as an ideal (segmented) Halbach array over a
+    slotless stator whose effective airgap is increased by Carter's
+    coefficient. The fundamental of the radial field at the stator bore is
+
+        B_1 = 2 B_r k_seg (1 - exp(-k h)) exp(-k g_eff),    k = p / R
+
+    where the factor of two comes from the image of the array in the stator
+    iron. The flux linkage and magnetizing inductance follow from the
+    fundamental with the winding factor of a single tooth concentrated coil.
+    """
+
+    def initialize(self):
+        self.options.declare("num_poles", desc=" The number of magnetic poles")
+        self.options.declare("hallbach_segments", types=int, default=4,
+                             desc=" The number of magnet segments per pole pair")
+        self.options.declare("remanence", default=1.39,
+                             desc=" The remanent flux density of the magnets")
+        self.options.declare("mu_r_magnet", default=1.05,
+                             desc=" The relative permeability of the magnets")
+
+    def setup(self):
+        self.add_input("rotor_or",
+                       desc=" The outer radius of the rotor",
+                       tags=["mphys_input"])
+        self.add_input("magnet_thickness",
+                       desc="The thickness of the permanent magnets",
+                       tags=["mphys_input"])
+        self.add_input("stator_ir",
+                       desc=" The inner radius of the stator",
+                       tags=["mphys_input"])
+        self.add_input("shoe_spacing",
+                       desc=" The spacing (length) between teeth tips",
+                       tags=["mphys_input"])
+        self.add_input("num_slots",
+                       desc=" The number of slots in the stator",
+                       tags=["mphys_input"])
+        self.add_input("num_turns",
+                       desc=" The number of times the wire has been wrapped around a tooth",
+                       tags=["mphys_input"])
+        self.add_input("stack_length",
+                       desc=" The axial length of the motor",
+                       tags=["mphys_input"])
+
+        self.add_output("airgap_flux_density",
+                        desc=" The peak fundamental radial flux density at the stator bore")
+        self.add_output("average_flux_magnitude:airgap",
+                        desc=" The average flux magnitude in the airgap")
+        self.add_output("flux_linkage",
+                        desc=" The peak flux linkage of one phase")
+        self.add_output("magnetizing_inductance",
+                        desc=" The magnetizing inductance of one phase")
+
+    def setup_partials(self):
+        self.declare_partials(["airgap_flux_density",
+                               "average_flux_magnitude:airgap"], ["rotor_or",
+                                                                  "magnet_thickness",
+                                                                  "stator_ir",
+                                                                  "shoe_spacing",
+                                                                  "num_slots"])
+        self.declare_partials(["flux_linkage", "magnetizing_inductance"], "*")
+
+    def compute(self, inputs, outputs):
+        rotor_or = inputs["rotor_or"]
+        magnet_thickness = inputs["magnet_thickness"]
+        stator_ir = inputs["stator_ir"]
+        shoe_spacing = inputs["shoe_spacing"]
+        num_slots = inputs["num_slots"]
+        num_turns = inputs["num_turns"]
+        stack_length = inputs["stack_length"]
+
+        pole_pairs = self.options["num_poles"] / 2
+        segments = self.options["hallbach_segments"]
+        remanence = self.options["remanence"]
+        mu_r_magnet = self.options["mu_r_magnet"]
+
+        airgap = stator_ir - rotor_or
+        carter = carter_coefficient(2 * np.pi * stator_ir / num_slots,
+                                    shoe_spacing,
+                                    airgap)
+        effective_airgap = carter * airgap
+
+        wavenumber = pole_pairs / (0.5 * (rotor_or + stator_ir))
+        segment_factor = np.sin(np.pi / segments) / (np.pi / segments)
+        surface_field = remanence * segment_factor * \
+            (1 - np.exp(-wavenumber * magnet_thickness))
+
+        airgap_flux_density = 2 * surface_field * \
+            np.exp(-wavenumber * effective_airgap)
+        outputs["airgap_flux_density"] = airgap_flux_density
+
+        # average of the fundamental's magnitude across the airgap
+        outputs["average_flux_magnitude:airgap"] = 2 / np.pi * surface_field * \
+            (1 - np.exp(-2 * wavenumber * effective_airgap)) / \
+            (wavenumber * effective_airgap)
+
+        # single tooth coils, every tooth wound
+        turns_per_phase = num_slots * num_turns / 3
+        winding_factor = np.sin(pole_pairs * np.pi / num_slots)
+        winding_factor *= np.sign(np.real(winding_factor))
+        flux_per_pole = 2 * airgap_flux_density * stator_ir * stack_length / pole_pairs
+        flux_linkage = winding_factor * turns_per_phase * flux_per_pole
+        outputs["flux_linkage"] = flux_linkage
+
+        magnetic_airgap = effective_airgap + magnet_thickness / mu_r_magnet
+        outputs["magnetizing_inductance"] = 3 / np.pi * _mu0 * \
+            (winding_factor * turns_per_phase / pole_pairs)**2 * \
+            stator_ir * stack_length / magnetic_airgap
+
+    def compute_partials(self, inputs, partials):
+        rotor_or = inputs["rotor_or"]
+        magnet_thickness = inputs["magnet_thickness"]
+        stator_ir = inputs["stator_ir"]
+        shoe_spacing = inputs["shoe_spacing"]
+        num_slots = inputs["num_slots"]
+        num_turns = inputs["num_turns"]
+        stack_length = inputs["stack_length"]
+
+        pole_pairs = self.options["num_poles"] / 2
+        segments = self.options["hallbach_segments"]
+        remanence = self.options["remanence"]
+        mu_r_magnet = self.options["mu_r_magnet"]
+
+        # Carter's coefficient and its derivatives
+        airgap = stator_ir - rotor_or
+        slot_pitch = 2 * np.pi * stator_ir / num_slots
+        ratio = shoe_spacing / (2 * airgap)
+        gamma = 4 / np.pi * (ratio * np.arctan(ratio) - np.log(np.sqrt(1 + ratio**2)))
+        dgamma_dratio = 4 / np.pi * np.arctan(ratio)
+        denominator = slot_pitch - gamma * airgap
+        carter = slot_pitch / denominator
+        dcarter_dpitch = -gamma * airgap / denominator**2
+        dcarter_dgamma = slot_pitch * airgap / denominator**2
+        dcarter_dairgap = slot_pitch * gamma / denominator**2 \
+            - dcarter_dgamma * dgamma_dratio * ratio / airgap
+        effective_airgap = carter * airgap
+
+        dgeff_dairgap = carter + airgap * dcarter_dairgap
+        dgeff_dpitch = airgap * dcarter_dpitch
+        d_effective_airgap = {
+            "rotor_or": -dgeff_dairgap,
+            "stator_ir": dgeff_dairgap + dgeff_dpitch * 2 * np.pi / num_slots,
+            "shoe_spacing": 0.5 * dcarter_dgamma * dgamma_dratio,
+            "num_slots": -dgeff_dpitch * slot_pitch / num_slots,
+        }
+
+        wavenumber = pole_pairs / (0.5 * (rotor_or + stator_ir))
+        dwavenumber = -wavenumber / (rotor_or + stator_ir)
+        d_wavenumber = {"rotor_or": dwavenumber, "stator_ir": dwavenumber}
+
+        segment_factor = np.sin(np.pi / segments) / (np.pi / segments)
+        magnet_decay = np.exp(-wavenumber * magnet_thickness)
+        surface_field = remanence * segment_factor * (1 - magnet_decay)
+        d_surface_field = {
+            "rotor_or": remanence * segment_factor * magnet_thickness * magnet_decay * dwavenumber,
+            "magnet_thickness": remanence * segment_factor * wavenumber * magnet_decay,
+            "stator_ir": remanence * segment_factor * magnet_thickness * magnet_decay * dwavenumber,
+        }
+
+        airgap_decay = np.exp(-wavenumber * effective_airgap)
+        airgap_flux_density = 2 * surface_field * airgap_decay
+
+        x = wavenumber * effective_airgap
+        average_factor = (1 - np.exp(-2 * x)) / x
+        daverage_factor_dx = (2 * x * np.exp(-2 * x) - (1 - np.exp(-2 * x))) / x**2
+
+        # single tooth coils, every tooth wound
+        turns_per_phase = num_slots * num_turns / 3
+        winding_factor = np.sin(pole_pairs * np.pi / num_slots)
+        winding_sign = np.sign(np.real(winding_factor))
+        dwinding_factor_dslots = -winding_sign * np.cos(pole_pairs * np.pi / num_slots) \
+            * pole_pairs * np.pi / num_slots**2
+        winding_factor *= winding_sign
+        flux_per_pole = 2 * airgap_flux_density * stator_ir * stack_length / pole_pairs
+
+        magnetic_airgap = effective_airgap + magnet_thickness / mu_r_magnet
+        inductance_factor = 3 / np.pi * _mu0 * stator_ir * stack_length / magnetic_airgap \
+            / pole_pairs**2
+        magnetizing_inductance = inductance_factor * (winding_factor * turns_per_phase)**2
+
+        for name in ["rotor_or", "magnet_thickness", "stator_ir", "shoe_spacing", "num_slots"]:
+            dsurface_field = d_surface_field.get(name, 0.0)
+            dx = wavenumber * d_effective_airgap.get(name, 0.0) \
+                + effective_airgap * d_wavenumber.get(name, 0.0)
+
+            dflux_density = 2 * airgap_decay * dsurface_field - airgap_flux_density * dx
+            partials["airgap_flux_density", name] = dflux_density
+            partials["average_flux_magnitude:airgap", name] = 2 / np.pi * \
+                (average_factor * dsurface_field + surface_field * daverage_factor_dx * dx)
+
+            dflux_per_pole = 2 * dflux_density * stator_ir * stack_length / pole_pairs
+            dmagnetic_airgap = d_effective_airgap.get(name, 0.0)
+            dwinding_factor = 0.0
+            dturns_per_phase = 0.0
+            if name == "stator_ir":
+                dflux_per_pole += 2 * airgap_flux_density * stack_length / pole_pairs
+            elif name == "magnet_thickness":
+                dmagnetic_airgap += 1 / mu_r_magnet
+            elif name == "num_slots":
+                dwinding_factor = dwinding_factor_dslots
+                dturns_per_phase = num_turns / 3
+
+            partials["flux_linkage", name] = \
+                dwinding_factor * turns_per_phase * flux_per_pole \
+                + winding_factor * dturns_per_phase * flux_per_pole \
+                + winding_factor * turns_per_phase * dflux_per_pole
+
+            dinductance = -magnetizing_inductance / magnetic_airgap * dmagnetic_airgap \
+                + 2 * inductance_factor * winding_factor * turns_per_phase \
+                * (dwinding_factor * turns_per_phase + winding_factor * dturns_per_phase)
+            if name == "stator_ir":
+                dinductance += 3 / np.pi * _mu0 * stack_length / magnetic_airgap \
+                    * (winding_factor * turns_per_phase / pole_pairs)**2
+            partials["magnetizing_inductance", name] = dinductance
+
+        partials["flux_linkage", "num_turns"] = winding_factor * num_slots / 3 * flux_per_pole
+        partials["flux_linkage", "stack_length"] = winding_factor * turns_per_phase * \
+            2 * airgap_flux_density * stator_ir / pole_pairs
+
+        partials["magnetizing_inductance", "num_turns"] = 2 * inductance_factor * \
+            (winding_factor * turns_per_phase) * winding_factor * num_slots / 3
+        partials["magnetizing_inductance", "stack_length"] = 3 / np.pi * _mu0 * \
+            (winding_factor * turns_per_phase / pole_pairs)**2 * stator_ir / magnetic_airgap
+
+
+class AnalyticLosses(om.ExplicitComponent):
+    """
+    Component that estimates the AC strand losses in the windings and the core
+    losses in the stator from the analytic airgap field
+
+    The AC loss uses the eddy current loss in round strands exposed to the
+    slot leakage field, which rises linearly over the slot depth. The core loss
+    uses Steinmetz's equation in the teeth and the yoke, with the tooth and
+    yoke flux densities found from the airgap flux.
+    """
+
+    def initialize(self):
+        self.options.declare("num_poles", desc=" The number of magnetic poles")
+        self.options.declare("conductivity", default=58.14e6,
+                             desc=" The electrical conductivity of copper")
+        self.options.declare("density", default=8110.0,
+                             desc=" The density of the stator laminations")
+        self.options.declare("steinmetz", types=dict,
+                             default={"k_h": 0.00776, "alpha": 1.82, "k_e": 6.0e-6},
+                             desc=" Steinmetz hysteresis and eddy current loss coefficients (W/kg)")
+
+    def setup(self):
+        self.add_input("airgap_flux_density",
+                       desc=" The peak fundamental radial flux density at the stator bore")
+        self.add_input("frequency",
+                       desc=" The electrical frequency",
+                       tags=["mphys_input"])
+        self.add_input("rms_current",
+                       desc=" RMS current value in each phase winding",
+                       tags=["mphys_input"])
+        self.add_input("num_turns",
+                       desc=" The number of times the wire has been wrapped around a tooth",
+                       tags=["mphys_input"])
+        self.add_input("strand_radius",
+                       desc=" Radius of one strand of litz wire",
+                       tags=["mphys_input"])
+        self.add_input("fill_factor",
+                       desc=" The fraction of the winding area filled with copper")
+        self.add_input("slot_area",
+                       desc=" The winding area on one side of a slot")
+        self.add_input("winding_area",
+                       desc=" The total winding area")
+        self.add_input("stator_area",
+                       desc=" The area of the stator iron")
+        self.add_input("stack_length",
+                       desc=" The axial length of the motor",
+                       tags=["mphys_input"])
+        self.add_input("stator_or",
+                       desc=" The outer radius of the stator",
+                       tags=["mphys_input"])
+        self.add_input("stator_ir",
+                       desc=" The inner radius of the stator",
+                       tags=["mphys_input"])
+        self.add_input("slot_depth",
+                       desc=" The distance between the the stator inner radius and the edge of the stator yoke",
+                       tags=["mphys_input"])
+        self.add_input("tooth_tip_thickness",
+                       desc=" The thickness at the end of the tooth",
+                       tags=["mphys_input"])
+        self.add_input("tooth_width",
+                       desc=" The width of the tooth",
+                       tags=["mphys_input"])
+        self.add_input("num_slots",
+                       desc=" The number of slots in the stator",
+                       tags=["mphys_input"])
+
+        self.add_output("ac_loss",
+                        desc=" The AC loss in the windings")
+        self.add_output("core_loss",
+                        desc=" The core loss in the stator")
+
+    def setup_partials(self):
+        self.declare_partials("ac_loss", ["frequency",
+                                          "rms_current",
+                                          "num_turns",
+                                          "strand_radius",
+                                          "fill_factor",
+                                          "slot_area",
+                                          "winding_area",
+                                          "stack_length",
+                                          "slot_depth",
+                                          "tooth_tip_thickness"])
+        self.declare_partials("core_loss", ["airgap_flux_density",
+                                            "frequency",
+                                            "stator_area",
+                                            "stack_length",
+                                            "stator_or",
+                                            "stator_ir",
+                                            "slot_depth",
+                                            "tooth_tip_thickness",
+                                            "tooth_width",
+                                            "num_slots"])
+
+    def compute(self, inputs, outputs):
+        airgap_flux_density = inputs["airgap_flux_density"]
+        frequency = inputs["frequency"]
+        rms_current = inputs["rms_current"]
+        num_turns = inputs["num_turns"]
+        strand_radius = inputs["strand_radius"]
+        fill_factor = inputs["fill_factor"]
+        slot_area = inputs["slot_area"]
+        winding_area = inputs["winding_area"]
+        stator_area = inputs["stator_area"]
+        stack_length = inputs["stack_length"]
+        stator_or = inputs["stator_or"]
+        stator_ir = inputs["stator_ir"]
+        slot_depth = inputs["slot_depth"]
+        tooth_tip_thickness = inputs["tooth_tip_thickness"]
+        tooth_width = inputs["tooth_width"]
+        num_slots = inputs["num_slots"]
+
+        pole_pairs = self.options["num_poles"] / 2
+        omega = 2 * np.pi * frequency
+
+        # slot leakage field at the top of a slot with two coil sides
+        coil_height = slot_depth - tooth_tip_thickness
+        slot_width = 2 * slot_area / coil_height
+        slot_field = _mu0 * 2 * num_turns * np.sqrt(2) * rms_current / slot_width
+        copper_volume = fill_factor * winding_area * stack_length
+        # the mean square of a field rising linearly over the slot is B^2 / 3
+        outputs["ac_loss"] = self.options["conductivity"] * omega**2 * \
+            (2 * strand_radius)**2 * slot_field**2 / 3 / 32 * copper_volume
+
+        steinmetz = self.options["steinmetz"]
+        density = self.options["density"]
+
+        slot_pitch = 2 * np.pi * stator_ir / num_slots
+        tooth_field = airgap_flux_density * slot_pitch / tooth_width
+
+        yoke_thickness = stator_or - stator_ir - slot_depth - tooth_tip_thickness
+        flux_per_pole = 2 * airgap_flux_density * stator_ir * stack_length / pole_pairs
+        yoke_field = flux_per_pole / (2 * stack_length * yoke_thickness)
+
+        yoke_area = np.pi * (stator_or**2 - (stator_or - yoke_thickness)**2)
+        tooth_area = stator_area - yoke_area
+
+        def specific_loss(field):
+            return steinmetz["k_h"] * frequency * field**steinmetz["alpha"] + \
+                steinmetz["k_e"] * frequency**2 * field**2
+
+        outputs["core_loss"] = density * stack_length * \
+            (tooth_area * specific_loss(tooth_field)
+             + yoke_area * specific_loss(yoke_field))
+
+    def compute_partials(self, inputs, partials):
+        airgap_flux_density = inputs["airgap_flux_density"]
+        frequency = inputs["frequency"]
+        rms_current = inputs["rms_current"]
+        num_turns = inputs["num_turns"]
+        strand_radius = inputs["strand_radius"]
+        fill_factor = inputs["fill_factor"]
+        slot_area = inputs["slot_area"]
+        winding_area = inputs["winding_area"]
+        stator_area = inputs["stator_area"]
+        stack_length = inputs["stack_length"]
+        stator_or = inputs["stator_or"]
+        stator_ir = inputs["stator_ir"]
+        slot_depth = inputs["slot_depth"]
+        tooth_tip_thickness = inputs["tooth_tip_thickness"]
+        tooth_width = inputs["tooth_width"]
+        num_slots = inputs["num_slots"]
+
+        pole_pairs = self.options["num_poles"] / 2
+        conductivity = self.options["conductivity"]
+        omega = 2 * np.pi * frequency
+
+        # ac_loss = loss_density * slot_field**2 * copper_volume
+        coil_height = slot_depth - tooth_tip_thickness
+        field_factor = _mu0 * np.sqrt(2) / slot_area
+        slot_field = field_factor * num_turns * rms_current * coil_height
+        copper_volume = fill_factor * winding_area * stack_length
+        loss_density = conductivity * omega**2 * (2 * strand_radius)**2 / 96
+        dac_dfield = 2 * loss_density * slot_field * copper_volume
+        field_loss = loss_density * slot_field**2
+
+        partials["ac_loss", "frequency"] = conductivity * 2 * omega * 2 * np.pi \
+            * (2 * strand_radius)**2 / 96 * slot_field**2 * copper_volume
+        partials["ac_loss", "strand_radius"] = conductivity * omega**2 * 8 * strand_radius / 96 \
+            * slot_field**2 * copper_volume
+        partials["ac_loss", "rms_current"] = dac_dfield * field_factor * num_turns * coil_height
+        partials["ac_loss", "num_turns"] = dac_dfield * field_factor * rms_current * coil_height
+        partials["ac_loss", "slot_depth"] = dac_dfield * field_factor * num_turns * rms_current
+        partials["ac_loss", "tooth_tip_thickness"] = -partials["ac_loss", "slot_depth"]
+        partials["ac_loss", "slot_area"] = -dac_dfield * slot_field / slot_area
+        partials["ac_loss", "fill_factor"] = field_loss * winding_area * stack_length
+        partials["ac_loss", "winding_area"] = field_loss * fill_factor * stack_length
+        partials["ac_loss", "stack_length"] = field_loss * fill_factor * winding_area
+
+        steinmetz = self.options["steinmetz"]
+        density = self.options["density"]
+        k_h = steinmetz["k_h"]
+        alpha = steinmetz["alpha"]
+        k_e = steinmetz["k_e"]
+
+        slot_pitch = 2 * np.pi * stator_ir / num_slots
+        tooth_field = airgap_flux_density * slot_pitch / tooth_width
+
+        yoke_thickness = stator_or - stator_ir - slot_depth - tooth_tip_thickness
+        yoke_field = airgap_flux_density * stator_ir / (pole_pairs * yoke_thickness)
+
+        yoke_area = np.pi * (stator_or**2 - (stator_or - yoke_thickness)**2)
+        tooth_area = stator_area - yoke_area
+
+        def specific_loss(field):
+            return k_h * frequency * field**alpha + k_e * frequency**2 * field**2
+
+        def dspecific_loss_dfield(field):
+            return k_h * frequency * alpha * field**(alpha - 1) + 2 * k_e * frequency**2 * field
+
+        def dspecific_loss_dfrequency(field):
+            return k_h * field**alpha + 2 * k_e * frequency * field**2
+
+        tooth_loss = specific_loss(tooth_field)
+        yoke_loss = specific_loss(yoke_field)
+        dcore_dtooth_field = density * stack_length * tooth_area * dspecific_loss_dfield(tooth_field)
+        dcore_dyoke_field = density * stack_length * yoke_area * dspecific_loss_dfield(yoke_field)
+        dcore_dyoke_area = density * stack_length * (yoke_loss - tooth_loss)
+
+        # the yoke's inner radius is stator_ir + slot_depth + tooth_tip_thickness
+        dyoke_field_dyoke_thickness = -yoke_field / yoke_thickness
+        dyoke_area_dinner_radius = -2 * np.pi * (stator_or - yoke_thickness)
+
+        partials["core_loss", "airgap_flux_density"] = \
+            dcore_dtooth_field * slot_pitch / tooth_width \
+            + dcore_dyoke_field * stator_ir / (pole_pairs * yoke_thickness)
+        partials["core_loss", "frequency"] = density * stack_length * \
+            (tooth_area * dspecific_loss_dfrequency(tooth_field)
+             + yoke_area * dspecific_loss_dfrequency(yoke_field))
+        partials["core_loss", "stator_area"] = density * stack_length * tooth_loss
+        partials["core_loss", "stack_length"] = density * \
+            (tooth_area * tooth_loss + yoke_area * yoke_loss)
+        partials["core_loss", "stator_or"] = \
+            dcore_dyoke_field * dyoke_field_dyoke_thickness \
+            + dcore_dyoke_area * 2 * np.pi * stator_or
+        partials["core_loss", "stator_ir"] = \
+            dcore_dtooth_field * tooth_field / stator_ir \
+            + dcore_dyoke_field * (airgap_flux_density / (pole_pairs * yoke_thickness)
+                                   - dyoke_field_dyoke_thickness) \
+            + dcore_dyoke_area * dyoke_area_dinner_radius
+        partials["core_loss", "slot_depth"] = \
+            -dcore_dyoke_field * dyoke_field_dyoke_thickness \
+            + dcore_dyoke_area * dyoke_area_dinner_radius
+        partials["core_loss", "tooth_tip_thickness"] = partials["core_loss", "slot_depth"]
+        partials["core_loss", "tooth_width"] = -dcore_dtooth_field * tooth_field / tooth_width
+        partials["core_loss", "num_slots"] = -dcore_dtooth_field * tooth_field / num_slots
+
+
+class AnalyticEMOutputs(om.Group):
+    """
+    Group that computes the losses, mass, and performance metrics of the
+    analytic EM model, mirroring the outputs of EMMotorOutputsGroup
+    """
+
+    def initialize(self):
+        self.options.declare("num_poles", desc=" The number of magnetic poles")
+        self.options.declare("loss_options", types=dict, default=None, allow_none=True,
+                             desc=" Options for the analytic loss estimates")
+
+    def setup(self):
+        pole_pairs = self.options["num_poles"] / 2
+
+        # current aligned with the q-axis
+        self.add_subsystem("average_torque",
+                           om.ExecComp(
+                               f"average_torque = 1.5 * {pole_pairs} * flux_linkage * (2**0.5)*rms_current"),
+                           promotes=["*"])
+        self.add_subsystem("inductance",
+                           om.ExecComp("L = magnetizing_inductance + L_le",
+                                       L_le={"val": 0.0, "desc": "End-turn leakage inductance"}),
+                           promotes=["*"])
+
+        self.add_subsystem("analytic_geometry",
+                           AnalyticGeometry(),
+                           promotes_inputs=["*"],
+                           promotes_outputs=["dc_loss",
+                                             "mass",
+                                             ("slot_area", "analytic_slot_area"),
+                                             "winding_area",
+                                             "stator_area"])
+
+        self.add_subsystem("losses",
+                           AnalyticLosses(num_poles=self.options["num_poles"],
+                                          **(self.options["loss_options"] or {})),
+                           promotes_inputs=["*", ("slot_area", "analytic_slot_area")],
+                           promotes_outputs=["*"])
+
+        self.add_subsystem("stator_phase_resistance",
+                           om.ExecComp(
+                               "stator_phase_resistance = (ac_loss + dc_loss) / (3 * rms_current**2)"),
+                           promotes=['*'])
+        self.add_subsystem("total_loss",
+                           om.ExecComp(
+                               "total_loss = ac_loss + dc_loss + core_loss"),
+                           promotes=["*"])
+        self.add_subsystem("power_out",
+                           om.ExecComp(
+                               "power_out = abs(average_torque) * rpm * pi / 30"),
+                           promotes=["*"])
+        self.add_subsystem("power_in",
+                           om.ExecComp(
+                               "power_in = power_out + total_loss"),
+                           promotes=["*"])
+        self.add_subsystem("efficiency",
+                           om.ExecComp(
+                               "efficiency = power_out / power_in"),
+                           promotes=["*"])
+        self.add_subsystem("phase_back_emf",
+                           om.ExecComp(
+                               "phase_back_emf = 2 * power_out / (3 * (2**0.5)*rms_current)"),
+                           promotes=['*'])
+
+
+if __name__ == "__main__":
+    import unittest
+    from openmdao.utils.assert_utils import assert_near_equal, assert_check_partials
+
+    inputs = {
+        "stator_or": 0.659/2,
+        "stator_ir": 0.550/2,
+        "rotor_or": 0.270,
+        "rotor_ir": 0.200,
+        "magnet_thickness": 0.01,
+        "slot_depth": 0.044,
+        "tooth_width": 0.0125,
+        "tooth_tip_thickness": 0.007,
+        "tooth_tip_angle": 10,
+        "slot_radius_stator": 0.005,
+        "slot_radius_tooth": 0.005,
+        "shoe_spacing": 0.01,
+        "num_slots": 27,
+        "coolant_thickness": 0.01,
+        "num_turns": 38,
+        "stack_length": 0.310,
+        "rms_current": 131.58125719
+    }
+
+    def _set_inputs(prob):
+        model_inputs = {meta["prom_name"] for meta in
+                        prob.model.get_io_metadata("input").values()}
+        for name, value in inputs.items():
+            if name in model_inputs:
+                prob[name] = value
+
+    class TestAnalyticEMState(unittest.TestCase):
+        def test_analytic_em_state(self):
+            prob = om.Problem()
+            prob.model.add_subsystem("state",
+                                     AnalyticEMState(num_poles=24),
+                                     promotes=["*"])
+            prob.setup(force_alloc_complex=True)
+            _set_inputs(prob)
+            prob.run_model()
+
+            # the field weakens with a larger airgap
+            field = prob["airgap_flux_density"].copy()
+            prob["rotor_or"] = 0.268
+            prob.run_model()
+            self.assertLess(prob["airgap_flux_density"][0], field[0])
+
+            data = prob.check_partials(method="cs", out_stream=None)
+            assert_check_partials(data, atol=1e-10, rtol=1e-10)
+
+    class TestAnalyticEMOutputs(unittest.TestCase):
+        def test_outputs(self):
+            num_poles = 24
+            prob = om.Problem()
+            prob.model.add_subsystem("state",
+                                     AnalyticEMState(num_poles=num_poles),
+                                     promotes=["*"])
+            prob.model.add_subsystem("outputs",
+                                     AnalyticEMOutputs(num_poles=num_poles),
+                                     promotes=["*"])
+            prob.setup(force_alloc_complex=True)
+            _set_inputs(prob)
+            prob["rpm"] = 5000
+            prob["frequency"] = 5000 * num_poles / 120
+            prob["strand_radius"] = 0.001671
+            prob["strands_in_hand"] = 1
+            prob["fill_factor"] = 0.5
+            prob.run_model()
+
+            # mechanical power matches the power into the back EMF
+            omega_e = 2 * np.pi * prob["frequency"]
+            back_emf = omega_e * prob["flux_linkage"] / np.sqrt(2)
+            assert_near_equal(prob["power_out"],
+                              3 * back_emf * prob["rms_current"],
+                              tolerance=1e-12)
+
+            for loss in ["ac_loss", "dc_loss", "core_loss"]:
+                self.assertGreater(prob[loss][0], 0.0)
+            self.assertGreater(prob["efficiency"][0], 0.0)
+            self.assertLess(prob["efficiency"][0], 1.0)
+
+            data = prob.check_partials(method="cs", includes=["*losses*"], out_stream=None)
+            assert_check_partials(data, atol=1e-10, rtol=1e-10)
+
+    unittest.main()
@@ -0,0 +1,77 @@
+import openmdao.api as om
+from mphys import Builder
+
+from .motor_current import MotorCurrent
+from .dc_loss import WireLength
+from .analytic_em import AnalyticEMState, AnalyticEMOutputs
+
+
+class AnalyticEMPrecouplingGroup(om.Group):
+    """
+    Group that computes the current density and fill factor for the analytic
+    EM model, mirroring EMMotorPrecouplingGroup
+    """
+
+    def setup(self):
+        self.add_subsystem("current",
+                           MotorCurrent(theta_e=[0.0]),
+                           promotes_inputs=["*"],
+                           promotes_outputs=["current_density",
+                                             "fill_factor"])
+
+        self.add_subsystem("wire_length",
+                           WireLength(),
+                           promotes_inputs=["*"],
+                           promotes_outputs=["wire_length"])
+
+
+class AnalyticEMMotorBuilder(Builder):
+    """
+    Builder for a closed form surface mounted Halbach EM model that can stand
+    in for EMMotorBuilder during design space exploration
+
+    The builder takes the same promoted inputs as EMMotorBuilder and has no
+    mesh or solver. It provides the scalar performance outputs (average_torque,
+    L, the losses, mass, efficiency, power, and phase_back_emf), but not the
+    field outputs (em_state, flux_magnitude, peak_flux) or the per rotor
+    position torque and flux linkages, since it models a single rotor position.
+    """
+
+    def __init__(self,
+                 num_poles,
+                 hallbach_segments=4,
+                 em_options=None,
+                 loss_options=None):
+        self.num_poles = num_poles
+        self.hallbach_segments = hallbach_segments
+        self.em_options = em_options if em_options is not None else {}
+        self.loss_options = loss_options if loss_options is not None else {}
+
+        self.coupled = None
+        self.analytic_geometry = True
+        self.heat_source_regions = []
+
+    def initialize(self, comm):
+        self.comm = comm
+        self.solvers = []
+
+    def get_coupling_group_subsystem(self, scenario_name=None):
+        return AnalyticEMState(num_poles=self.num_poles,
+                               hallbach_segments=self.hallbach_segments,
+                               **self.em_options)
+
+    def get_mesh_coordinate_subsystem(self, scenario_name=None):
+        return None
+
+    def get_pre_coupling_subsystem(self, scenario_name=None):
+        return AnalyticEMPrecouplingGroup()
+
+    def get_post_coupling_subsystem(self, scenario_name=None):
+        return AnalyticEMOutputs(num_poles=self.num_poles,
+                                 loss_options=self.loss_options)
+
+    def get_number_of_nodes(self):
+        return 0
+
+    def get_ndof(self):
+        return 0
@@ -0,0 +1,438 @@
+import numpy as np
+
+import openmdao.api as om
+
+from .valid_geometry import stator_yoke_fillet_angle, tooth_lengths
+from .dc_loss import WireLength
+
+
+class ComponentAreas(om.ExplicitComponent):
+    """
+    Component that calculates the cross sectional areas of the motor components
+    in closed form from the geometry parameters
+
+    The slot area is the Green's theorem integral used by ToothLengths with the
+    stator yoke fillet angle evaluated in closed form, so no implicit solve is
+    needed.
+    """
+
+    def setup(self):
+        self.add_input("stator_or",
+                       desc=" The outer radius of the stator",
+                       tags=["mphys_input"])
+        self.add_input("stator_ir",
+                       desc=" The inner radius of the stator",
+                       tags=["mphys_input"])
+        self.add_input("rotor_or",
+                       desc=" The outer radius of the rotor",
+                       tags=["mphys_input"])
+        self.add_input("rotor_ir",
+                       desc=" The inner radius of the rotor",
+                       tags=["mphys_input"])
+        self.add_input("magnet_thickness",
+                       desc="The thickness of the permanent magnets",
+                       tags=["mphys_input"])
+        self.add_input("slot_depth",
+                       desc=" The distance between the the stator inner radius and the edge of the stator yoke",
+                       tags=["mphys_input"])
+        self.add_input("tooth_width",
+                       desc=" The width of the tooth",
+                       tags=["mphys_input"])
+        self.add_input("tooth_tip_thickness",
+                       desc=" The thickness at the end of the tooth",
+                       tags=["mphys_input"])
+        self.add_input("tooth_tip_angle",
+                       desc=" The angle between the flat on the back of the shoe and the horizontal",
+                       tags=["mphys_input"])
+        self.add_input("slot_radius_stator",
+                       desc=" The radius of the fillet between the tooth and stator yoke",
+                       tags=["mphys_input"])
+        self.add_input("slot_radius_tooth",
+                       desc=" The radius of the fillet between the tooth and tooth tip",
+                       tags=["mphys_input"])
+        self.add_input("shoe_spacing",
+                       desc=" The spacing (length) between teeth tips",
+                       tags=["mphys_input"])
+        self.add_input("num_slots",
+                       desc=" The number of slots in the stator",
+                       tags=["mphys_input"])
+        self.add_input("coolant_thickness", val=0.0,
+                       desc=" The thickness of the in-slot-coolant (if there)",
+                       tags=["mphys_input"])
+
+        self.add_output("slot_area",
+                        desc=" The winding area on one side of a slot")
+        self.add_output("winding_area",
+                        desc=" The total winding area")
+        self.add_output("coolant_area",
+                        desc=" The total area of the in-slot coolant channels")
+        self.add_output("stator_area",
+                        desc=" The area of the stator iron")
+        self.add_output("rotor_area",
+                        desc=" The area of the rotor iron")
+        self.add_output("magnet_area",
+                        desc=" The area of the magnets")
+
+    def setup_partials(self):
+        self.declare_partials("slot_area", ["stator_or",
+                                            "stator_ir",
+                                            "slot_depth",
+                                            "tooth_width",
+                                            "tooth_tip_thickness",
+                                            "tooth_tip_angle",
+                                            "slot_radius_stator",
+                                            "slot_radius_tooth",
+                                            "shoe_spacing",
+                                            "num_slots",
+                                            "coolant_thickness"], method="cs")
+        self.declare_partials(["winding_area", "coolant_area", "stator_area"],
+                              ["stator_or",
+                               "stator_ir",
+                               "slot_depth",
+                               "tooth_width",
+                               "tooth_tip_thickness",
+                               "tooth_tip_angle",
+                               "slot_radius_stator",
+                               "slot_radius_tooth",
+                               "shoe_spacing",
+                               "num_slots",
+                               "coolant_thickness"], method="cs")
+        self.declare_partials(["rotor_area", "magnet_area"],
+                              ["rotor_or", "rotor_ir", "magnet_thickness"],
+                              method="cs")
+
+    def compute(self, inputs, outputs):
+        stator_or = inputs["stator_or"]
+        stator_ir = inputs["stator_ir"]
+        rotor_or = inputs["rotor_or"]
+        rotor_ir = inputs["rotor_ir"]
+        magnet_thickness = inputs["magnet_thickness"]
+        slot_depth = inputs["slot_depth"]
+        tooth_width = inputs["tooth_width"]
+        tooth_tip_thickness = inputs["tooth_tip_thickness"]
+        slot_radius_stator = inputs["slot_radius_stator"]
+        shoe_spacing = inputs["shoe_spacing"]
+        num_slots = inputs["num_slots"]
+        coolant_thickness = inputs["coolant_thickness"]
+
+        theta = stator_yoke_fillet_angle(stator_ir,
+                                         slot_depth,
+                                         tooth_width,
+                                         tooth_tip_thickness,
+                                         slot_radius_stator)
+
+        lengths = tooth_lengths(stator_or,
+                                stator_ir,
+                                rotor_or,
+                                rotor_ir,
+                                magnet_thickness,
+                                slot_depth,
+                                tooth_width,
+                                tooth_tip_thickness,
+                                inputs["tooth_tip_angle"],
+                                slot_radius_stator,
+                                inputs["slot_radius_tooth"],
+                                shoe_spacing,
+                                num_slots,
+                                coolant_thickness,
+                                theta)
+
+        slot_area = lengths["slot_area"]
+        outputs["slot_area"] = slot_area
+
+        # each slot holds the coil sides of two neighbouring teeth
+        winding_area = 2 * num_slots * slot_area
+        outputs["winding_area"] = winding_area
+
+        yoke_ir = stator_ir + tooth_tip_thickness + slot_depth
+        tip_r = stator_ir + tooth_tip_thickness
+        # the coolant channel is bounded by the rays that bound the slot areas
+        coolant_area = num_slots * coolant_thickness / (2 * yoke_ir) * \
+            (yoke_ir**2 - tip_r**2)
+        outputs["coolant_area"] = coolant_area
+
+        # the openings between the tooth tips
+        shoe_spacing_angle = shoe_spacing / stator_ir
+        opening_area = num_slots * shoe_spacing_angle / 2 * \
+            (tip_r**2 - stator_ir**2)
+
+        outputs["stator_area"] = np.pi * (stator_or**2 - stator_ir**2) \
+            - winding_area - coolant_area - opening_area
+
+        magnet_ir = rotor_or - magnet_thickness
+        outputs["magnet_area"] = np.pi * (rotor_or**2 - magnet_ir**2)
+        outputs["rotor_area"] = np.pi * (magnet_ir**2 - rotor_ir**2)
+
+
+class ComponentMass(om.ExplicitComponent):
+    """
+    Component that calculates the motor mass from the component areas
+    """
+
+    def initialize(self):
+        self.options.declare("stator_density", default=8110.0,
+                             desc=" The density of the stator laminations")
+        self.options.declare("rotor_density", default=8110.0,
+                             desc=" The density of the rotor laminations")
+        self.options.declare("magnet_density", default=7500.0,
+                             desc=" The density of the permanent magnets")
+        self.options.declare("winding_density", default=8960.0,
+                             desc=" The density of the winding conductors")
+
+    def _densities(self):
+        return {component: self.options[f"{component}_density"]
+                for component in ["stator", "rotor", "magnet", "winding"]}
+
+    def setup(self):
+        self.add_input("stator_area",
+                       desc=" The area of the stator iron")
+        self.add_input("rotor_area",
+                       desc=" The area of the rotor iron")
+        self.add_input("magnet_area",
+                       desc=" The area of the magnets")
+        self.add_input("winding_area",
+                       desc=" The total winding area")
+        self.add_input("fill_factor",
+                       desc=" The fraction of the winding area filled with copper",
+                       tags=["mphys_input"])
+        self.add_input("stack_length",
+                       desc=" The axial length of the motor",
+                       tags=["mphys_input"])
+
+        self.add_output("mass",
+                        desc=" The mass of the motor")
+
+    def setup_partials(self):
+        self.declare_partials("mass", "*")
+
+    def compute(self, inputs, outputs):
+        densities = self._densities()
+        outputs["mass"] = inputs["stack_length"] * \
+            (densities["stator"] * inputs["stator_area"]
+             + densities["rotor"] * inputs["rotor_area"]
+             + densities["magnet"] * inputs["magnet_area"]
+             + densities["winding"] * inputs["fill_factor"] * inputs["winding_area"])
+
+    def compute_partials(self, inputs, partials):
+        densities = self._densities()
+        stack_length = inputs["stack_length"]
+
+        partials["mass", "stator_area"] = stack_length * densities["stator"]
+        partials["mass", "rotor_area"] = stack_length * densities["rotor"]
+        partials["mass", "magnet_area"] = stack_length * densities["magnet"]
+        partials["mass", "winding_area"] = stack_length * \
+            densities["winding"] * inputs["fill_factor"]
+        partials["mass", "fill_factor"] = stack_length * \
+            densities["winding"] * inputs["winding_area"]
+        partials["mass", "stack_length"] = densities["stator"] * inputs["stator_area"] \
+            + densities["rotor"] * inputs["rotor_area"] \
+            + densities["magnet"] * inputs["magnet_area"] \
+            + densities["winding"] * inputs["fill_factor"] * inputs["winding_area"]
+
+
+class UniformDCLoss(om.ExplicitComponent):
+    """
+    Component that calculates the DC loss in the windings assuming a uniform
+    winding temperature
+    """
+
+    def initialize(self):
+        self.options.declare("resistivity", default=1.72e-8,
+                             desc=" The resistivity of copper at the reference temperature")
+        self.options.declare("alpha_resistivity", default=3.8e-3,
+                             desc=" The temperature coefficient of copper's resistivity")
+        self.options.declare("T_ref", default=293.15,
+                             desc=" The reference temperature for the resistivity")
+
+    def setup(self):
+        self.add_input("rms_current",
+                       desc=" RMS current value in each phase winding",
+                       tags=["mphys_input"])
+        self.add_input("strand_radius",
+                       desc=" Radius of one strand of litz wire",
+                       tags=["mphys_input"])
+        self.add_input("strands_in_hand",
+                       desc=" Number of strands in hand for litz wire",
+                       tags=["mphys_input"])
+        self.add_input("wire_length",
+                       desc=" The length of wire in a single phase")
+        self.add_input("winding_temperature", val=self.options["T_ref"],
+                       desc=" The temperature of the windings",
+                       tags=["mphys_input"])
+
+        self.add_output("dc_loss",
+                        desc=" The DC loss in the windings")
+
+    def setup_partials(self):
+        self.declare_partials("dc_loss", "*")
+
+    def compute(self, inputs, outputs):
+        rms_current = inputs["rms_current"]
+        strand_radius = inputs["strand_radius"]
+        strands_in_hand = inputs["strands_in_hand"]
+        wire_length = inputs["wire_length"]
+        temperature = inputs["winding_temperature"]
+
+        resistivity = self.options["resistivity"] * \
+            (1 + self.options["alpha_resistivity"]
+             * (temperature - self.options["T_ref"]))
+        resistance = resistivity * wire_length / \
+            (np.pi * strand_radius**2 * strands_in_hand)
+        outputs["dc_loss"] = np.sqrt(2) * rms_current**2 * resistance
+
+    def compute_partials(self, inputs, partials):
+        rms_current = inputs["rms_current"]
+        strand_radius = inputs["strand_radius"]
+        strands_in_hand = inputs["strands_in_hand"]
+        wire_length = inputs["wire_length"]
+        temperature = inputs["winding_temperature"]
+
+        resistivity = self.options["resistivity"] * \
+            (1 + self.options["alpha_resistivity"]
+             * (temperature - self.options["T_ref"]))
+        strand_area = np.pi * strand_radius**2 * strands_in_hand
+        dc_loss = np.sqrt(2) * rms_current**2 * \
+            resistivity * wire_length / strand_area
+
+        partials["dc_loss", "rms_current"] = 2 * dc_loss / rms_current
+        partials["dc_loss", "strand_radius"] = -2 * dc_loss / strand_radius
+        partials["dc_loss", "strands_in_hand"] = -dc_loss / strands_in_hand
+        partials["dc_loss", "wire_length"] = dc_loss / wire_length
+        partials["dc_loss", "winding_temperature"] = np.sqrt(2) * rms_current**2 \
+            * self.options["resistivity"] * self.options["alpha_resistivity"] \
+            * wire_length / strand_area
+
+
+class AnalyticGeometry(om.Group):
+    """
+    Group that calculates the motor mass and DC loss directly from the
+    geometry parameters, replacing the mass and DC loss mesh integrals
+    """
+
+    def initialize(self):
+        self.options.declare("mass_options", types=dict, default=None, allow_none=True,
+                             desc=" Options for the component mass, such as the material densities")
+        self.options.declare("dc_loss_options", types=dict, default=None, allow_none=True,
+                             desc=" Options for the uniform temperature DC loss")
+
+    def setup(self):
+        self.add_subsystem("areas",
+                           ComponentAreas(),
+                           promotes_inputs=["*"],
+                           promotes_outputs=["*"])
+
+        self.add_subsystem("mass",
+                           ComponentMass(**(self.options["mass_options"] or {})),
+                           promotes=["*"])
+
+        self.add_subsystem("wire_length",
+                           WireLength(),
+                           promotes=["*"])
+
+        self.add_subsystem("dc_loss",
+                           UniformDCLoss(**(self.options["dc_loss_options"] or {})),
+                           promotes=["*"])
+
+
+if __name__ == "__main__":
+    import unittest
+    from openmdao.utils.assert_utils import assert_near_equal, assert_check_partials
+
+    def _set_geometry(prob):
+        prob["stator_or"] = 0.659/2
+        prob["stator_ir"] = 0.550/2
+        prob["rotor_or"] = 0.270
+        prob["rotor_ir"] = 0.200
+        prob["magnet_thickness"] = 0.01
+        prob["slot_depth"] = 0.044
+        prob["tooth_width"] = 0.0125
+        prob["tooth_tip_thickness"] = 0.007
+        prob["tooth_tip_angle"] = 10
+        prob["slot_radius_stator"] = 0.005
+        prob["slot_radius_tooth"] = 0.005
+        prob["shoe_spacing"] = 0.01
+        prob["num_slots"] = 27
+        prob["coolant_thickness"] = 0.01
+
+    class TestComponentAreas(unittest.TestCase):
+        def test_component_areas(self):
+            prob = om.Problem()
+            prob.model.add_subsystem("areas", ComponentAreas(), promotes=["*"])
+            prob.setup(force_alloc_complex=True)
+            _set_geometry(prob)
+            prob.run_model()
+
+            # same slot area as the ValidLengths group
+            assert_near_equal(prob["slot_area"], 0.00102041, tolerance=1e-5)
+
+            data = prob.check_partials(method="fd", form="central", out_stream=None)
+            assert_check_partials(data)
+
+        def test_areas_by_hand(self):
+            import scipy.integrate
+
+            # without fillets a half slot is the region between the tooth side
+            # x = w/2 and the coolant channel's ray, from the tooth tips out to
+            # the yoke, less the wedge under the back of the shoe
+            prob = om.Problem()
+            prob.model.add_subsystem("areas", ComponentAreas(), promotes=["*"])
+            prob.setup()
+            _set_geometry(prob)
+            prob["slot_radius_stator"] = 1e-9
+            prob["slot_radius_tooth"] = 1e-9
+            prob.run_model()
+
+            n, w, c = 27, 0.0125, 0.01
+            r_i, r_o = 0.275, 0.659/2
+            r_t = r_i + 0.007
+            r_y = r_t + 0.044
+            opening_angle = 0.01 / r_i
+            shoe_angle = 2 * np.pi / n - opening_angle
+
+            coolant_angle = -np.pi/2 + np.pi/n - c / (2 * r_y)
+            sector = scipy.integrate.quad(lambda r: r * (coolant_angle + np.arccos(w / (2 * r))),
+                                          r_t, r_y)[0]
+
+            # the shoe back runs from the tip corner to the tooth side
+            tip_angle = -np.pi/2 + shoe_angle/2
+            tip_corner = r_t * np.array([np.cos(tip_angle), np.sin(tip_angle)])
+            back_angle = shoe_angle/2 + np.radians(10)
+            shoe_root = np.array([w/2, tip_corner[1] - np.tan(back_angle) * (tip_corner[0] - w/2)])
+            tooth_corner = np.array([w/2, -np.sqrt(r_t**2 - w**2/4)])
+            a = tip_corner - tooth_corner
+            b = shoe_root - tooth_corner
+            triangle = abs(a[0] * b[1] - a[1] * b[0]) / 2
+            arc_angle = tip_angle - np.arctan2(tooth_corner[1], tooth_corner[0])
+            circular_segment = r_t**2 / 2 * (arc_angle - np.sin(arc_angle))
+            half_slot = sector - (triangle - circular_segment)
+            assert_near_equal(prob["slot_area"], half_slot, tolerance=1e-6)
+
+            # the stator iron is the annulus less the slots, the coolant
+            # channels, and the openings between the tooth tips
+            coolant = n * c / (2 * r_y) * (r_y**2 - r_t**2)
+            openings = n * opening_angle / 2 * (r_t**2 - r_i**2)
+            stator = np.pi * (r_o**2 - r_i**2) - 2 * n * half_slot - coolant - openings
+            assert_near_equal(prob["stator_area"], stator, tolerance=1e-6)
+
+    class TestAnalyticGeometry(unittest.TestCase):
+        def test_dc_loss(self):
+            prob = om.Problem()
+            prob.model = AnalyticGeometry()
+            prob.setup(force_alloc_complex=True)
+            _set_geometry(prob)
+            prob["tooth_width"] = 0.030
+            prob["num_turns"] = 38
+            prob["stack_length"] = 0.310
+            prob["rms_current"] = 131.58125719
+            prob["strand_radius"] = 0.001671
+            prob["strands_in_hand"] = 1
+            prob["fill_factor"] = 0.5
+            prob.run_model()
+
+            # matches the mesh integrated DC loss at the reference temperature
+            assert_near_equal(prob["dc_loss"], 40638.09914441, tolerance=0.005)
+
+            data = prob.check_partials(method="fd", form="central", out_stream=None)
+            assert_check_partials(data)
+
+    unittest.main()
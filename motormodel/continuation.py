@@ -0,0 +1,215 @@
+import numpy as np
+
+from .operating_map import sweep_order
+
+
+class ContinuationSweep(object):
+    """
+    Sweep a set up problem, such as one containing Motor, through a list of
+    operating points using continuation
+
+    Points are visited in nearest neighbor order starting from the point with
+    the smallest (scaled) parameters. Each solve starts from the previous
+    converged state plus a first order prediction along the tangent
+    dstate/dparameter from the linearized system. If the residual of the
+    solved states is above res_tol the step is halved and retried from the
+    last converged state, and the step grows again after successful steps.
+
+    The parameters must be independent inputs of the model, not outputs
+    computed from other inputs (in Motor, current_density is computed from
+    rms_current), since they are set directly and differentiated against.
+    """
+
+    def __init__(self,
+                 problem,
+                 parameters=("rms_current",),
+                 states=None,
+                 outputs=(),
+                 res_tol=1e-6,
+                 min_step=1.0 / 64,
+                 predictor=True):
+        self.problem = problem
+        self.parameters = list(parameters)
+        self.states = list(states) if states is not None else None
+        self.outputs = list(outputs)
+        self.res_tol = res_tol
+        self.min_step = min_step
+        self.predictor = predictor and self.states is not None
+
+        self.num_solves = 0
+        self.num_cuts = 0
+
+    def _residual_norm(self):
+        model = self.problem.model
+        model.run_apply_nonlinear()
+        if self.states is None:
+            return model._residuals.get_norm()
+
+        norm2 = sum(np.sum(np.real(model._residuals[name])**2)
+                    for name in self.states)
+        comm = self.problem.comm
+        if comm.size > 1:
+            norm2 = comm.allreduce(norm2)
+        return np.sqrt(norm2)
+
+    def _set_parameters(self, point):
+        for name, val in zip(self.parameters, point):
+            self.problem.set_val(name, val)
+
+    def _get_states(self):
+        return {name: self.problem.get_val(name).copy() for name in self.states}
+
+    def _set_states(self, states):
+        for name, val in states.items():
+            self.problem.set_val(name, val)
+
+    def _tangent(self):
+        """
+        dstate/dparameter at the current converged point
+        """
+        totals = self.problem.compute_totals(of=self.states, wrt=self.parameters)
+        return {name: [np.asarray(totals[name, wrt]).ravel() for wrt in self.parameters]
+                for name in self.states}
+
+    def _solve(self, point, start, states, tangent):
+        """
+        Solve at point starting from the converged states at start
+        """
+        self._set_parameters(point)
+        if states is not None:
+            guess = {}
+            for name, val in states.items():
+                guess[name] = val.copy()
+                if tangent is not None:
+                    for dval, dp in zip(tangent[name], point - start):
+                        guess[name] += dval * dp
+            self._set_states(guess)
+
+        self.problem.run_model()
+        self.num_solves += 1
+        return self._residual_norm() <= self.res_tol
+
+    def run(self, points):
+        """
+        Solve at each point (one row per point, one column per parameter)
+
+        Returns a dict with each output at each point, in the original order,
+        and a boolean array of which points converged
+        """
+        points = np.atleast_2d(np.asarray(points, dtype=float))
+        num_points = points.shape[0]
+
+        scale = np.max(np.abs(points), axis=0)
+        scale[scale == 0.0] = 1.0
+        start_index = int(np.argmin(np.linalg.norm(points / scale, axis=1)))
+        order = sweep_order(points, start=start_index)
+
+        results = {name: [None] * num_points for name in self.outputs}
+        converged = np.zeros(num_points, dtype=bool)
+
+        start = None
+        states = None
+        tangent = None
+        step = 1.0
+        for index in order:
+            target = points[index]
+            if start is None:
+                converged[index] = self._solve(target, target, None, None)
+                if self.states is not None:
+                    states = self._get_states()
+                    tangent = self._tangent() if self.predictor and converged[index] else None
+            else:
+                fraction = 0.0
+                while fraction < 1.0:
+                    trial = min(fraction + step, 1.0)
+                    point = start + trial * (target - start)
+                    if self._solve(point, start, states, tangent):
+                        fraction = trial
+                        start = point
+                        states = self._get_states() if self.states is not None else None
+                        tangent = self._tangent() if self.predictor else None
+                        step = min(2.0 * step, 1.0)
+                        continue
+
+                    self.num_cuts += 1
+                    step *= 0.5
+                    if step < self.min_step:
+                        break
+                    if states is not None:
+                        self._set_states(states)
+
+                converged[index] = fraction == 1.0
+                if not converged[index]:
+                    # keep going from the target even though it did not converge
+                    step = 1.0
+                    if self.states is not None:
+                        states = self._get_states()
+                        tangent = None
+
+            for name in self.outputs:
+                results[name][index] = self.problem.get_val(name).copy()
+
+            start = target.copy()
+
+        for name in self.outputs:
+            results[name] = np.array(results[name])
+        return results, converged
+
+
+if __name__ == "__main__":
+    import unittest
+    import openmdao.api as om
+
+    class Saturating(om.ImplicitComponent):
+        """
+        atan(u) = p, whose Newton iteration diverges from far away starts
+        """
+
+        def setup(self):
+            self.add_input("p")
+            self.add_output("u")
+            self.declare_partials("u", ["u", "p"])
+
+        def apply_nonlinear(self, inputs, outputs, residuals):
+            residuals["u"] = np.arctan(outputs["u"]) - inputs["p"]
+
+        def linearize(self, inputs, outputs, partials):
+            partials["u", "u"] = 1 / (1 + outputs["u"]**2)
+            partials["u", "p"] = -1.0
+
+    def _problem():
+        prob = om.Problem(reports=False)
+        prob.model.add_subsystem("sat", Saturating(), promotes=["*"])
+        prob.model.add_subsystem("out", om.ExecComp("y = 2*u"), promotes=["*"])
+        prob.model.nonlinear_solver = om.NewtonSolver(maxiter=6,
+                                                      solve_subsystems=False,
+                                                      err_on_non_converge=False,
+                                                      iprint=-1)
+        prob.model.linear_solver = om.DirectSolver()
+        prob.setup()
+        return prob
+
+    class TestContinuationSweep(unittest.TestCase):
+        points = np.array([[1.52], [0.4], [1.2], [1.45], [0.8]])
+
+        def test_sweep(self):
+            sweep = ContinuationSweep(_problem(), parameters=["p"], states=["u"],
+                                      outputs=["y"], res_tol=1e-10)
+            results, converged = sweep.run(self.points)
+            self.assertTrue(np.all(converged))
+            np.testing.assert_allclose(results["y"].ravel(),
+                                       2 * np.tan(self.points.ravel()), rtol=1e-8)
+
+        def test_cold_starts_fail(self):
+            prob = _problem()
+            failures = 0
+            for p in self.points.ravel():
+                prob["p"] = p
+                prob["u"] = 0.0
+                prob.run_model()
+                prob.model.run_apply_nonlinear()
+                if np.abs(prob.model._residuals["u"]) > 1e-10:
+                    failures += 1
+            self.assertGreater(failures, 0)
+
+    unittest.main()
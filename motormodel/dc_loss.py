@@ -31,7 +31,7 @@ class WireLength(om.ExplicitComponent):
         self.add_output("wire_length",
                         desc=" The length of wire in a single phase")
 
-        self.declare_partials("*", "*", method="cs")
+        self.declare_partials("*", "*")
 
     def compute(self, inputs, outputs):
         num_slots = inputs["num_slots"][0]
@@ -67,6 +67,28 @@ class WireLength(om.ExplicitComponent):
 
         outputs["wire_length"] = length
 
+    def compute_partials(self, inputs, partials):
+        num_slots = inputs["num_slots"][0]
+        num_turns = inputs["num_turns"][0]
+        stator_ir = inputs["stator_ir"][0]
+        tooth_tip_thickness = inputs["tooth_tip_thickness"][0]
+        slot_depth = inputs["slot_depth"][0]
+        tooth_width = inputs["tooth_width"][0]
+        stack_length = inputs["stack_length"][0]
+
+        r_sum = 2 * stator_ir + slot_depth + tooth_tip_thickness
+        slot_width = np.pi * r_sum / num_slots
+        turn_length = 2 * stack_length + np.pi * (tooth_width + slot_width / 2)
+
+        partials["wire_length", "num_slots"] = num_turns * turn_length \
+            - num_turns * np.pi**2 * r_sum / (2 * num_slots)
+        partials["wire_length", "num_turns"] = num_slots * turn_length
+        partials["wire_length", "stator_ir"] = num_turns * np.pi**2 + np.pi
+        partials["wire_length", "tooth_tip_thickness"] = (num_turns * np.pi**2 + np.pi) / 2
+        partials["wire_length", "slot_depth"] = (num_turns * np.pi**2 + np.pi) / 2
+        partials["wire_length", "tooth_width"] = num_slots * num_turns * np.pi
+        partials["wire_length", "stack_length"] = 2 * num_slots * num_turns
+
 
 class DCLoss(om.Group):
     def initialize(self):
@@ -0,0 +1,232 @@
+import fnmatch
+import sys
+
+import numpy as np
+import openmdao.api as om
+from openmdao.core.component import Component
+
+
+def _matches(pathname, includes, excludes):
+    if includes is not None and \
+            not any(fnmatch.fnmatchcase(pathname, pattern) for pattern in includes):
+        return False
+    if excludes is not None and \
+            any(fnmatch.fnmatchcase(pathname, pattern) for pattern in excludes):
+        return False
+    return True
+
+
+def _relative(error, magnitude):
+    """
+    Error relative to the largest magnitude of the derivatives being compared,
+    or the absolute error if they are all zero
+    """
+    if error is None:
+        return 0.0
+    scale = max(value for value in magnitude if value is not None)
+    return error / scale if scale > 0.0 else error
+
+
+# Order of the truncation error of each finite difference form
+_orders = {"forward": 1, "backward": 1, "central": 2}
+
+
+def _observed_order(steps, errors):
+    """
+    Largest convergence order of the errors between consecutive steps
+    """
+    orders = [np.log(e0 / e1) / np.log(h0 / h1)
+              for h0, h1, e0, e1 in zip(steps[:-1], steps[1:], errors[:-1], errors[1:])
+              if e0 > 0.0 and e1 > 0.0]
+    return max(orders) if orders else 0.0
+
+
+def _check_errors(check):
+    """
+    Return the forward/reverse dot product error and, for each finite
+    difference step, the largest error of the forward and reverse products
+    """
+    dot_product = 0.0
+    taylor = []
+    for abs_error, magnitude in zip(check["abs error"], check["magnitude"]):
+        dot_product = max(dot_product, _relative(abs_error.fwd_rev, magnitude))
+        taylor.append(max(_relative(abs_error.forward, magnitude),
+                          _relative(abs_error.reverse, magnitude)))
+    return dot_product, taylor
+
+
+def randomized_check_partials(problem,
+                              includes=None,
+                              excludes=None,
+                              num_directions=3,
+                              method="fd",
+                              steps=(1e-3, 5e-4, 2.5e-4),
+                              form="central",
+                              dot_tol=1e-8,
+                              taylor_tol=1e-5,
+                              seed=0,
+                              out_stream=sys.stdout):
+    """
+    Check component partials along a few random directions instead of
+    column by column
+
+    A full check_partials with finite differences or complex step costs one
+    evaluation per input entry, which is unusable for inputs the size of the
+    mesh. Here each input is perturbed along num_directions random directions
+    only, so the cost is independent of the mesh size. Two tests are run:
+    the dot product test compares w^T (J v) from the forward product with
+    (J^T w)^T v from the reverse product, and the Taylor test compares both
+    products with finite differences at each step in steps (largest first).
+    A component passes if the dot product test is within dot_tol and, for
+    every direction, either the Taylor errors are all within taylor_tol or
+    they shrink at the order of the finite difference form (2 for central
+    differences and complex step, 1 for forward and backward) as the step
+    shrinks. Components are selected by pathname with glob style includes
+    and excludes. The problem must have been set up and run. The components'
+    check options and numpy's global random state are restored afterwards.
+    Returns a dict of {pathname: {"passed", "dot_product", "taylor",
+    "order"}}.
+    """
+    components = [comp for comp in problem.model.system_iter(recurse=True, typ=Component)
+                  if not isinstance(comp, om.IndepVarComp)
+                  and _matches(comp.pathname, includes, excludes)]
+    steps = sorted(steps, reverse=True)
+    order = 2 if method == "cs" else _orders[form]
+
+    saved_checks = {comp.pathname: list(comp._declared_partial_checks) for comp in components}
+    # check_partials draws its directions from numpy's global generator
+    random_state = np.random.get_state()
+    results = {comp.pathname: {"passed": True, "dot_product": 0.0, "taylor": 0.0,
+                               "order": np.inf}
+               for comp in components}
+    pathnames = list(results.keys())
+    try:
+        for comp in components:
+            comp.set_check_partial_options(wrt="*", method=method, directional=True)
+
+        for direction in range(num_directions):
+            np.random.seed(seed + direction)
+            data = problem.check_partials(out_stream=None,
+                                          includes=pathnames,
+                                          method=method,
+                                          step=steps,
+                                          form=form)
+
+            for pathname, checks in data.items():
+                result = results[pathname]
+                for check in checks.values():
+                    dot_product, taylor = _check_errors(check)
+                    result["dot_product"] = max(result["dot_product"], dot_product)
+                    result["taylor"] = max(result["taylor"], min(taylor))
+                    if max(taylor) > taylor_tol:
+                        observed = _observed_order(steps, taylor)
+                        result["order"] = min(result["order"], observed)
+                        if observed < order - 0.5:
+                            result["passed"] = False
+                    if dot_product > dot_tol:
+                        result["passed"] = False
+    finally:
+        for comp in components:
+            comp._declared_partial_checks = saved_checks[comp.pathname]
+        np.random.set_state(random_state)
+
+    if out_stream is not None and problem.comm.rank == 0:
+        width = max([len(pathname) for pathname in pathnames] + [9])
+        print(f"{'component':<{width}}  {'dot product':>11}  {'taylor':>11}  {'order':>6}  result",
+              file=out_stream)
+        for pathname, result in results.items():
+            print(f"{pathname:<{width}}  {result['dot_product']:11.3e}  "
+                  f"{result['taylor']:11.3e}  {result['order']:6.2f}  "
+                  f"{'pass' if result['passed'] else 'FAIL'}",
+                  file=out_stream)
+
+    return results
+
+
+if __name__ == "__main__":
+    import unittest
+
+    class MatrixFree(om.ExplicitComponent):
+        """
+        Matrix-free component like MachFunctional, optionally with a wrong
+        reverse product
+        """
+
+        def initialize(self):
+            self.options.declare("n", default=2000)
+            self.options.declare("bad_reverse", default=False)
+            self.options.declare("bad_forward", default=False)
+
+        def setup(self):
+            n = self.options["n"]
+            self.add_input("mesh_coords", np.linspace(0.1, 1.0, n))
+            self.add_input("scale", 2.0)
+            self.add_output("func", 0.0)
+
+        def compute(self, inputs, outputs):
+            outputs["func"] = inputs["scale"] * np.sum(np.sin(inputs["mesh_coords"]))
+
+        def compute_jacvec_product(self, inputs, d_inputs, d_outputs, mode):
+            x = inputs["mesh_coords"]
+            if mode == "fwd":
+                # a wrong forward product that agrees with a wrong reverse product
+                factor = 1.001 if self.options["bad_forward"] else 1.0
+                if "mesh_coords" in d_inputs:
+                    d_outputs["func"] += factor * inputs["scale"] * np.dot(np.cos(x), d_inputs["mesh_coords"])
+                if "scale" in d_inputs:
+                    d_outputs["func"] += np.sum(np.sin(x)) * d_inputs["scale"]
+            else:
+                factor = 1.1 if self.options["bad_reverse"] else 1.0
+                factor *= 1.001 if self.options["bad_forward"] else 1.0
+                if "mesh_coords" in d_inputs:
+                    d_inputs["mesh_coords"] += factor * inputs["scale"] * np.cos(x) * d_outputs["func"]
+                if "scale" in d_inputs:
+                    d_inputs["scale"] += np.sum(np.sin(x)) * d_outputs["func"]
+
+    class TestRandomizedCheckPartials(unittest.TestCase):
+        def test_pass_and_fail(self):
+            prob = om.Problem(reports=False)
+            prob.model.add_subsystem("good", MatrixFree())
+            prob.model.add_subsystem("bad", MatrixFree(bad_reverse=True))
+            prob.model.add_subsystem("other", om.ExecComp("y = 2*x"))
+            prob.setup()
+            prob.run_model()
+
+            results = randomized_check_partials(prob, includes=["good", "bad"],
+                                                out_stream=None)
+            self.assertEqual(set(results.keys()), {"good", "bad"})
+            self.assertTrue(results["good"]["passed"])
+            self.assertFalse(results["bad"]["passed"])
+            self.assertGreater(results["bad"]["dot_product"], 1e-2)
+
+        def test_convergence_order(self):
+            prob = om.Problem(reports=False)
+            prob.model.add_subsystem("good", MatrixFree())
+            prob.model.add_subsystem("bad", MatrixFree(bad_forward=True))
+            prob.setup()
+            prob.run_model()
+
+            # with a tolerance below the truncation error only the order can pass
+            results = randomized_check_partials(prob, taylor_tol=1e-9, out_stream=None)
+            self.assertTrue(results["good"]["passed"])
+            self.assertGreater(results["good"]["order"], 1.5)
+            # consistent products pass the dot product test but not the Taylor test
+            self.assertLess(results["bad"]["dot_product"], 1e-8)
+            self.assertFalse(results["bad"]["passed"])
+
+        def test_restores_state(self):
+            prob = om.Problem(reports=False)
+            prob.model.add_subsystem("good", MatrixFree())
+            prob.setup()
+            prob.run_model()
+            prob.model.good.set_check_partial_options(wrt="scale", method="cs")
+            checks = list(prob.model.good._declared_partial_checks)
+
+            np.random.seed(42)
+            expected = np.random.rand()
+            np.random.seed(42)
+            randomized_check_partials(prob, out_stream=None)
+            self.assertEqual(np.random.rand(), expected)
+            self.assertEqual(prob.model.good._declared_partial_checks, checks)
+
+    unittest.main()
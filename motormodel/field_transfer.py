@@ -0,0 +1,333 @@
+from pathlib import Path
+
+import numpy as np
+import openmdao.api as om
+import scipy.sparse
+import scipy.spatial
+
+from .utils import design_var_dependents, fingerprint
+
+
+def build_transfer_operator(source_coords, target_coords, dim=2):
+    """
+    Build the sparse operator that linearly interpolates nodal values from the
+    source mesh's nodes to the target mesh's nodes
+
+    Each target node is located in the Delaunay triangulation of the source
+    nodes and gets the barycentric weights of the enclosing simplex. Target
+    nodes outside of the source triangulation (for example on curved
+    boundaries) take the value of the nearest source node. Every row sums to
+    one, so the transpose of the operator conserves the total of a load vector
+    transferred from the target mesh to the source mesh.
+
+    Parameters
+    ----------
+    source_coords : np.ndarray
+        Interleaved (x, y[, z]) coordinates of the source mesh nodes
+    target_coords : np.ndarray
+        Interleaved (x, y[, z]) coordinates of the target mesh nodes
+    dim : int
+        Spatial dimension of the coordinates
+
+    Returns
+    -------
+    operator : scipy.sparse.csr_matrix
+        (num target nodes) x (num source nodes) interpolation operator
+    """
+    source = np.asarray(source_coords, dtype=float).reshape(-1, dim)
+    target = np.asarray(target_coords, dtype=float).reshape(-1, dim)
+    num_source = source.shape[0]
+    num_target = target.shape[0]
+
+    triangulation = scipy.spatial.Delaunay(source)
+    simplices = triangulation.find_simplex(target)
+
+    rows = []
+    cols = []
+    vals = []
+
+    inside = np.nonzero(simplices >= 0)[0]
+    if inside.size > 0:
+        transforms = triangulation.transform[simplices[inside]]
+        partial = np.einsum("nij,nj->ni",
+                            transforms[:, :dim, :],
+                            target[inside] - transforms[:, dim, :])
+        barycentric = np.hstack(
+            [partial, 1 - partial.sum(axis=1, keepdims=True)])
+        vertices = triangulation.simplices[simplices[inside]]
+
+        rows.append(np.repeat(inside, dim + 1))
+        cols.append(vertices.ravel())
+        vals.append(barycentric.ravel())
+
+    outside = np.nonzero(simplices < 0)[0]
+    if outside.size > 0:
+        _, nearest = scipy.spatial.cKDTree(source).query(target[outside])
+        rows.append(outside)
+        cols.append(nearest)
+        vals.append(np.ones(outside.size))
+
+    operator = scipy.sparse.csr_matrix((np.concatenate(vals),
+                                        (np.concatenate(rows),
+                                         np.concatenate(cols))),
+                                       shape=(num_target, num_source))
+    operator.eliminate_zeros()
+    return operator
+
+
+def load_transfer_operator(source_coords, target_coords, dim=2, cache_dir=None):
+    """
+    Load the transfer operator between two meshes from the cache directory,
+    building and storing it if it has not been computed before
+
+    The operator is keyed on a hash of both meshes' coordinates, so it is
+    rebuilt automatically if either mesh changes.
+    """
+    if cache_dir is None:
+        return build_transfer_operator(source_coords, target_coords, dim)
+
+    key = fingerprint(source_coords, target_coords, np.array([dim]))
+    cache_path = Path(cache_dir) / f"transfer_{key}.npz"
+    if cache_path.exists():
+        return scipy.sparse.load_npz(cache_path).tocsr()
+
+    operator = build_transfer_operator(source_coords, target_coords, dim)
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    scipy.sparse.save_npz(cache_path, operator)
+    return operator
+
+
+class MeshTransfer(object):
+    """
+    Transfer of nodal fields between two (possibly differently partitioned)
+    meshes using a cached interpolation operator
+
+    The operator interpolates from the source to the target mesh. The
+    transpose is used to move load vectors from the target to the source mesh
+    so the total load is conserved. Both meshes are assumed to use nodal
+    (degree one) fields ordered like their mesh coordinates, and the operator
+    is built from the meshes as read from file.
+    """
+
+    def __init__(self, source_solver, target_solver, comm, dim=2, cache_dir=None):
+        source_coords = self._local_coordinates(source_solver)
+        target_coords = self._local_coordinates(target_solver)
+
+        self.comm = comm
+        self.dim = dim
+        self.source_sizes = np.array(comm.allgather(source_coords.size // dim))
+        self.target_sizes = np.array(comm.allgather(target_coords.size // dim))
+
+        global_source = np.concatenate(comm.allgather(source_coords))
+        global_target = np.concatenate(comm.allgather(target_coords))
+
+        if comm.rank == 0:
+            operator = load_transfer_operator(global_source, global_target,
+                                              dim=dim, cache_dir=cache_dir)
+        else:
+            operator = None
+        operator = comm.bcast(operator, root=0)
+
+        # rows for this rank's target nodes
+        target_offset = np.sum(self.target_sizes[:comm.rank])
+        self.operator = operator[target_offset:target_offset +
+                                 self.target_sizes[comm.rank], :].tocsr()
+        self.operator_T = self.operator.T.tocsr()
+        self.source_offset = np.sum(self.source_sizes[:comm.rank])
+
+    @staticmethod
+    def _local_coordinates(solver):
+        coords = np.zeros(solver.getFieldSize("mesh_coords"))
+        solver.getMeshCoordinates(coords)
+        return coords
+
+    @property
+    def num_source(self):
+        return self.source_sizes[self.comm.rank]
+
+    @property
+    def num_target(self):
+        return self.target_sizes[self.comm.rank]
+
+    def interpolate(self, source_field):
+        """
+        Interpolate a nodal field from the source to the target mesh
+        """
+        global_source = np.concatenate(self.comm.allgather(source_field))
+        return self.operator @ global_source
+
+    def restrict(self, target_load):
+        """
+        Conservatively transfer a load vector from the target to the source mesh
+        """
+        global_load = self.operator_T @ target_load
+        global_load = self.comm.allreduce(global_load)
+        return global_load[self.source_offset:self.source_offset + self.num_source]
+
+
+class FieldTransfer(om.ExplicitComponent):
+    """
+    Component that moves a field between the EM and thermal meshes
+
+    With reverse=False the input is a nodal field on the source mesh that is
+    interpolated to the target mesh. With reverse=True the input is a load
+    vector on the target mesh that is conservatively restricted to the source
+    mesh.
+    """
+
+    def initialize(self):
+        self.options.declare("transfer", types=MeshTransfer, recordable=False,
+                             desc=" The mesh transfer between the two meshes")
+        self.options.declare("reverse", types=bool, default=False,
+                             desc=" Restrict loads from the target to the source mesh")
+
+    def setup(self):
+        transfer = self.options["transfer"]
+        if self.options["reverse"]:
+            in_size, out_size = transfer.num_target, transfer.num_source
+        else:
+            in_size, out_size = transfer.num_source, transfer.num_target
+
+        self.add_input("field_in",
+                       distributed=True,
+                       shape=in_size,
+                       tags=["mphys_coupling"])
+        self.add_output("field_out",
+                        distributed=True,
+                        shape=out_size,
+                        tags=["mphys_coupling"])
+
+    def _apply(self, field, transpose):
+        transfer = self.options["transfer"]
+        if self.options["reverse"] != transpose:
+            return transfer.restrict(field)
+        return transfer.interpolate(field)
+
+    def compute(self, inputs, outputs):
+        outputs["field_out"] = self._apply(inputs["field_in"], transpose=False)
+
+    def compute_jacvec_product(self, inputs, d_inputs, d_outputs, mode):
+        if "field_in" not in d_inputs or "field_out" not in d_outputs:
+            return
+
+        if mode == "fwd":
+            d_outputs["field_out"] += self._apply(d_inputs["field_in"],
+                                                  transpose=False)
+        elif mode == "rev":
+            d_inputs["field_in"] += self._apply(d_outputs["field_out"],
+                                                transpose=True)
+
+
+class FixedMeshCoordinates(om.ExplicitComponent):
+    """
+    Outputs a solver's mesh coordinates as read from its mesh file, used for a
+    thermal mesh that does not move with the geometry
+
+    The transfer operators to and from this mesh are built once, so the model
+    refuses to run when design variables move the mesh it is paired with.
+    """
+
+    def initialize(self):
+        self.options.declare("solver", recordable=False,
+                             desc=" The mach solver whose mesh coordinates are output")
+        self.options.declare("moving_mesh", default=None,
+                             desc=" The output, relative to the parent group, that the paired"
+                                  " mesh moves with")
+
+    def setup(self):
+        solver = self.options["solver"]
+        self.coords = np.zeros(solver.getFieldSize("mesh_coords"))
+        solver.getMeshCoordinates(self.coords)
+        self.add_output("mesh_coords",
+                        val=self.coords,
+                        distributed=True,
+                        tags=["mphys_coordinates"])
+        self._checked_design_vars = False
+
+    def compute(self, inputs, outputs):
+        moving_mesh = self.options["moving_mesh"]
+        if moving_mesh is not None and not self._checked_design_vars:
+            self._checked_design_vars = True
+            parent = self.pathname.rpartition(".")[0]
+            moving_mesh = f"{parent}.{moving_mesh}" if parent else moving_mesh
+            if design_var_dependents(self, [moving_mesh]):
+                raise ValueError(f"{self.msginfo}: design variables move {moving_mesh}, "
+                                 "but this mesh and its transfer operators are fixed")
+
+        outputs["mesh_coords"] = self.coords
+
+
+if __name__ == "__main__":
+    import tempfile
+    import unittest
+
+    class TestTransferOperator(unittest.TestCase):
+        # fine and coarse meshes of an annulus
+        def _annulus(self, num_r, num_theta, inner=0.5, outer=1.0):
+            r, theta = np.meshgrid(np.linspace(inner, outer, num_r),
+                                   np.linspace(0, 2*np.pi, num_theta, endpoint=False))
+            return np.column_stack([(r * np.cos(theta)).ravel(),
+                                    (r * np.sin(theta)).ravel()]).ravel()
+
+        def test_interpolation_and_conservation(self):
+            coarse = self._annulus(5, 24)
+            fine = self._annulus(12, 96)
+
+            operator = build_transfer_operator(coarse, fine)
+            np.testing.assert_allclose(np.asarray(operator.sum(axis=1)).ravel(), 1.0)
+
+            # linear fields are reproduced exactly inside the coarse mesh
+            coarse_xy = coarse.reshape(-1, 2)
+            fine_xy = fine.reshape(-1, 2)
+            field = 2 * coarse_xy[:, 0] - 3 * coarse_xy[:, 1] + 1
+            inside = scipy.spatial.Delaunay(coarse_xy).find_simplex(fine_xy) >= 0
+            np.testing.assert_allclose((operator @ field)[inside],
+                                       (2 * fine_xy[:, 0] - 3 * fine_xy[:, 1] + 1)[inside])
+
+            # total load is conserved moving from the fine to the coarse mesh
+            load = np.random.default_rng(0).random(fine_xy.shape[0])
+            self.assertAlmostEqual(np.sum(operator.T @ load), np.sum(load))
+
+        def test_cache(self):
+            coarse = self._annulus(4, 16)
+            fine = self._annulus(8, 48)
+            with tempfile.TemporaryDirectory() as cache_dir:
+                built = load_transfer_operator(coarse, fine, cache_dir=cache_dir)
+                self.assertEqual(len(list(Path(cache_dir).glob("*.npz"))), 1)
+                loaded = load_transfer_operator(coarse, fine, cache_dir=cache_dir)
+                self.assertEqual((built != loaded).nnz, 0)
+
+    class TestFixedMeshCoordinates(unittest.TestCase):
+        class FileMesh(object):
+            coords = np.arange(6.0)
+
+            def getFieldSize(self, name):
+                return self.coords.size
+
+            def getMeshCoordinates(self, coords):
+                coords[:] = self.coords
+
+        def test_moving_geometry(self):
+            for design_var in ["current", "radius"]:
+                prob = om.Problem(reports=False)
+                motor = prob.model.add_subsystem("motor", om.Group())
+                motor.add_subsystem("geom", om.ExecComp("x_surf = 2 * radius"),
+                                    promotes_inputs=["radius"])
+                motor.add_subsystem("thermal_mesh",
+                                    FixedMeshCoordinates(solver=self.FileMesh(),
+                                                         moving_mesh="geom.x_surf"))
+                motor.add_subsystem("loss", om.ExecComp("loss = current * x_surf"),
+                                    promotes_inputs=["current"])
+                motor.connect("geom.x_surf", "loss.x_surf")
+                prob.model.add_design_var(f"motor.{design_var}")
+                prob.model.add_objective("motor.loss.loss")
+                prob.setup()
+                if design_var == "radius":
+                    with self.assertRaisesRegex(ValueError, "design variables move"):
+                        prob.run_model()
+                else:
+                    prob.run_model()
+                    np.testing.assert_equal(prob["motor.thermal_mesh.mesh_coords"],
+                                            self.FileMesh.coords)
+
+    unittest.main()
@@ -24,7 +24,9 @@ class Inductance(om.ExplicitComponent):
         # self.add_output("L_d")
         # self.add_output("L_fd")
 
-        self.declare_partials('*', '*', method='cs')
+        self.declare_partials("L", "L_le", val=1.0)
+        for idx in range(n):
+            self.declare_partials("L", [f"flux_linkage_q{idx}", f"current_q{idx}"])
 
     def compute(self, inputs, outputs):
         n = self.options['n']
@@ -38,6 +40,16 @@ class Inductance(om.ExplicitComponent):
 
         outputs["L"] = L_q / n + L_le
 
+    def compute_partials(self, inputs, partials):
+        n = self.options['n']
+
+        for idx in range(n):
+            flux_linkage_q = inputs[f"flux_linkage_q{idx}"]
+            current_q = inputs[f"current_q{idx}"]
+            sign = np.sign(np.real(flux_linkage_q / current_q))
+            partials["L", f"flux_linkage_q{idx}"] = sign / current_q / n
+            partials["L", f"current_q{idx}"] = -sign * flux_linkage_q / current_q**2 / n
+
         # L_d = 0
         # for idx in range(n-1):
         #     delta_flux_linkage = inputs[f"flux_linkage_q{idx}"] - \
@@ -54,6 +66,7 @@ class Inductance(om.ExplicitComponent):
 
 if __name__ == "__main__":
     import unittest
+    from openmdao.utils.assert_utils import assert_check_partials
 
     class TestInductance(unittest.TestCase):
         def test_inductance(self):
@@ -65,9 +78,16 @@ if __name__ == "__main__":
 
             prob.setup()
 
+            for idx in range(3):
+                prob[f"flux_linkage_q{idx}"] = 0.01 * (idx + 1) * (-1)**idx
+                prob[f"current_q{idx}"] = 20.0 + idx
+
             prob.run_model()
 
             prob.model.list_inputs()
             prob.model.list_outputs()
 
+            partial_data = prob.check_partials(method="cs", out_stream=None)
+            assert_check_partials(partial_data)
+
     unittest.main()
@@ -54,28 +54,57 @@ class RectangularDuctCooling(om.ExplicitComponent):
     def initialize(self):
         self.options.declare("Re_turbulent", default=3000,
                              desc=" The Reynolds number where turbulence starts")
+        self.options.declare("num_nodes", types=int, default=1,
+                             desc=" The number of independent ducts/operating points to evaluate")
 
     def setup(self):
-        self.add_input("duct_length", units='m')
-        self.add_input("duct_width", units='m')
-        self.add_input("duct_height", units='m')
-        self.add_input("fluid_velocity", units='m/s')
-        self.add_input("kinematic_viscosity", units="m**2/s")
-        self.add_input("specific_heat_const_pressure", units="J/(kg*K)")
-        self.add_input("dynamic_viscosity", units="N*s/m**2")
-        self.add_input("thermal_conductivity", units='W/(m*K)')
-        self.add_input("density", units='kg/m**3')
-        self.add_input("num_ducts")
-
-        self.add_output("heat_transfer_coefficient", units='W/(K*m**2)')
-        self.add_output("flow_loss", units='W')
-
-        self.declare_partials('*', '*', method='cs')
-
-    def compute(self, inputs, outputs):
+        n = self.options["num_nodes"]
+
+        self.add_input("duct_length", shape=n, units='m')
+        self.add_input("duct_width", shape=n, units='m')
+        self.add_input("duct_height", shape=n, units='m')
+        self.add_input("fluid_velocity", shape=n, units='m/s')
+        self.add_input("kinematic_viscosity", shape=n, units="m**2/s")
+        self.add_input("specific_heat_const_pressure", shape=n, units="J/(kg*K)")
+        self.add_input("dynamic_viscosity", shape=n, units="N*s/m**2")
+        self.add_input("thermal_conductivity", shape=n, units='W/(m*K)')
+        self.add_input("density", shape=n, units='kg/m**3')
+        self.add_input("num_ducts", shape=n)
+
+        self.add_output("heat_transfer_coefficient", shape=n, units='W/(K*m**2)')
+        self.add_output("flow_loss", shape=n, units='W')
+
+    def setup_partials(self):
+        n = self.options["num_nodes"]
+        ar = np.arange(n)
+
+        # each duct/operating point only depends on its own inputs
+        self.declare_partials("heat_transfer_coefficient",
+                              ["duct_width",
+                               "duct_height",
+                               "fluid_velocity",
+                               "kinematic_viscosity",
+                               "specific_heat_const_pressure",
+                               "dynamic_viscosity",
+                               "thermal_conductivity"],
+                              rows=ar, cols=ar)
+        self.declare_partials("flow_loss",
+                              ["duct_length",
+                               "duct_width",
+                               "duct_height",
+                               "fluid_velocity",
+                               "kinematic_viscosity",
+                               "density",
+                               "num_ducts"],
+                              rows=ar, cols=ar)
+
+    def _correlations(self, inputs):
+        """
+        Evaluate the duct correlations and the derivatives of the intermediate
+        quantities needed by both compute and compute_partials
+        """
         Re_turbulent = self.options["Re_turbulent"]
 
-        d_l = inputs["duct_length"]
         d_w = inputs["duct_width"]
         d_h = inputs["duct_height"]
 
@@ -86,43 +115,63 @@ class RectangularDuctCooling(om.ExplicitComponent):
         mu = inputs["dynamic_viscosity"]
         kappa = inputs["thermal_conductivity"]
 
-        n_ducts = inputs["num_ducts"]
-        rho = inputs["density"]
-
         D_h = 2 * d_w * d_h / (d_w + d_h)
+        dD_h_dw = 2 * d_h**2 / (d_w + d_h)**2
+        dD_h_dh = 2 * d_w**2 / (d_w + d_h)**2
 
         Re = fluid_velocity * D_h / nu
-        print(f"Reynolds number: {Re}")
 
         # f_lam = 64 / Re
         # Nu_lam = 1.051*np.log(d_h / d_w) + 2.89
 
-        aspect_ratio = d_w / d_h
         # Eq: 5.231
         # f_lam = 24*(1 - 1.3553*aspect_ratio + 1.9467*aspect_ratio**2 - 1.7012*aspect_ratio**3 + 0.9564*aspect_ratio**4 - 0.2537*aspect_ratio**5) / Re
-        # # Eq: 5.232 
+        # # Eq: 5.232
         # Nu_lam = 1.051*np.log(d_h / d_w) + 2.89
 
         ### Custom fit of table 8.1 from Bergman "Introduction to Heat Transfer"
+        # The fits are in terms of the aspect ratio <= 1, so flip wide ducts
         f_lam_poly = np.polynomial.polynomial.Polynomial(np.array([1.0, -1.36627463, 1.98658454, -1.62994384, 0.73398257, -0.13059864]))
         Nu_lam_poly = np.polynomial.polynomial.Polynomial(np.array([1.0, -2.57380654, 4.74820955, -4.6826252, 2.39197522, -0.48852757]))
-        if aspect_ratio > 1.0:
-            f_lam = 96 * f_lam_poly(1/aspect_ratio) / Re
-            Nu_lam = 7.54 * Nu_lam_poly(1/aspect_ratio)
-        else:
-            f_lam = 96 * f_lam_poly(aspect_ratio) / Re
-            Nu_lam = 7.54 * Nu_lam_poly(aspect_ratio)
+        wide = d_w > d_h
+        aspect_ratio = np.where(wide, d_h / d_w, d_w / d_h)
+        dar_dw = np.where(wide, -d_h / d_w**2, 1 / d_h)
+        dar_dh = np.where(wide, 1 / d_w, -d_w / d_h**2)
+
+        f_lam = 96 * f_lam_poly(aspect_ratio) / Re
+        df_lam_dar = 96 * f_lam_poly.deriv()(aspect_ratio) / Re
+        df_lam_dRe = -f_lam / Re
+        Nu_lam = 7.54 * Nu_lam_poly(aspect_ratio)
+        dNu_lam_dar = 7.54 * Nu_lam_poly.deriv()(aspect_ratio)
 
         Pr = c_p * mu / kappa
-        print(f"Prandlt number: {Pr}")
-        f_turb = (0.79*np.log(Re) - 1.64) ** -2
-        Nu_turb = (f_turb / 8) * (Re - 1000) * Pr / \
-            (1 + 12.7 * (f_turb / 8)**0.5 * (Pr**(2/3) - 1))
-    
-        sigma =  1. / (1 + np.exp(-(Re - Re_turbulent) / 100.0));
+
+        log_term = 0.79*np.log(Re) - 1.64
+        f_turb = log_term ** -2
+        df_turb_dRe = -2 * log_term**-3 * 0.79 / Re
+
+        root = (f_turb / 8)**0.5
+        denom = 1 + 12.7 * root * (Pr**(2/3) - 1)
+        Nu_turb = (f_turb / 8) * (Re - 1000) * Pr / denom
+        dNu_turb_df = Nu_turb / f_turb - Nu_turb / denom * \
+            12.7 * (Pr**(2/3) - 1) / (16 * root)
+        dNu_turb_dRe = (f_turb / 8) * Pr / denom + dNu_turb_df * df_turb_dRe
+        dNu_turb_dPr = Nu_turb / Pr - Nu_turb / denom * \
+            12.7 * root * (2/3) * Pr**(-1/3)
+
+        sigma = 1. / (1 + np.exp(-(Re - Re_turbulent) / 100.0))
+        dsigma_dRe = sigma * (1 - sigma) / 100.0
+
         f = (1-sigma) * f_lam + sigma * f_turb
         Nu = (1-sigma) * Nu_lam + sigma * Nu_turb
 
+        df_dRe = dsigma_dRe * (f_turb - f_lam) + \
+            (1-sigma) * df_lam_dRe + sigma * df_turb_dRe
+        df_dar = (1-sigma) * df_lam_dar
+        dNu_dRe = dsigma_dRe * (Nu_turb - Nu_lam) + sigma * dNu_turb_dRe
+        dNu_dar = (1-sigma) * dNu_lam_dar
+        dNu_dPr = sigma * dNu_turb_dPr
+
         # if (Re < Re_turbulent):
         #     f = 64 / Re
         #     Nu = 1.051*np.log(d_h / d_w) + 2.89
@@ -133,31 +182,132 @@ class RectangularDuctCooling(om.ExplicitComponent):
         #     Nu = (f / 8) * (Re - 1000) * Pr / \
         #         (1 + 12.7 * (f / 8)**0.5 * (Pr**(2/3) - 1))
 
-        outputs["heat_transfer_coefficient"] = Nu * kappa / D_h
+        return {
+            "D_h": D_h, "dD_h_dw": dD_h_dw, "dD_h_dh": dD_h_dh,
+            "Re": Re, "Pr": Pr,
+            "dar_dw": dar_dw, "dar_dh": dar_dh,
+            "f": f, "df_dRe": df_dRe, "df_dar": df_dar,
+            "Nu": Nu, "dNu_dRe": dNu_dRe, "dNu_dar": dNu_dar, "dNu_dPr": dNu_dPr
+        }
 
-        pressure_loss = (f * rho * fluid_velocity**2) * d_l / (2 * D_h)
+    def compute(self, inputs, outputs):
+        d_l = inputs["duct_length"]
+        d_w = inputs["duct_width"]
+        d_h = inputs["duct_height"]
+        fluid_velocity = inputs["fluid_velocity"]
+        kappa = inputs["thermal_conductivity"]
+        n_ducts = inputs["num_ducts"]
+        rho = inputs["density"]
+
+        corr = self._correlations(inputs)
+        D_h = corr["D_h"]
+        print(f"Reynolds number: {corr['Re']}")
+        print(f"Prandlt number: {corr['Pr']}")
+
+        outputs["heat_transfer_coefficient"] = corr["Nu"] * kappa / D_h
+
+        pressure_loss = (corr["f"] * rho * fluid_velocity**2) * d_l / (2 * D_h)
         outputs['flow_loss'] = n_ducts * \
             pressure_loss * d_h * d_w * fluid_velocity
 
+    def compute_partials(self, inputs, partials):
+        d_l = inputs["duct_length"]
+        d_w = inputs["duct_width"]
+        d_h = inputs["duct_height"]
+        fluid_velocity = inputs["fluid_velocity"]
+        nu = inputs["kinematic_viscosity"]
+        c_p = inputs["specific_heat_const_pressure"]
+        mu = inputs["dynamic_viscosity"]
+        kappa = inputs["thermal_conductivity"]
+        n_ducts = inputs["num_ducts"]
+        rho = inputs["density"]
+
+        corr = self._correlations(inputs)
+        D_h = corr["D_h"]
+        Re = corr["Re"]
+        Pr = corr["Pr"]
+        f = corr["f"]
+        Nu = corr["Nu"]
+
+        dRe_dw = fluid_velocity * corr["dD_h_dw"] / nu
+        dRe_dh = fluid_velocity * corr["dD_h_dh"] / nu
+        dRe_dv = D_h / nu
+        dRe_dnu = -Re / nu
+
+        dPr_dcp = mu / kappa
+        dPr_dmu = c_p / kappa
+        dPr_dkappa = -Pr / kappa
+
+        # heat transfer coefficient: h = Nu * kappa / D_h
+        h = Nu * kappa / D_h
+        dNu_dw = corr["dNu_dRe"] * dRe_dw + corr["dNu_dar"] * corr["dar_dw"]
+        dNu_dh = corr["dNu_dRe"] * dRe_dh + corr["dNu_dar"] * corr["dar_dh"]
+
+        partials["heat_transfer_coefficient", "duct_width"] = \
+            kappa / D_h * dNu_dw - h / D_h * corr["dD_h_dw"]
+        partials["heat_transfer_coefficient", "duct_height"] = \
+            kappa / D_h * dNu_dh - h / D_h * corr["dD_h_dh"]
+        partials["heat_transfer_coefficient", "fluid_velocity"] = \
+            kappa / D_h * corr["dNu_dRe"] * dRe_dv
+        partials["heat_transfer_coefficient", "kinematic_viscosity"] = \
+            kappa / D_h * corr["dNu_dRe"] * dRe_dnu
+        partials["heat_transfer_coefficient", "specific_heat_const_pressure"] = \
+            kappa / D_h * corr["dNu_dPr"] * dPr_dcp
+        partials["heat_transfer_coefficient", "dynamic_viscosity"] = \
+            kappa / D_h * corr["dNu_dPr"] * dPr_dmu
+        partials["heat_transfer_coefficient", "thermal_conductivity"] = \
+            Nu / D_h + kappa / D_h * corr["dNu_dPr"] * dPr_dkappa
+
+        # flow loss: n * f * rho * v**3 * d_l * d_h * d_w / (2 * D_h)
+        flow_loss = n_ducts * f * rho * fluid_velocity**3 * \
+            d_l * d_h * d_w / (2 * D_h)
+        df_dw = corr["df_dRe"] * dRe_dw + corr["df_dar"] * corr["dar_dw"]
+        df_dh = corr["df_dRe"] * dRe_dh + corr["df_dar"] * corr["dar_dh"]
+
+        partials["flow_loss", "duct_length"] = flow_loss / d_l
+        partials["flow_loss", "duct_width"] = flow_loss * \
+            (df_dw / f + 1 / d_w - corr["dD_h_dw"] / D_h)
+        partials["flow_loss", "duct_height"] = flow_loss * \
+            (df_dh / f + 1 / d_h - corr["dD_h_dh"] / D_h)
+        partials["flow_loss", "fluid_velocity"] = flow_loss * \
+            (corr["df_dRe"] * dRe_dv / f + 3 / fluid_velocity)
+        partials["flow_loss", "kinematic_viscosity"] = flow_loss * \
+            corr["df_dRe"] * dRe_dnu / f
+        partials["flow_loss", "density"] = flow_loss / rho
+        partials["flow_loss", "num_ducts"] = flow_loss / n_ducts
+
 
 class AirgapConvection(om.ExplicitComponent):
+    def initialize(self):
+        self.options.declare("num_nodes", types=int, default=1,
+                             desc=" The number of independent operating points to evaluate")
+
     def setup(self):
-        self.add_input("rotor_or", units='m')
-        self.add_input("stator_ir", units='m')
-        self.add_input("rpm", units='rpm')
-        self.add_input("kinematic_viscosity", units="m**2/s")
-        self.add_input("specific_heat_const_pressure", units="J/(kg*K)")
-        self.add_input("dynamic_viscosity", units="N*s/m**2")
-        self.add_input("thermal_conductivity", units='W/(m*K)')
-
-        self.add_output("heat_transfer_coefficient", units='W/(K*m**2)')
-        # self.add_output("Ta")
-        # self.add_output("windage_loss", units='W')
+        n = self.options["num_nodes"]
 
-        self.declare_partials('*', '*', method='cs')
+        self.add_input("rotor_or", shape=n, units='m')
+        self.add_input("stator_ir", shape=n, units='m')
+        self.add_input("rpm", shape=n, units='rpm')
+        self.add_input("kinematic_viscosity", shape=n, units="m**2/s")
+        self.add_input("specific_heat_const_pressure", shape=n, units="J/(kg*K)")
+        self.add_input("dynamic_viscosity", shape=n, units="N*s/m**2")
+        self.add_input("thermal_conductivity", shape=n, units='W/(m*K)')
 
-    def compute(self, inputs, outputs):
+        self.add_output("heat_transfer_coefficient", shape=n, units='W/(K*m**2)')
+        # self.add_output("Ta")
+        # self.add_output("windage_loss", units='W')
 
+    def setup_partials(self):
+        n = self.options["num_nodes"]
+        ar = np.arange(n)
+        self.declare_partials("heat_transfer_coefficient", "*",
+                              rows=ar, cols=ar)
+
+    def _correlations(self, inputs):
+        """
+        Evaluate the Taylor-Couette correlations and the derivatives of the
+        Nusselt number with respect to the Taylor and Prandtl numbers
+        """
         rotor_or = inputs["rotor_or"]
         stator_ir = inputs["stator_ir"]
         omega = inputs["rpm"] * 2 * np.pi / 60
@@ -175,18 +325,15 @@ class AirgapConvection(om.ExplicitComponent):
 
         Pr = c_p * mu / kappa
 
-        print(f"Prandlt number: {Pr}")
-        print(f"Taylor number: {Ta}")
-
         nu_lam = 2
         nu_transition = 0.202 * Ta**0.63 * Pr**0.27
         nu_turb = 0.386 * Ta**0.5 * Pr**0.27
 
-        sigma_41 =  1. / (1 + np.exp(-(Ta - 41) / 2.0));
-        sigma_100 =  1. / (1 + np.exp(-(Ta - 100) / 2.0));
+        sigma_41 = 1. / (1 + np.exp(-(Ta - 41) / 2.0))
+        sigma_100 = 1. / (1 + np.exp(-(Ta - 100) / 2.0))
 
-        Nu = (1-sigma_100) * ((1-sigma_41) * nu_lam + sigma_41 * nu_transition) \
-                + sigma_100 * nu_turb
+        nu_low = (1-sigma_41) * nu_lam + sigma_41 * nu_transition
+        Nu = (1-sigma_100) * nu_low + sigma_100 * nu_turb
 
         # if Ta < 41:
         #     Nu = 2
@@ -195,20 +342,82 @@ class AirgapConvection(om.ExplicitComponent):
         # else:
         #     Nu = 0.386 * Ta**0.5 * Pr**0.27
 
-        outputs["heat_transfer_coefficient"] = Nu * kappa / gap_thickness
+        dsigma_41 = sigma_41 * (1 - sigma_41) / 2.0
+        dsigma_100 = sigma_100 * (1 - sigma_100) / 2.0
+        dNu_dTa = (1-sigma_100) * (dsigma_41 * (nu_transition - nu_lam)
+                                   + sigma_41 * 0.63 * nu_transition / Ta) \
+            + dsigma_100 * (nu_turb - nu_low) \
+            + sigma_100 * 0.5 * nu_turb / Ta
+        dNu_dPr = ((1-sigma_100) * sigma_41 * nu_transition
+                   + sigma_100 * nu_turb) * 0.27 / Pr
+
+        return {
+            "gap_thickness": gap_thickness,
+            "Ta": Ta, "Pr": Pr, "Nu": Nu,
+            "dNu_dTa": dNu_dTa, "dNu_dPr": dNu_dPr
+        }
+
+    def compute(self, inputs, outputs):
+        kappa = inputs["thermal_conductivity"]
+
+        corr = self._correlations(inputs)
+        print(f"Prandlt number: {corr['Pr']}")
+        print(f"Taylor number: {corr['Ta']}")
+
+        outputs["heat_transfer_coefficient"] = corr["Nu"] * \
+            kappa / corr["gap_thickness"]
         # outputs["Ta"] = Ta
 
+    def compute_partials(self, inputs, partials):
+        rotor_or = inputs["rotor_or"]
+        nu = inputs["kinematic_viscosity"]
+        c_p = inputs["specific_heat_const_pressure"]
+        mu = inputs["dynamic_viscosity"]
+        kappa = inputs["thermal_conductivity"]
+
+        corr = self._correlations(inputs)
+        gap_thickness = corr["gap_thickness"]
+        Ta = corr["Ta"]
+        Pr = corr["Pr"]
+        h = corr["Nu"] * kappa / gap_thickness
+
+        # Ta = omega * rotor_or**0.5 * gap_thickness**1.5 / nu
+        dTa_dgap = 1.5 * Ta / gap_thickness
+        dTa_drpm = 2 * np.pi / 60 * \
+            rotor_or**0.5 * gap_thickness**1.5 / nu
+
+        dh_dTa = kappa / gap_thickness * corr["dNu_dTa"]
+        dh_dPr = kappa / gap_thickness * corr["dNu_dPr"]
+        dh_dgap = dh_dTa * dTa_dgap - h / gap_thickness
+
+        partials["heat_transfer_coefficient", "rotor_or"] = \
+            dh_dTa * 0.5 * Ta / rotor_or - dh_dgap
+        partials["heat_transfer_coefficient", "stator_ir"] = dh_dgap
+        partials["heat_transfer_coefficient", "rpm"] = dh_dTa * dTa_drpm
+        partials["heat_transfer_coefficient", "kinematic_viscosity"] = \
+            -dh_dTa * Ta / nu
+        partials["heat_transfer_coefficient", "specific_heat_const_pressure"] = \
+            dh_dPr * mu / kappa
+        partials["heat_transfer_coefficient", "dynamic_viscosity"] = \
+            dh_dPr * c_p / kappa
+        partials["heat_transfer_coefficient", "thermal_conductivity"] = \
+            corr["Nu"] / gap_thickness - dh_dPr * Pr / kappa
+
 
 class InternalCooling(om.Group):
     def initialize(self):
         self.options.declare("coolant_fluid", default="water",
                              desc="The fluid used for active cooling")
+        self.options.declare("num_nodes", types=int, default=1,
+                             desc=" The number of independent operating points to evaluate")
 
     def setup(self):
+        num_nodes = self.options["num_nodes"]
         material_properties = self.add_subsystem("material_properties",
                                                  om.MetaModelStructuredComp(
                                                     #  method='1D-lagrange2'),
-                                                     method='cubic'),
+                                                     method='cubic',
+                                                     vec_size=num_nodes),
                                                  promotes_inputs=["fluid_temp"])
 
         fluid = self.options["coolant_fluid"]
@@ -227,7 +436,7 @@ class InternalCooling(om.Group):
             'density', training_data=_fluids[fluid]["density"], units="kg/(m**3)")
 
         self.add_subsystem("cooling",
-                           RectangularDuctCooling(),
+                           RectangularDuctCooling(num_nodes=num_nodes),
                            promotes_inputs=["duct_length",
                                             "duct_width",
                                             "duct_height",
@@ -250,12 +459,16 @@ class AirgapCooling(om.Group):
     def initialize(self):
         self.options.declare("airgap_fluid", default="air",
                              desc="The fluid in the airgap")
+        self.options.declare("num_nodes", types=int, default=1,
+                             desc=" The number of independent operating points to evaluate")
 
     def setup(self):
+        num_nodes = self.options["num_nodes"]
         material_properties = self.add_subsystem("material_properties",
                                                  om.MetaModelStructuredComp(
                                                     #  method='1D-lagrange3'),
-                                                     method='cubic'),
+                                                     method='cubic',
+                                                     vec_size=num_nodes),
                                                  promotes_inputs=["fluid_temp"])
 
         fluid = self.options["airgap_fluid"]
@@ -272,7 +485,7 @@ class AirgapCooling(om.Group):
         # material_properties.add_output('specific_heat_const_volume', training_data=_fluids[fluid]["specific_heat_const_volume"], units="J/(kg*K)")
 
         self.add_subsystem("cooling",
-                           AirgapConvection(),
+                           AirgapConvection(num_nodes=num_nodes),
                            promotes_inputs=["rotor_or",
                                             "stator_ir",
                                             "rpm"],
@@ -359,6 +572,48 @@ if __name__ == "__main__":
             data = problem.check_partials(form="central")
             assert_check_partials(data)
 
+        def test_internal_cooling_pgw30_vectorized(self):
+            problem = om.Problem()
+            problem.model.add_subsystem("internal_cooling",
+                                        InternalCooling(coolant_fluid="PGW30",
+                                                        num_nodes=4),
+                                        promotes_inputs=["*"],
+                                        promotes_outputs=["*"])
+
+            problem.setup(force_alloc_complex=True)
+
+            # span laminar, transitional, and turbulent flow in both tall and
+            # wide ducts
+            problem["fluid_temp"] = [300, 340, 373.15, 420]
+            problem["fluid_velocity"] = [0.1, 1.0, 5.0, 20.0]
+            problem["duct_length"] = 0.1
+            problem["duct_width"] = [0.0016, 0.01, 0.002, 0.02]
+            problem["duct_height"] = [0.018, 0.002, 0.02, 0.004]
+            problem["num_ducts"] = [27, 27, 36, 36]
+
+            problem.run_model()
+
+            h = problem.get_val("heat_transfer_coefficient")
+            flow_loss = problem.get_val("flow_loss")
+
+            # each node must match an independent scalar evaluation
+            for i in range(4):
+                scalar = om.Problem()
+                scalar.model.add_subsystem("internal_cooling",
+                                           InternalCooling(coolant_fluid="PGW30"),
+                                           promotes_inputs=["*"],
+                                           promotes_outputs=["*"])
+                scalar.setup()
+                for input in ["fluid_temp", "fluid_velocity", "duct_length",
+                              "duct_width", "duct_height", "num_ducts"]:
+                    scalar[input] = problem.get_val(input)[i]
+                scalar.run_model()
+                self.assertAlmostEqual(scalar.get_val("heat_transfer_coefficient")[0], h[i])
+                self.assertAlmostEqual(scalar.get_val("flow_loss")[0], flow_loss[i])
+
+            data = problem.check_partials(method="cs", form="central")
+            assert_check_partials(data)
+
         def plot_internal_cooling_pgw30(self):
             name = "plot_internal_cooling_pgw30"
             inputs = {
@@ -393,69 +648,35 @@ if __name__ == "__main__":
             n = 100
 
             for input in inputs.keys():
-
+                # sweep one input over all nodes while holding the others at
+                # their nominal values, evaluating every sample in one call
                 problem = om.Problem()
                 problem.model.add_subsystem("internal_cooling",
-                                            InternalCooling(coolant_fluid="PGW30"),
+                                            InternalCooling(coolant_fluid="PGW30",
+                                                            num_nodes=n),
                                             promotes_inputs=["*"],
                                             promotes_outputs=["*"])
 
-                val = inputs[input]["val"]
-                pert = inputs[input]["pert"]
-                # print(val)
-                # print(pert)
-                problem.model.add_design_var(input,
-                                             lower=val-pert,
-                                             upper=val+pert)
-
-                for output in outputs:
-                    problem.model.add_objective(output)
-
-                recorder = om.SqliteRecorder(f"{name}.sql")
-
-                # Set up DOE driver
-                problem.driver = om.DOEDriver(om.FullFactorialGenerator(levels=n))
-
-                problem.driver.add_recorder(recorder)
-                problem.driver.recording_options['record_derivatives'] = True
-                
                 problem.setup()
 
                 for key in inputs.keys():
-                    problem[key] = inputs[key]["val"]
-
-                problem.run_driver()
-
-                cr = om.CaseReader(f"{name}.sql");
-                cases = cr.list_cases('driver', out_stream=None)
-
-                dvs = []
-                outs = {}
-                outs_wrt_dvs = {}
-
-                for output in outputs:
-                    outs[output] = []
-                    outs_wrt_dvs[output] = []
-
-                for case in cases:
-                    case_outputs = cr.get_case(case).outputs
-                    dvs.append(case_outputs[input])
+                    problem[key] = inputs[key]["val"] * np.ones(n)
 
-                    derivs = cr.get_case(case).derivatives
+                val = inputs[input]["val"]
+                pert = inputs[input]["pert"]
+                dvs = np.linspace(val-pert, val+pert, n)
+                problem[input] = dvs
 
-                    for output in outputs:
-                        outs[output].append(case_outputs[output])
-                        outs_wrt_dvs[output].append(derivs[output, input])
+                problem.run_model()
+                totals = problem.compute_totals(of=outputs, wrt=[input])
 
-                dvs = np.squeeze(dvs)
                 for output in outputs:
-                    outs[output] = np.squeeze(outs[output])
-                    outs_wrt_dvs[output] = np.squeeze(outs_wrt_dvs[output])
-
+                    # each sample only depends on its own input, so the
+                    # derivatives are the diagonal of the total jacobian
+                    np.save(f"{name}_{output}_{input}", problem.get_val(output))
+                    np.save(f"{name}_{output}_wrt_{input}",
+                            np.diag(totals[output, input]))
                 np.save(f"{name}_{input}", dvs)
-                for output in outputs:
-                    np.save(f"{name}_{output}_{input}", outs[output])
-                    np.save(f"{name}_{output}_wrt_{input}", outs_wrt_dvs[output])
 
     class TestAirgapCooling(unittest.TestCase):
         def test_airgap_cooling(self):
@@ -485,6 +706,27 @@ if __name__ == "__main__":
                                         "fluid_temp", "rpm", "rotor_or", "stator_ir"], form="central")
             # assert_check_partials(data)
 
+        def test_airgap_cooling_vectorized(self):
+            problem = om.Problem()
+            problem.model.add_subsystem("airgap_cooling",
+                                        AirgapCooling(airgap_fluid="air",
+                                                      num_nodes=3),
+                                        promotes_inputs=["*"],
+                                        promotes_outputs=["*"])
+
+            problem.setup(force_alloc_complex=True)
+
+            # one point in each Taylor number regime
+            problem["fluid_temp"] = [300, 413.15, 500]
+            problem["rotor_or"] = 0.04796871
+            problem["stator_ir"] = 0.04896871
+            problem["rpm"] = [500, 1800, 10000]
+
+            problem.run_model()
+
+            data = problem.check_partials(method="cs", form="central")
+            assert_check_partials(data)
+
         def plot_airgap_cooling_air(self):
             name = "plot_airgap_cooling_air_k2"
             inputs = {
@@ -512,68 +754,34 @@ if __name__ == "__main__":
             n = 1000
 
             for input in inputs.keys():
-
+                # sweep one input over all nodes while holding the others at
+                # their nominal values, evaluating every sample in one call
                 problem = om.Problem()
                 problem.model.add_subsystem("airgap_cooling",
-                                            AirgapCooling(airgap_fluid="air"),
+                                            AirgapCooling(airgap_fluid="air",
+                                                          num_nodes=n),
                                             promotes_inputs=["*"],
                                             promotes_outputs=["*"])
 
-                val = inputs[input]["val"]
-                pert = inputs[input]["pert"]
-                # print(val)
-                # print(pert)
-                problem.model.add_design_var(input,
-                                             lower=val-pert,
-                                             upper=val+pert)
-
-                for output in outputs:
-                    problem.model.add_objective(output)
-
-                recorder = om.SqliteRecorder(f"{name}.sql")
-
-                # Set up DOE driver
-                problem.driver = om.DOEDriver(om.FullFactorialGenerator(levels=n))
-
-                problem.driver.add_recorder(recorder)
-                problem.driver.recording_options['record_derivatives'] = True
-                
                 problem.setup()
 
                 for key in inputs.keys():
-                    problem[key] = inputs[key]["val"]
-
-                problem.run_driver()
-
-                cr = om.CaseReader(f"{name}.sql");
-                cases = cr.list_cases('driver', out_stream=None)
-
-                dvs = []
-                outs = {}
-                outs_wrt_dvs = {}
+                    problem[key] = inputs[key]["val"] * np.ones(n)
 
-                for output in outputs:
-                    outs[output] = []
-                    outs_wrt_dvs[output] = []
-
-                for case in cases:
-                    case_outputs = cr.get_case(case).outputs
-                    dvs.append(case_outputs[input])
-
-                    derivs = cr.get_case(case).derivatives
+                val = inputs[input]["val"]
+                pert = inputs[input]["pert"]
+                dvs = np.linspace(val-pert, val+pert, n)
+                problem[input] = dvs
 
-                    for output in outputs:
-                        outs[output].append(case_outputs[output])
-                        outs_wrt_dvs[output].append(derivs[output, input])
+                problem.run_model()
+                totals = problem.compute_totals(of=outputs, wrt=[input])
 
-                dvs = np.squeeze(dvs)
                 for output in outputs:
-                    outs[output] = np.squeeze(outs[output])
-                    outs_wrt_dvs[output] = np.squeeze(outs_wrt_dvs[output])
-
+                    # each sample only depends on its own input, so the
+                    # derivatives are the diagonal of the total jacobian
+                    np.save(f"{name}_{output}_{input}", problem.get_val(output))
+                    np.save(f"{name}_{output}_wrt_{input}",
+                            np.diag(totals[output, input]))
                 np.save(f"{name}_{input}", dvs)
-                for output in outputs:
-                    np.save(f"{name}_{output}_{input}", outs[output])
-                    np.save(f"{name}_{output}_wrt_{input}", outs_wrt_dvs[output])
 
     unittest.main()
@@ -46,7 +46,14 @@ class SlotArea(om.ExplicitComponent):
                         desc=" The area of a winding slot")
 
     def setup_partials(self):
-        self.declare_partials("*", "*", method="cs")
+        # the slot radius does not enter the trapezoidal tooth approximation
+        self.declare_partials("slot_area", ["num_slots",
+                                            "stator_ir",
+                                            "tooth_tip_thickness",
+                                            "tooth_tip_angle",
+                                            "slot_depth",
+                                            "tooth_width",
+                                            "shoe_spacing"], method="cs")
 
     def compute(self, inputs, outputs):
         # num_slots = inputs["num_slots"][0]
@@ -1,5 +1,6 @@
 import copy
 
+import numpy as np
 import openmdao.api as om
 from mphys import Builder
 
@@ -10,8 +11,65 @@ from .average_comp import AverageComp
 from .maximum_fit import DiscreteInducedExponential
 from .motor_current import MotorCurrent
 from .dc_loss import WireLength, DCLoss
+from .analytic_geometry import AnalyticGeometry
+from .reduced_order import MotorState, ReducedBasis
+from .rotor_warm_start import RotorWarmStart
+from .telemetry import StateTelemetry
 from .parks_transform import ParksTransform
 from .inductance import Inductance
+from .multi_functional import MachFunctionals
+
+
+def _torque_options(solver):
+    components = solver.getOptions()["components"]
+    return {
+        "attributes": [*components["rotor"]["attrs"], *components["magnets"]["attrs"]],
+        "axis": [0.0, 0.0, -1.0],
+        "about": [0.0, 0.0, 0.0],
+        "air_attributes": components["airgap"]["attrs"]
+    }
+
+
+def _flux_linkage_source_name(source):
+    return "minus_z" if source == "-z" else source
+
+
+def _heat_source_regions(solver_options):
+    """
+    Split the heat sources into the regions used by the thermal response cache
+
+    Each phase's windings carry that phase's DC and AC losses, and the stator
+    and rotor carry their core losses.
+    """
+    components = solver_options["components"]
+    regions = {}
+    for phase, sources in solver_options["current"].items():
+        phase_attrs = [attr for attrs in sources.values() for attr in attrs]
+        regions[f"windings_{phase}"] = {
+            "dc_loss": {
+                "attributes": phase_attrs
+            },
+            "ac_loss": {
+                "attributes": phase_attrs
+            },
+            "core_loss": {
+                "attributes": []
+            }
+        }
+
+    for component in ["stator", "rotor"]:
+        regions[component] = {
+            "dc_loss": {
+                "attributes": []
+            },
+            "ac_loss": {
+                "attributes": []
+            },
+            "core_loss": {
+                "attributes": components[component]["attrs"]
+            }
+        }
+    return regions
 
 
 class EMStateAndFluxMagGroup(om.Group):
@@ -20,20 +78,55 @@ class EMStateAndFluxMagGroup(om.Group):
         self.options.declare("state_depends", types=list)
         self.options.declare("check_partials", default=False)
         self.options.declare("scenario_name", default=None)
+        self.options.declare("reduced_basis", default=None, recordable=False,
+                             desc=" POD basis used to try reduced-order solves before full solves")
+        self.options.declare("rom_tol", default=None, allow_none=True,
+                             desc=" Relative full residual tolerance for accepting a reduced solution,"
+                                  " or None to use the nonlinear solver's reltol")
+        self.options.declare("warm_start", default=None, recordable=False,
+                             desc=" RotorWarmStart shared by all rotor positions, or None")
+        self.options.declare("rotation_index", default=0,
+                             desc=" Index of this group's rotor position")
+        self.options.declare("adjoint_recycling", default=False,
+                             desc=" Recycle linear solves across the right-hand sides of all"
+                                  " the functionals of the state")
+        self.options.declare("telemetry", default=False,
+                             desc=" Output the convergence telemetry of each state solve")
 
     def setup(self):
         self.solver = self.options["solver"]
         depends = self.options["state_depends"]
         self.check_partials = self.options["check_partials"]
+        reduced_basis = self.options["reduced_basis"]
+        warm_start = self.options["warm_start"]
+
+        adjoint_recycling = self.options["adjoint_recycling"]
+        telemetry = self.options["telemetry"]
+
+        if reduced_basis is not None or warm_start is not None or adjoint_recycling or telemetry:
+            state = MotorState(solver=self.solver,
+                               depends=depends,
+                               check_partials=self.check_partials,
+                               reduced_basis=reduced_basis,
+                               rom_tol=self.options["rom_tol"],
+                               warm_start=warm_start,
+                               rotation_index=self.options["rotation_index"],
+                               adjoint_recycling=adjoint_recycling,
+                               telemetry=telemetry)
+        else:
+            state = MachState(solver=self.solver,
+                              depends=depends,
+                              check_partials=self.check_partials)
 
         self.add_subsystem("state",
-                           MachState(solver=self.solver,
-                                     depends=depends,
-                                     check_partials=self.check_partials),
+                           state,
                            promotes_inputs=[
                                ("mesh_coords", "x_em_vol"), *depends[1:]],
                            promotes_outputs=[("state", "em_state")])
 
+        if telemetry:
+            self.add_subsystem("telemetry", StateTelemetry(state=state))
+
         self.add_subsystem("flux_magnitude",
                            MachFunctional(solver=self.solver,
                                           func="flux_magnitude",
@@ -60,12 +153,25 @@ class EMMotorCouplingGroup(om.Group):
         self.options.declare("coupled", default=False)
         self.options.declare("check_partials", default=False)
         self.options.declare("scenario_name", default=None)
+        self.options.declare("reduced_bases", default=None, recordable=False,
+                             desc=" One POD basis per solver, or None to always use full solves")
+        self.options.declare("rom_tol", default=None, allow_none=True,
+                             desc=" Relative full residual tolerance for accepting a reduced solution,"
+                                  " or None to use the nonlinear solver's reltol")
+        self.options.declare("warm_start", default=None, recordable=False,
+                             desc=" RotorWarmStart that seeds each rotor position from the previous one")
+        self.options.declare("adjoint_recycling", default=False,
+                             desc=" Recycle linear solves across the right-hand sides of all"
+                                  " the functionals of each state")
+        self.options.declare("telemetry", default=False,
+                             desc=" Output the convergence telemetry of each rotor position's state solve")
 
     def setup(self):
         self.solvers = self.options["solvers"]
         depends = self.options["state_depends"]
         self.check_partials = self.options["check_partials"]
         coupled = self.options["coupled"]
+        reduced_bases = self.options["reduced_bases"]
 
         if coupled != "thermal":
             temperature_name = "reference_temperature"
@@ -78,7 +184,14 @@ class EMMotorCouplingGroup(om.Group):
             em_states.add_subsystem(f"solver{idx}",
                                     EMStateAndFluxMagGroup(solver=solver,
                                                            state_depends=depends,
-                                                           check_partials=self.check_partials))
+                                                           check_partials=self.check_partials,
+                                                           reduced_basis=reduced_bases[idx]
+                                                           if reduced_bases is not None else None,
+                                                           rom_tol=self.options["rom_tol"],
+                                                           warm_start=self.options["warm_start"],
+                                                           rotation_index=idx,
+                                                           adjoint_recycling=self.options["adjoint_recycling"],
+                                                           telemetry=self.options["telemetry"]))
 
             self.promotes("em_states",
                           inputs=[(f"solver{idx}.x_em_vol", "x_em_vol"),
@@ -159,6 +272,35 @@ class EMMotorCouplingGroup(om.Group):
                                promotes_inputs=heat_source_inputs,
                                promotes_outputs=[("heat_source", "thermal_load")])
 
+        elif coupled == "thermal:superposition":
+            heat_source_inputs = [("mesh_coords", "x_em_vol"),
+                                  ("temperature", temperature_name),
+                                  "frequency",
+                                  "wire_length",
+                                  "rms_current",
+                                  "strand_radius",
+                                  "strands_in_hand",
+                                  "stack_length",
+                                  "peak_flux",
+                                  "model_depth",
+                                  "num_turns",
+                                  "num_slots"]
+
+            # separate heat source for each region so the thermal response to
+            # each can be cached and superposed
+            heat_sources = self.add_subsystem("heat_sources", om.Group())
+            regions = _heat_source_regions(self.solvers[0].getOptions())
+            for region, func_options in regions.items():
+                heat_sources.add_subsystem(region,
+                                           MachFunctional(solver=self.solvers[0],
+                                                          func="heat_source",
+                                                          func_options=func_options,
+                                                          depends=heat_source_inputs,
+                                                          check_partials=self.check_partials),
+                                           promotes_inputs=heat_source_inputs,
+                                           promotes_outputs=[("heat_source", f"thermal_load:{region}")])
+            self.promotes("heat_sources", any=["*"])
+
         elif coupled is not None:
             raise ValueError(
                 "EM Motor builder only supports coupling with a thermal solver")
@@ -205,7 +347,7 @@ class EMMotorPrecouplingGroup(om.Group):
                                "fill_factor"])
 
         # If coupling to thermal solver, compute wire length for heat sources to use
-        if coupled == "thermal" or coupled == "thermal:feedforward":
+        if coupled in ("thermal", "thermal:feedforward", "thermal:superposition"):
             self.add_subsystem("wire_length",
                                WireLength(),
                                promotes_inputs=["*"],
@@ -220,12 +362,21 @@ class EMMotorOutputsGroup(om.Group):
     def initialize(self):
         self.options.declare("solvers", types=list, recordable=False)
         self.options.declare("coupled", default=False)
+        self.options.declare("analytic_geometry", default=False,
+                             desc=" Compute the mass and DC loss from the geometry parameters"
+                                  " instead of integrating over the mesh")
+        self.options.declare("shared_functionals", default=False,
+                             desc=" Evaluate each rotor position's torque and flux linkages in one"
+                                  " component (functionals{idx}) that shares a single copy of x_em_vol"
+                                  " and em_state{idx}")
         self.options.declare("check_partials", default=False)
         self.options.declare("scenario_name", default=None)
 
     def setup(self):
         self.solvers = self.options["solvers"]
+        shared_functionals = self.options["shared_functionals"]
         self.check_partials = self.options["check_partials"]
+        analytic_geometry = self.options["analytic_geometry"]
 
         coupled = self.options["coupled"]
 
@@ -235,39 +386,45 @@ class EMMotorOutputsGroup(om.Group):
             temperature_name = "temperature"
 
         # em_functionals = self.add_subsystem("em_functionals", om.ParallelGroup())
-        torque = self.add_subsystem("torque", om.Group())
-        for idx, solver in enumerate(self.solvers):
-
-            rotor_attrs = solver.getOptions()["components"]["rotor"]["attrs"]
-            magnet_attrs = solver.getOptions(
-            )["components"]["magnets"]["attrs"]
-            airgap_attrs = solver.getOptions()["components"]["airgap"]["attrs"]
-            torque_opts = {
-                "attributes": [*rotor_attrs, *magnet_attrs],
-                "axis": [0.0, 0.0, -1.0],
-                "about": [0.0, 0.0, 0.0],
-                "air_attributes": airgap_attrs
-            }
-
-            torque.add_subsystem(f"torque{idx}",
-                                 MachFunctional(solver=solver,
-                                                func="torque",
-                                                func_options=torque_opts,
-                                                depends=[
-                                                    "state", "mesh_coords"],
-                                                check_partials=self.check_partials))
-
-            self.promotes("torque",
-                          inputs=[(f"torque{idx}.mesh_coords", "x_em_vol"),
-                                  (f"torque{idx}.state", f"em_state{idx}")])
+        if shared_functionals:
+            for idx, solver in enumerate(self.solvers):
+                functionals = {"torque": {"func": "torque",
+                                          "func_options": _torque_options(solver)}}
+                for current_group, sources in solver.getOptions()["current"].items():
+                    for source, attrs in sources.items():
+                        source_name = _flux_linkage_source_name(source)
+                        functionals[f"flux_linkage{idx}_{current_group}_{source_name}"] = {
+                            "func": f"flux_linkage:{current_group}_{source_name}",
+                            "func_options": {"attributes": attrs}
+                        }
+                self.add_subsystem(f"functionals{idx}",
+                                   MachFunctionals(solver=solver,
+                                                   functionals=functionals),
+                                   promotes_inputs=[("mesh_coords", "x_em_vol"),
+                                                    ("state", f"em_state{idx}")])
+            torque_outputs = [f"functionals{idx}.torque" for idx in range(len(self.solvers))]
+        else:
+            torque = self.add_subsystem("torque", om.Group())
+            for idx, solver in enumerate(self.solvers):
+                torque.add_subsystem(f"torque{idx}",
+                                     MachFunctional(solver=solver,
+                                                    func="torque",
+                                                    func_options=_torque_options(solver),
+                                                    depends=[
+                                                        "state", "mesh_coords"],
+                                                    check_partials=self.check_partials))
+
+                self.promotes("torque",
+                              inputs=[(f"torque{idx}.mesh_coords", "x_em_vol"),
+                                      (f"torque{idx}.state", f"em_state{idx}")])
+            torque_outputs = [f"torque.torque{idx}.torque" for idx in range(len(self.solvers))]
 
         self.add_subsystem("raw_avg_torque",
                            AverageComp(num_pts=len(self.solvers)),
                            promotes_outputs=[("data_average", "raw_average_torque")])
 
-        for idx, _ in enumerate(self.solvers):
-            self.connect(f"torque.torque{idx}.torque",
-                         f"raw_avg_torque.data{idx}")
+        for idx, torque_output in enumerate(torque_outputs):
+            self.connect(torque_output, f"raw_avg_torque.data{idx}")
 
         self.add_subsystem("avg_torque",
                            om.ExecComp(
@@ -367,10 +524,14 @@ class EMMotorOutputsGroup(om.Group):
                 output_names = []
                 for source, attrs in sources.items():
                     current_group_attrs.extend(attrs)
-                    if source == "-z":
-                        source_name = "minus_z"
-                    else:
-                        source_name = source
+                    source_name = _flux_linkage_source_name(source)
+                    output_names.append(
+                        f"flux_linkage{idx}_{current_group}_{source_name}")
+                    if shared_functionals:
+                        self.connect(f"functionals{idx}.{output_names[-1]}",
+                                     f"flux_linkage.{output_names[-1]}")
+                        self.promotes("flux_linkage", inputs=["stack_length", "num_turns"])
+                        continue
 
                     flux_linkage_opts = {
                         "attributes": attrs,
@@ -384,8 +545,6 @@ class EMMotorOutputsGroup(om.Group):
                                                               check_partials=self.check_partials),
                                                promotes_outputs=[(f"flux_linkage:{current_group}_{source_name}", f"flux_linkage{idx}_{current_group}_{source_name}")])
 
-                    output_names.append(
-                        f"flux_linkage{idx}_{current_group}_{source_name}")
                     self.promotes("flux_linkage",
                                   inputs=[(f"flux_linkage{idx}_{current_group}_{source_name}.mesh_coords", "x_em_vol"),
                                           (f"flux_linkage{idx}_{current_group}_{source_name}.state", f"em_state{idx}"),
@@ -493,22 +652,28 @@ class EMMotorOutputsGroup(om.Group):
                                ("mesh_coords", "x_em_vol"), ("temperature", temperature_name), *ac_loss_depends[2:]],
                            promotes_outputs=["ac_loss"])
 
-        self.add_subsystem("dc_loss",
-                           DCLoss(solver=self.solvers[0]),
-                           promotes_inputs=["x_em_vol",
-                                            "num_slots",
-                                            "num_turns",
-                                            "num_slots",
-                                            "stator_ir",
-                                            "tooth_tip_thickness",
-                                            "slot_depth",
-                                            "tooth_width",
-                                            "stack_length",
-                                            "rms_current",
-                                            "strand_radius",
-                                            "strands_in_hand",
-                                            ("temperature", temperature_name)],
-                           promotes_outputs=["*"])
+        if analytic_geometry:
+            self.add_subsystem("analytic_geometry",
+                               AnalyticGeometry(),
+                               promotes_inputs=["*"],
+                               promotes_outputs=["dc_loss", "mass"])
+        else:
+            self.add_subsystem("dc_loss",
+                               DCLoss(solver=self.solvers[0]),
+                               promotes_inputs=["x_em_vol",
+                                                "num_slots",
+                                                "num_turns",
+                                                "num_slots",
+                                                "stator_ir",
+                                                "tooth_tip_thickness",
+                                                "slot_depth",
+                                                "tooth_width",
+                                                "stack_length",
+                                                "rms_current",
+                                                "strand_radius",
+                                                "strands_in_hand",
+                                                ("temperature", temperature_name)],
+                               promotes_outputs=["*"])
 
         self.add_subsystem("stator_phase_resistance",
                            om.ExecComp(
@@ -598,20 +763,21 @@ class EMMotorOutputsGroup(om.Group):
         #                    om.ExecComp("stator_mass = stator_mass_raw * stack_length / model_depth"),
         #                    promotes=["*"])
 
-        self.add_subsystem("motor_mass_raw",
-                           MachFunctional(solver=self.solvers[0],
-                                          func="mass:motor",
-                                          depends=["mesh_coords",
-                                                   "fill_factor"],
-                                          check_partials=self.check_partials),
-                           promotes_inputs=[
-                               ("mesh_coords", "x_em_vol"), "fill_factor"],
-                           promotes_outputs=[("mass:motor", "motor_mass_raw")])
-
-        self.add_subsystem("mass",
-                           om.ExecComp(
-                               "mass = motor_mass_raw * stack_length / model_depth"),
-                           promotes=["*"])
+        if not analytic_geometry:
+            self.add_subsystem("motor_mass_raw",
+                               MachFunctional(solver=self.solvers[0],
+                                              func="mass:motor",
+                                              depends=["mesh_coords",
+                                                       "fill_factor"],
+                                              check_partials=self.check_partials),
+                               promotes_inputs=[
+                                   ("mesh_coords", "x_em_vol"), "fill_factor"],
+                               promotes_outputs=[("mass:motor", "motor_mass_raw")])
+
+            self.add_subsystem("mass",
+                               om.ExecComp(
+                                   "mass = motor_mass_raw * stack_length / model_depth"),
+                               promotes=["*"])
 
         # self.add_subsystem("stator_volume_raw",
         #                    MachFunctional(solver=self.solvers[0],
@@ -727,12 +893,24 @@ class EMMotorBuilder(Builder):
                  warper_options,
                  coupled=None,
                  two_dimensional=True,
+                 analytic_geometry=False,
+                 reduced_order=None,
+                 rotor_warm_start=None,
+                 adjoint_recycling=False,
+                 telemetry=False,
+                 shared_functionals=False,
                  check_partials=False):
         self.solver_options = copy.deepcopy(solver_options)
         self.warper_type = copy.deepcopy(warper_type)
         self.warper_options = copy.deepcopy(warper_options)
         self.coupled = coupled
         self.two_dimensional = two_dimensional
+        self.analytic_geometry = analytic_geometry
+        self.reduced_order = copy.deepcopy(reduced_order)
+        self.rotor_warm_start = copy.deepcopy(rotor_warm_start)
+        self.adjoint_recycling = adjoint_recycling
+        self.telemetry = telemetry
+        self.shared_functionals = shared_functionals
         self.check_partials = check_partials
 
     def initialize(self, comm):
@@ -748,6 +926,25 @@ class EMMotorBuilder(Builder):
                                           solver_options=solver_options,
                                           comm=comm))
 
+        if self.reduced_order is not None:
+            basis_options = copy.deepcopy(self.reduced_order)
+            self.rom_tol = basis_options.pop("rom_tol", None)
+            self.reduced_bases = [ReducedBasis(comm=comm, **basis_options)
+                                  for _ in self.solvers]
+        else:
+            self.rom_tol = None
+            self.reduced_bases = None
+
+        if self.rotor_warm_start is not None and len(self.solvers) > 1:
+            mesh_coords = np.zeros(self.solvers[0].getFieldSize("mesh_coords"))
+            self.solvers[0].getMeshCoordinates(mesh_coords)
+            self.warm_start = RotorWarmStart(mesh_coords,
+                                             comm=comm,
+                                             dim=2 if self.two_dimensional else 3,
+                                             **self.rotor_warm_start)
+        else:
+            self.warm_start = None
+
         if self.two_dimensional:
             self.warper = None
         elif self.warper_type != "idwarp":
@@ -756,6 +953,12 @@ class EMMotorBuilder(Builder):
         else:
             self.warper = None
 
+        if self.coupled == "thermal:superposition":
+            self.heat_source_regions = list(
+                _heat_source_regions(self.solver_options).keys())
+        else:
+            self.heat_source_regions = []
+
         self.state_depends = ["mesh_coords",
                               "temperature",
                               "current_density:phaseA",
@@ -767,7 +970,12 @@ class EMMotorBuilder(Builder):
                                     state_depends=self.state_depends,
                                     coupled=self.coupled,
                                     check_partials=self.check_partials,
-                                    scenario_name=scenario_name)
+                                    scenario_name=scenario_name,
+                                    reduced_bases=self.reduced_bases,
+                                    rom_tol=self.rom_tol,
+                                    warm_start=self.warm_start,
+                                    adjoint_recycling=self.adjoint_recycling,
+                                    telemetry=self.telemetry)
 
     def get_mesh_coordinate_subsystem(self, scenario_name=None):
         return MachMeshGroup(solver=self.solvers[0],
@@ -784,9 +992,36 @@ class EMMotorBuilder(Builder):
         # return None
         return EMMotorOutputsGroup(solvers=self.solvers,
                                    coupled=self.coupled,
+                                   analytic_geometry=self.analytic_geometry,
+                                   shared_functionals=self.shared_functionals,
                                    check_partials=self.check_partials,
                                    scenario_name=scenario_name)
 
+    def add_rotation_responses(self, system, path, torque=None, flux_linkage=None):
+        """
+        Add the torque and phase flux linkages at every rotor position of the
+        EMMotorOutputsGroup at path (relative to system) as constraints, with
+        torque and flux_linkage holding the add_constraint arguments
+
+        Each rotor position's response only depends on its own state, so each
+        response kind gets one parallel derivative color and reverse mode
+        seeds it at every rotor position in a single linear solve. The rotor
+        positions' solvers share one communicator, so their adjoints are not
+        run concurrently.
+        """
+        for idx, solver in enumerate(self.solvers):
+            if torque is not None:
+                torque_output = f"functionals{idx}.torque" if self.shared_functionals \
+                    else f"torque.torque{idx}.torque"
+                system.add_constraint(f"{path}.{torque_output}",
+                                      parallel_deriv_color="rotation_torque",
+                                      **torque)
+            if flux_linkage is not None:
+                for current_group in solver.getOptions()["current"]:
+                    system.add_constraint(f"{path}.flux_linkage.flux_linkage{idx}_{current_group}",
+                                          parallel_deriv_color=f"rotation_flux_linkage_{current_group}",
+                                          **flux_linkage)
+
     def get_number_of_nodes(self):
         """
         Get the number of state nodes on this processor
@@ -1,3 +1,4 @@
+import numpy as np
 import openmdao.api as om
 from mphys import Multipoint
 from omESP import omESP
@@ -7,34 +8,45 @@ from mach import MachBuilder
 
 from .scenario_motor import ScenarioMotor
 from .motor_em_builder import EMMotorBuilder
-from .motor_options import _buildSolverOptions
+from .analytic_em_builder import AnalyticEMMotorBuilder
+from .motor_options import _buildSolverOptions, _buildSolverProfile, _nested_update, _solver_profiles
 from .valid_geometry import ValidLengths
 from .internal_cooling import InternalCooling, AirgapCooling
+from .thermal_network import ThermalNetwork
+from .thermal_transient import TransientThermalNetwork
+from .field_transfer import MeshTransfer, FixedMeshCoordinates
+from .preconditioner_tuning import tune_em_options
+from .profiling import profile_model
+from .sizing import estimate_motor_memory, format_memory_report
 # from .tms import ThermalManagementSystem
 
-try:
-    from collections.abc import Mapping
-except ImportErrror:
-    from collections import Mapping
 
-
-def _nested_update(source, overrides):
+def declare_total_coloring(problem, num_full_jacs=3, tol=1e-25, orders=None):
     """
-    Update a nested dictionary or similar mapping.
-    Modify ``source`` in place.
+    Declare simultaneous total derivative coloring on a problem's driver
 
-    # https://stackoverflow.com/questions/3232943/update-value-of-a-nested-dictionary-of-varying-depth
+    Coloring computes the sparsity of the total Jacobian from a few full
+    linearizations at random points, so the number of linear solves per
+    optimizer gradient is set by how the design variables and responses are
+    actually coupled rather than by the number of design variables. Must be
+    called before problem.setup.
     """
-    for key, value in overrides.items():
-        if isinstance(value, Mapping) and value:
-            returned = _nested_update(source.get(key, {}), value)
-            source[key] = returned
-        else:
-            source[key] = overrides[key]
-    return source
+    problem.driver.declare_coloring(num_full_jacs=num_full_jacs,
+                                    tol=tol,
+                                    orders=orders,
+                                    show_summary=False,
+                                    show_sparsity=False)
 
 
 class Motor(Multipoint):
+    """
+    Coupled electromagnetic and thermal motor model
+
+    The components declare exact partial sparsity (or find it with partial
+    coloring), so the model is ready for simultaneous total derivative
+    coloring; enable it with declare_total_coloring.
+    """
+
     def initialize(self):
         # Required options:
         self.options.declare("components", types=dict, desc="")
@@ -51,10 +63,75 @@ class Motor(Multipoint):
         self.options.declare("hallbach_segments",
                              types=int, desc="", default=4)
         self.options.declare("theta_e_offset", default=0.0)
-        self.options.declare("coupled", default=None)
+        self.options.declare("coupled", default=None,
+                             desc=" None, \"thermal\", \"thermal:feedforward\", \"thermal:superposition\""
+                                  " to evaluate the thermal state from cached unit responses (analysis only), or \"thermal:lptn\""
+                                  " to use a lumped parameter thermal network")
         self.options.declare("em_options", types=dict, default=None)
         self.options.declare("thermal_options", types=dict, default=None)
         self.options.declare("warper_options", types=dict, default=None)
+        self.options.declare("thermal_network_options", types=dict, default=None, allow_none=True,
+                             desc=" Options for the lumped parameter thermal network conductances")
+        self.options.declare("duty_cycle_times", default=None,
+                             desc=" Times of a duty cycle to simulate the transient thermal network over"
+                                  " when coupled is \"thermal:lptn\"")
+        self.options.declare("thermal_mesh_path", default=None,
+                             desc=" Separate (coarser) mesh for the thermal solver. Fields are moved between"
+                                  " the EM and thermal meshes with a cached transfer operator, so geometry"
+                                  " design variables are not supported")
+        self.options.declare("transfer_cache_dir", default=None,
+                             desc=" Directory to cache the EM/thermal mesh transfer operator in")
+        self.options.declare("em_model", default="fea", values=["fea", "analytic"],
+                             desc=" \"fea\" to use the finite element EM model, or \"analytic\" to use a"
+                                  " closed form airgap field model for fast design space exploration")
+        self.options.declare("analytic_em_options", types=dict, default=None, allow_none=True,
+                             desc=" Options for the analytic EM model's field and loss estimates")
+        self.options.declare("analytic_geometry", types=bool, default=False,
+                             desc=" Compute the mass and DC loss in closed form from the geometry parameters"
+                                  " instead of with mesh integrals")
+        self.options.declare("reduced_order", types=dict, default=None, allow_none=True,
+                             desc=" Options for a POD reduced-order magnetostatic solve that is tried before"
+                                  " each full solve (ReducedBasis arguments and \"rom_tol\"), or None to"
+                                  " always use full solves")
+        self.options.declare("rotor_warm_start", types=bool, default=False,
+                             desc=" Start each rotor position's magnetostatic solve from the previous"
+                                  " position's converged state, with the rotor and airgap rotated by the"
+                                  " magnet pitch. Needs a mesh that is symmetric under that rotation (a"
+                                  " sliding band); otherwise it warns and is disabled")
+        self.options.declare("solver_profile", default="default", values=list(_solver_profiles.keys()),
+                             desc=" Named set of EM, thermal, and warper solver settings. \"screening\" trades"
+                                  " accuracy for speed, \"optimization\" keeps the adjoints accurate enough"
+                                  " for gradients, and \"verification\" converges tightly. The tolerances"
+                                  " are unbenchmarked starting points, not tuned for time to solution, and"
+                                  " there is no inexact (Eisenstat-Walker) Newton profile because mach's"
+                                  " nonlin-solver options have no forcing term setting."
+                                  " em_options, thermal_options, and warper_options are applied on top")
+        self.options.declare("preconditioner_tuning", types=dict, default=None, allow_none=True,
+                             desc=" Benchmark candidate EM preconditioners and GMRES restart lengths on the"
+                                  " mesh and use the fastest. Keys are the tune_em_options arguments"
+                                  " (cache_file, memory_budget, current_density, max_linear_iter)")
+        self.options.declare("adjoint_recycling", types=bool, default=False,
+                             desc=" Solve each EM adjoint once per independent functional gradient and"
+                                  " recycle the solutions for every other total of the same state")
+        self.options.declare("rotation_responses", types=dict, default=None, allow_none=True,
+                             desc=" Constrain the torque and/or flux linkages at every rotor position;"
+                                  " maps \"torque\" and \"flux_linkage\" to add_constraint arguments"
+                                  " (see EMMotorBuilder.add_rotation_responses)")
+        self.options.declare("solver_telemetry", types=bool, default=False,
+                             desc=" Output the initial and final residuals, convergence flag, and solve"
+                                  " time of each rotor position's EM solve (em_states.solver{idx}.telemetry)."
+                                  " The thermal solve has no telemetry")
+        self.options.declare("shared_functionals", types=bool, default=False,
+                             desc=" Evaluate each rotor position's torque and flux linkages in one"
+                                  " component sharing a single copy of the mesh coordinates and state")
+        self.options.declare("profile", types=str, default=None, allow_none=True,
+                             desc=" Path of a JSON (or .csv) report of the wall clock time, call counts, and"
+                                  " solver iterations of every subsystem and rotor position, or None to"
+                                  " not profile")
+        self.options.declare("dry_run", types=bool, default=False,
+                             desc=" Only estimate the number of solvers, DOFs, and memory per rank from the"
+                                  " mesh header and options (stored in sizing), without building the"
+                                  " solvers. Only the solver counts are estimated if the header cannot be read")
         self.options.declare("run_name", types=str, default=None)
         # self.options.declare("em_paraview_dir", types=str, default="motor_em")
         # self.options.declare("thermal_paraview_dir", types=str, default="motor_thermal")
@@ -106,6 +183,8 @@ class Motor(Multipoint):
         multipoint_rotations = self.options["multipoint_rotations"]
         current_indices = self.options["current_indices"]
         theta_e_offset = self.options["theta_e_offset"]
+        # angle of one shift of the magnet attribute pattern
+        magnet_pitch = 2 * np.pi / len(components["magnets"]["attrs"])
         _warper_options, _em_options, _thermal_options = _buildSolverOptions(components,
                                                                              em_bcs,
                                                                              thermal_bcs,
@@ -129,6 +208,29 @@ class Motor(Multipoint):
         _thermal_options["mesh"]["file"] = str(mesh_path)
         _thermal_options["mesh"]["model-file"] = str(egads_path)
 
+        thermal_mesh_path = self.options["thermal_mesh_path"]
+        if thermal_mesh_path is not None:
+            if self.options["coupled"] not in ("thermal", "thermal:feedforward"):
+                raise ValueError("A separate thermal mesh is only supported when coupled is "
+                                 "\"thermal\" or \"thermal:feedforward\"!")
+            if not two_dimensional:
+                raise ValueError("A separate thermal mesh is only supported for two dimensional models!")
+            _thermal_options["mesh"]["file"] = str(thermal_mesh_path)
+
+        profile = _buildSolverProfile(self.options["solver_profile"])
+        _nested_update(_warper_options, profile["warper"])
+        _nested_update(_em_options, profile["em"])
+        _nested_update(_thermal_options, profile["thermal"])
+
+        preconditioner_tuning = self.options["preconditioner_tuning"]
+        if preconditioner_tuning is not None and not self.options["dry_run"]:
+            tuning_options = {"cache_file": "preconditioner_tuning.json"}
+            tuning_options.update(preconditioner_tuning)
+            tune_em_options(_em_options,
+                            self.comm,
+                            two_dimensional=two_dimensional,
+                            **tuning_options)
+
         if self.options["warper_options"] is not None:
             # _warper_options.update(self.options["warper_options"])
             _nested_update(_warper_options, self.options["warper_options"])
@@ -147,20 +249,52 @@ class Motor(Multipoint):
             _em_options["paraview"]["directory"] = "motor_em"
             _thermal_options["paraview"]["directory"] = "motor_thermal"
 
+        if self.options["dry_run"]:
+            self.sizing = estimate_motor_memory(_em_options,
+                                                thermal_options=_thermal_options,
+                                                coupled=self.options["coupled"],
+                                                shared_functionals=self.options["shared_functionals"],
+                                                comm_size=self.comm.size)
+            if self.comm.rank == 0:
+                print(format_memory_report(self.sizing))
+            return
+
         check_partials = self.options["check_partials"]
 
-        em_motor_builder = EMMotorBuilder(solver_options=_em_options,
-                                          warper_type="MeshWarper",
-                                          warper_options=_warper_options,
-                                          coupled=self.options["coupled"],
-                                          two_dimensional=two_dimensional,
-                                          check_partials=check_partials)
+        coupled = self.options["coupled"]
+        # the thermal network is fed forward from the EM losses outside the scenario
+        em_coupled = coupled if coupled != "thermal:lptn" else None
+        if self.options["em_model"] == "analytic":
+            if coupled not in (None, "thermal:lptn"):
+                raise ValueError("The analytic EM model can only be coupled to the thermal network "
+                                 "(coupled=\"thermal:lptn\")!")
+            if self.options["rotation_responses"] is not None:
+                raise ValueError("The analytic EM model has no per rotor position responses!")
+            analytic_em_options = self.options["analytic_em_options"] or {}
+            em_motor_builder = AnalyticEMMotorBuilder(num_poles=num_poles,
+                                                      hallbach_segments=hallbach_segments,
+                                                      em_options=analytic_em_options.get("em", None),
+                                                      loss_options=analytic_em_options.get("losses", None))
+        else:
+            em_motor_builder = EMMotorBuilder(solver_options=_em_options,
+                                              warper_type="MeshWarper",
+                                              warper_options=_warper_options,
+                                              coupled=em_coupled,
+                                              two_dimensional=two_dimensional,
+                                              analytic_geometry=self.options["analytic_geometry"],
+                                              reduced_order=self.options["reduced_order"],
+                                              adjoint_recycling=self.options["adjoint_recycling"],
+                                              telemetry=self.options["solver_telemetry"],
+                                              shared_functionals=self.options["shared_functionals"],
+                                              rotor_warm_start={"rotations": multipoint_rotations,
+                                                                "pitch": magnet_pitch}
+                                              if self.options["rotor_warm_start"] else None,
+                                              check_partials=check_partials)
 
         em_motor_builder.initialize(self.comm)
 
-        coupled = self.options["coupled"]
         # If coupling to thermal solver, compute heat sources...
-        if coupled == "thermal" or coupled == "thermal:feedforward":
+        if coupled in ("thermal", "thermal:feedforward", "thermal:superposition", "thermal:lptn"):
 
             self.add_subsystem("internal_cooling_params",
                                InternalCooling(coolant_fluid="PGW30"),
@@ -230,6 +364,7 @@ class Motor(Multipoint):
 
             # print(f"max winding temp attrs: {_thermal_options['components']['windings']['attrs']}")
 
+        if coupled in ("thermal", "thermal:feedforward", "thermal:superposition"):
             thermal_builder = MachBuilder(solver_type="thermal",
                                           solver_options=_thermal_options,
                                           solver_inputs=[
@@ -249,9 +384,57 @@ class Motor(Multipoint):
         else:
             thermal_builder = None
 
+        if thermal_mesh_path is not None:
+            thermal_transfer = MeshTransfer(thermal_builder.solver,
+                                            em_motor_builder.solvers[0],
+                                            self.comm,
+                                            cache_dir=self.options["transfer_cache_dir"])
+
+            # the thermal mesh is not warped with the geometry
+            self.add_subsystem("thermal_mesh",
+                               FixedMeshCoordinates(solver=thermal_builder.solver,
+                                                    moving_mesh="geom.x_surf"),
+                               promotes_outputs=[("mesh_coords", "x_conduct_vol")])
+        else:
+            thermal_transfer = None
+
         self.mphys_add_scenario("fem_motor",
                                 ScenarioMotor(em_motor_builder=em_motor_builder,
-                                              thermal_builder=thermal_builder))
+                                              thermal_builder=thermal_builder,
+                                              thermal_transfer=thermal_transfer))
+        if self.options["rotation_responses"] is not None:
+            em_motor_builder.add_rotation_responses(self, "fem_motor.em_post",
+                                                    **self.options["rotation_responses"])
+
+        duty_cycle_times = self.options["duty_cycle_times"]
+        if coupled == "thermal:lptn" and duty_cycle_times is None:
+            self.add_subsystem("thermal_network",
+                               ThermalNetwork(
+                                   conductance_options=self.options["thermal_network_options"]),
+                               promotes_inputs=["*"],
+                               promotes_outputs=["max_winding_temperature",
+                                                 "max_magnet_temperature"])
+        elif coupled == "thermal:lptn":
+            # scale the losses at the analyzed operating point by the load
+            # profile over the duty cycle
+            num_times = len(duty_cycle_times)
+            loss_profiles = om.ExecComp()
+            for loss in ["dc_loss", "ac_loss", "core_loss"]:
+                loss_profiles.add_expr(f"{loss}_profile = {loss} * {loss}_scaling",
+                                       **{f"{loss}_profile": {"shape": num_times},
+                                          f"{loss}_scaling": {"val": np.ones(num_times)}})
+            self.add_subsystem("loss_profiles",
+                               loss_profiles,
+                               promotes=["*"])
+
+            self.add_subsystem("thermal_network",
+                               TransientThermalNetwork(
+                                   times=duty_cycle_times,
+                                   conductance_options=self.options["thermal_network_options"]),
+                               promotes_inputs=["*"],
+                               promotes_outputs=["temperature_profile",
+                                                 ("peak_winding_temperature", "max_winding_temperature"),
+                                                 ("peak_magnet_temperature", "max_magnet_temperature")])
 
         # self.add_subsystem("inverter",
         #                    Inverter(),
@@ -339,20 +522,25 @@ class Motor(Multipoint):
                       outputs=fem_promotes)
 
     def configure(self):
+        if self.options["dry_run"]:
+            return
         two_dimensional = self.options["two_dimensional"]
         coupled = self.options["coupled"]
-        if two_dimensional:
-            x_surf_metadata = self.geom.get_io_metadata(
-                'output', metadata_keys=['size'])['x_surf']
-            print("x_surf_metadata: ", x_surf_metadata)
-            x_surf_size = x_surf_metadata['size']
-            self.connect("x_surf", "x_em_vol", src_indices=[
-                         i for i in range(x_surf_size) if (i+1) % 3 != 0])
-            if coupled == "thermal" or coupled == "thermal:feedforward":
-                self.connect("x_surf", "x_conduct_vol", src_indices=[
+        # the analytic EM model works directly from the geometry parameters
+        if self.options["em_model"] == "fea":
+            if two_dimensional:
+                x_surf_metadata = self.geom.get_io_metadata(
+                    'output', metadata_keys=['size'])['x_surf']
+                print("x_surf_metadata: ", x_surf_metadata)
+                x_surf_size = x_surf_metadata['size']
+                self.connect("x_surf", "x_em_vol", src_indices=[
                              i for i in range(x_surf_size) if (i+1) % 3 != 0])
-        else:
-            self.connect("x_surf", "x_em")
+                if coupled in ("thermal", "thermal:feedforward", "thermal:superposition") \
+                        and self.options["thermal_mesh_path"] is None:
+                    self.connect("x_surf", "x_conduct_vol", src_indices=[
+                                 i for i in range(x_surf_size) if (i+1) % 3 != 0])
+            else:
+                self.connect("x_surf", "x_em")
 
         geom_inputs = self.geom.get_io_metadata('input', metadata_keys=['val'])
         self.geom_convert.add_expr("stator_od = 2 * stator_or",
@@ -407,3 +595,6 @@ class Motor(Multipoint):
 
         self.set_input_defaults('stack_length', units='m', val=1.0)
         self.set_input_defaults('strand_radius', units='m', val=1.0)
+
+        if self.options["profile"] is not None:
+            self.profiler = profile_model(self, self.options["profile"])
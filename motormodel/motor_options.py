@@ -1,5 +1,28 @@
+import copy
+
 import numpy as np
 
+try:
+    from collections.abc import Mapping
+except ImportError:
+    from collections import Mapping
+
+
+def _nested_update(source, overrides):
+    """
+    Update a nested dictionary or similar mapping.
+    Modify ``source`` in place.
+
+    # https://stackoverflow.com/questions/3232943/update-value-of-a-nested-dictionary-of-varying-depth
+    """
+    for key, value in overrides.items():
+        if isinstance(value, Mapping) and value:
+            returned = _nested_update(source.get(key, {}), value)
+            source[key] = returned
+        else:
+            source[key] = overrides[key]
+    return source
+
 
 def _buildMultipointOptions(num_magnets,
                             magnet_attrs,
@@ -244,3 +267,184 @@ def _buildSolverOptions(components,
     }
 
     return warper_options, em_options, thermal_options
+
+
+# Named solver settings, applied on top of the defaults from
+# _buildSolverOptions and before any user supplied option overrides. The
+# tolerances are unbenchmarked defaults.
+_solver_profiles = {
+    "default": {
+        "em": {},
+        "thermal": {},
+        "warper": {}
+    },
+    "screening": {
+        "em": {
+            "nonlin-solver": {
+                "maxiter": 10,
+                "reltol": 1e-3,
+                "abstol": 1e-3
+            },
+            "lin-solver": {
+                "kdim": 50,
+                "maxiter": 100,
+                "reltol": 1e-6,
+                "abstol": 1e-10
+            },
+            "adj-solver": {
+                "maxiter": 100,
+                "reltol": 1e-6,
+                "abstol": 1e-10
+            }
+        },
+        "thermal": {
+            "lin-solver": {
+                "reltol": 1e-8,
+                "abstol": 1e-10
+            },
+            "adj-solver": {
+                "reltol": 1e-8,
+                "abstol": 1e-10
+            }
+        },
+        "warper": {
+            "lin-solver": {
+                "reltol": 1e-8,
+                "abstol": 1e-8
+            },
+            "adj-solver": {
+                "reltol": 1e-8,
+                "abstol": 1e-8
+            }
+        }
+    },
+    "optimization": {
+        "em": {
+            "nonlin-solver": {
+                "maxiter": 25,
+                "reltol": 1e-6
+            },
+            "lin-solver": {
+                "kdim": 100,
+                "reltol": 1e-8,
+                "abstol": 1e-12
+            },
+            "adj-solver": {
+                "reltol": 1e-10,
+                "abstol": 1e-12
+            }
+        },
+        "thermal": {
+            "lin-solver": {
+                "reltol": 1e-10
+            },
+            "adj-solver": {
+                "reltol": 1e-10
+            }
+        },
+        "warper": {}
+    },
+    "verification": {
+        "em": {
+            "nonlin-solver": {
+                "maxiter": 50,
+                "reltol": 1e-10,
+                "abstol": 1e-10,
+                "abort": True
+            },
+            "lin-solver": {
+                "maxiter": 500,
+                "reltol": 1e-14,
+                "abstol": 1e-14
+            },
+            "adj-solver": {
+                "maxiter": 500,
+                "reltol": 1e-14,
+                "abstol": 1e-14
+            }
+        },
+        "thermal": {
+            "nonlin-solver": {
+                "reltol": 1e-12,
+                "abstol": 1e-12
+            },
+            "lin-solver": {
+                "maxiter": 500,
+                "reltol": 1e-14,
+                "abstol": 1e-14
+            },
+            "adj-solver": {
+                "maxiter": 500,
+                "reltol": 1e-14,
+                "abstol": 1e-14
+            }
+        },
+        "warper": {
+            "lin-solver": {
+                "reltol": 1e-12,
+                "abstol": 1e-12
+            },
+            "adj-solver": {
+                "reltol": 1e-12,
+                "abstol": 1e-12
+            }
+        }
+    }
+}
+
+
+def _buildSolverProfile(profile):
+    """
+    Get a copy of the EM, thermal, and warper option overrides for a named
+    solver profile
+    """
+    if profile not in _solver_profiles:
+        raise ValueError(f"Unknown solver profile \"{profile}\"! "
+                         f"Options are {list(_solver_profiles.keys())}")
+    return copy.deepcopy(_solver_profiles[profile])
+
+
+if __name__ == "__main__":
+    import unittest
+
+    class TestSolverProfiles(unittest.TestCase):
+        def _options(self):
+            components = {
+                "windings": {"attrs": list(range(6))},
+                "magnets": {"attrs": list(range(8))},
+                "airgap": {"attrs": [100]}
+            }
+            current_indices = {phase: {"z": [i], "-z": [i + 3]}
+                               for i, phase in enumerate(["phaseA", "phaseB", "phaseC"])}
+            return _buildSolverOptions(components, {}, {}, {}, [0], 8, 1, True, 4,
+                                       0.0, current_indices)
+
+        def test_profiles_override_existing_options(self):
+            warper, em, thermal = self._options()
+            defaults = {"warper": warper, "em": em, "thermal": thermal}
+            def check(profile, default, path):
+                for key, value in profile.items():
+                    self.assertIn(key, default, msg=f"{path}/{key}")
+                    if isinstance(value, Mapping):
+                        check(value, default[key], f"{path}/{key}")
+
+            for name in _solver_profiles:
+                for solver, overrides in _buildSolverProfile(name).items():
+                    check(overrides, defaults[solver], f"{name}/{solver}")
+
+        def test_user_overrides_win(self):
+            _, em, _ = self._options()
+            _nested_update(em, _buildSolverProfile("screening")["em"])
+            _nested_update(em, {"lin-solver": {"reltol": 1e-9}})
+            self.assertEqual(em["lin-solver"]["reltol"], 1e-9)
+            self.assertEqual(em["lin-solver"]["kdim"], 50)
+            self.assertEqual(em["nonlin-solver"]["type"], "relaxednewton")
+
+            # profiles are copies
+            self.assertEqual(_solver_profiles["screening"]["em"]["lin-solver"]["reltol"], 1e-6)
+
+        def test_unknown_profile(self):
+            with self.assertRaises(ValueError):
+                _buildSolverProfile("fastest")
+
+    unittest.main()
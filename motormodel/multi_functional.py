@@ -0,0 +1,155 @@
+import openmdao.api as om
+
+
+class MachFunctionals(om.ExplicitComponent):
+    """
+    Evaluate several functionals of one mach solver from a single copy of
+    their inputs
+
+    Every MachFunctional owns its own copies of the mesh sized inputs (the
+    mesh coordinates and the state), so OpenMDAO allocates and transfers each
+    of them once per functional. Grouping the functionals of a state into one
+    component shares those inputs between them. Each functional is evaluated
+    with only the inputs it depends on.
+    """
+
+    def initialize(self):
+        self.options.declare("solver",
+                             desc="the mach solver object",
+                             recordable=False)
+        self.options.declare("functionals", types=dict,
+                             desc=" Maps each output name to a dict with the \"func\" name, its"
+                                  " \"func_options\", and optionally the subset of depends it"
+                                  " \"depends\" on")
+        self.options.declare("depends", types=list, default=["state", "mesh_coords"],
+                             desc=" The inputs shared by the functionals")
+
+    def setup(self):
+        self.solver = self.options["solver"]
+        depends = self.options["depends"]
+
+        for input in depends:
+            self.add_input(input,
+                           distributed=True,
+                           shape=self.solver.getFieldSize(input),
+                           tags=["mphys_coupling"])
+
+        self.functionals = {}
+        for name, functional in self.options["functionals"].items():
+            func = functional["func"]
+            self.solver.createOutput(func, functional.get("func_options", {}))
+            self.functionals[name] = {
+                "func": func,
+                "depends": functional.get("depends", depends),
+            }
+            self.add_output(name,
+                            shape=self.solver.getOutputSize(func),
+                            tags=["mphys_result"])
+
+    def _solver_inputs(self, inputs, name):
+        return {input: inputs[input] for input in self.functionals[name]["depends"]}
+
+    def compute(self, inputs, outputs):
+        for name, functional in self.functionals.items():
+            self.solver.calcOutput(functional["func"],
+                                   self._solver_inputs(inputs, name),
+                                   outputs[name])
+
+    def compute_jacvec_product(self, inputs, d_inputs, d_outputs, mode):
+        for name, functional in self.functionals.items():
+            if name not in d_outputs:
+                continue
+            func = functional["func"]
+            for input in functional["depends"]:
+                if input not in d_inputs:
+                    continue
+                if mode == "fwd":
+                    self.solver.jacobianVectorProduct(of=func,
+                                                      wrt=input,
+                                                      wrt_dot=d_inputs[input],
+                                                      out_dot=d_outputs[name])
+                elif mode == "rev":
+                    self.solver.vectorJacobianProduct(of=func,
+                                                      wrt=input,
+                                                      out_bar=d_outputs[name],
+                                                      wrt_bar=d_inputs[input])
+
+
+if __name__ == "__main__":
+    import unittest
+    import numpy as np
+    from openmdao.utils.assert_utils import assert_check_partials
+
+    class LinearSolver(object):
+        """
+        Stand in for a mach solver with functionals that are linear in their
+        inputs
+        """
+        sizes = {"state": 5, "mesh_coords": 8}
+
+        def __init__(self):
+            self.weights = {}
+            self.calls = 0
+
+        def getFieldSize(self, name):
+            return self.sizes[name]
+
+        def createOutput(self, func, options):
+            rng = np.random.default_rng(len(self.weights))
+            self.weights[func] = {input: options.get("scale", 1.0) * rng.standard_normal(size)
+                                  for input, size in self.sizes.items()}
+
+        def getOutputSize(self, func):
+            return 1
+
+        def calcOutput(self, func, inputs, output):
+            self.calls += 1
+            output[:] = sum(np.dot(self.weights[func][input], value)
+                            for input, value in inputs.items())
+
+        def jacobianVectorProduct(self, of, wrt, wrt_dot, out_dot):
+            out_dot += np.dot(self.weights[of][wrt], wrt_dot)
+
+        def vectorJacobianProduct(self, of, wrt, out_bar, wrt_bar):
+            wrt_bar += self.weights[of][wrt] * out_bar
+
+    class TestMachFunctionals(unittest.TestCase):
+        def test_shared_inputs(self):
+            solver = LinearSolver()
+            functionals = {
+                "torque": {"func": "torque"},
+                "flux_linkage0_phaseA_z": {"func": "flux_linkage:phaseA_z",
+                                           "func_options": {"scale": 2.0}},
+                "mass": {"func": "mass", "depends": ["mesh_coords"]},
+            }
+            prob = om.Problem(reports=False)
+            prob.model.add_subsystem("functionals",
+                                     MachFunctionals(solver=solver, functionals=functionals),
+                                     promotes_inputs=[("state", "em_state0"),
+                                                      ("mesh_coords", "x_em_vol")])
+            prob.setup()
+
+            rng = np.random.default_rng(1)
+            prob["em_state0"] = rng.standard_normal(5)
+            prob["x_em_vol"] = rng.standard_normal(8)
+            prob.run_model()
+
+            weights = solver.weights
+            torque = np.dot(weights["torque"]["state"], prob["em_state0"]) + \
+                np.dot(weights["torque"]["mesh_coords"], prob["x_em_vol"])
+            self.assertAlmostEqual(prob["functionals.torque"][0], torque)
+            self.assertAlmostEqual(prob["functionals.mass"][0],
+                                   np.dot(weights["mass"]["mesh_coords"], prob["x_em_vol"]))
+            self.assertEqual(solver.calls, 3)
+
+            # one copy of each mesh sized input for all three functionals
+            inputs = prob.model.list_inputs(out_stream=None)
+            self.assertEqual(len(inputs), 2)
+
+            for mode in ["fwd", "rev"]:
+                prob.setup(mode=mode)
+                prob.run_model()
+                assert_check_partials(prob.check_partials(method="fd", out_stream=None),
+                                      atol=1e-6, rtol=1e-6)
+
+    unittest.main()
@@ -0,0 +1,414 @@
+import hashlib
+
+import numpy as np
+import openmdao.api as om
+
+
+class _Center(object):
+    """
+    High and low fidelity values and derivatives at a trust region center
+    """
+
+    def __init__(self, x, hi, lo, hi_jac, lo_jac):
+        self.x = x
+        self.hi = hi
+        self.lo = lo
+        self.hi_jac = hi_jac
+        self.lo_jac = lo_jac
+
+
+class MultiFidelityModel(om.ExplicitComponent):
+    """
+    Component that evaluates a cheap model corrected to match an expensive
+    model, for example the analytic and finite element Motor models
+
+    The expensive model is only run at trust region centers. Everywhere else
+    the outputs are the cheap model's outputs with a first order additive or
+    multiplicative correction that matches the expensive model's values and
+    derivatives at the active center. The center stays fixed while a driver
+    optimizes the corrected model inside the trust region (see
+    run_trust_region); update_trust_region then accepts or rejects the
+    optimum as the new center and grows or shrinks the trust radius based on
+    how well the corrected model predicted the change in the objective.
+
+    The component's inputs and outputs use the models' promoted names, so a
+    driver set up on the expensive model can be pointed at this component
+    unchanged.
+    """
+
+    def initialize(self):
+        self.options.declare("low_fidelity", types=om.Group, recordable=False,
+                             desc=" The cheap model")
+        self.options.declare("high_fidelity", types=om.Group, recordable=False,
+                             desc=" The expensive model")
+        self.options.declare("inputs", types=list,
+                             desc=" The promoted design inputs shared by both models")
+        self.options.declare("outputs", types=list,
+                             desc=" The promoted outputs shared by both models")
+        self.options.declare("objective", types=str, default=None, allow_none=True,
+                             desc=" Output used to judge the corrected model's predictions;"
+                                  " defaults to the first output")
+        self.options.declare("correction", default="additive",
+                             values=["additive", "multiplicative"],
+                             desc=" Type of correction applied to the cheap model")
+        self.options.declare("trust_radius", default=0.1,
+                             desc=" Initial trust radius, in the inf-norm of the scaled inputs")
+        self.options.declare("min_trust_radius", default=1e-4,
+                             desc=" Smallest trust radius")
+        self.options.declare("max_trust_radius", default=1.0,
+                             desc=" Largest trust radius")
+        self.options.declare("input_scales", types=dict, default=None, allow_none=True,
+                             desc=" Scale for each input used to measure distance from the center")
+        self.options.declare("accept_ratio", default=0.1,
+                             desc=" Smallest ratio of the actual to the predicted change in the"
+                                  " objective for which a step is accepted")
+
+    def setup(self):
+        self._inputs = self.options["inputs"]
+        self._outputs = self.options["outputs"]
+        self._objective = self.options["objective"] or self._outputs[0]
+
+        self.lo_problem = self._build_problem(self.options["low_fidelity"])
+        self.hi_problem = self._build_problem(self.options["high_fidelity"])
+
+        self._sizes = {}
+        for name in self._inputs:
+            val = self.lo_problem.get_val(name)
+            self._sizes[name] = val.size
+            self.add_input(name, val=val)
+
+        for name in self._outputs:
+            val = self.lo_problem.get_val(name)
+            self._sizes[name] = val.size
+            self.add_output(name, val=val)
+
+        scales = self.options["input_scales"] or {}
+        self._scale = np.concatenate([np.full(self._sizes[name], scales.get(name, 1.0))
+                                      for name in self._inputs])
+
+        self.trust_radius = self.options["trust_radius"]
+        self.centers = {}
+        self.center = None
+        self.num_high_fidelity = 0
+        self.num_low_fidelity = 0
+
+    def setup_partials(self):
+        self.declare_partials(self._outputs, self._inputs)
+
+    def _build_problem(self, model):
+        problem = om.Problem(model=model, comm=self.comm, reports=False)
+        problem.setup()
+        problem.final_setup()
+        return problem
+
+    def _design(self, inputs):
+        return np.concatenate([np.real(inputs[name]).ravel()
+                               for name in self._inputs])
+
+    def _key(self, x):
+        return hashlib.sha1(np.ascontiguousarray(x).tobytes()).hexdigest()
+
+    def _evaluate(self, problem, x, derivatives):
+        for name, value in self._split(x).items():
+            problem.set_val(name, value)
+        problem.run_model()
+
+        values = {name: problem.get_val(name).ravel().copy()
+                  for name in self._outputs}
+        if not derivatives:
+            return values, None
+
+        totals = problem.compute_totals(of=self._outputs, wrt=self._inputs)
+        jac = {name: np.hstack([np.atleast_2d(totals[name, wrt])
+                                for wrt in self._inputs])
+               for name in self._outputs}
+        return values, jac
+
+    def _low_fidelity(self, x, derivatives=False):
+        self.num_low_fidelity += 1
+        return self._evaluate(self.lo_problem, x, derivatives)
+
+    def _new_center(self, x):
+        key = self._key(x)
+        if key in self.centers:
+            return self.centers[key]
+
+        self.num_high_fidelity += 1
+        hi, hi_jac = self._evaluate(self.hi_problem, x, derivatives=True)
+        lo, lo_jac = self._low_fidelity(x, derivatives=True)
+        center = _Center(x.copy(), hi, lo, hi_jac, lo_jac)
+        self.centers[key] = center
+        return center
+
+    def _corrected(self, center, x, lo, lo_jac=None):
+        """
+        Apply the correction from a center to low fidelity values (and
+        derivatives) at x
+        """
+        dx = x - center.x
+        values = {}
+        jac = {}
+        for name in self._outputs:
+            if self.options["correction"] == "additive":
+                shift = center.hi[name] - center.lo[name]
+                shift_jac = center.hi_jac[name] - center.lo_jac[name]
+                values[name] = lo[name] + shift + shift_jac @ dx
+                if lo_jac is not None:
+                    jac[name] = lo_jac[name] + shift_jac
+            else:
+                ratio = center.hi[name] / center.lo[name]
+                ratio_jac = (center.hi_jac[name] - ratio[:, np.newaxis] * center.lo_jac[name]) \
+                    / center.lo[name][:, np.newaxis]
+                beta = ratio + ratio_jac @ dx
+                values[name] = beta * lo[name]
+                if lo_jac is not None:
+                    jac[name] = beta[:, np.newaxis] * lo_jac[name] \
+                        + lo[name][:, np.newaxis] * ratio_jac
+        return values, jac
+
+    def _split(self, x):
+        values = {}
+        offset = 0
+        for name in self._inputs:
+            size = self._sizes[name]
+            values[name] = x[offset:offset + size]
+            offset += size
+        return values
+
+    def trust_region_bounds(self):
+        """
+        Lower and upper bounds of each input inside the trust region around
+        the center
+        """
+        half_width = self.trust_radius * self._scale
+        lower = self._split(self.center.x - half_width)
+        upper = self._split(self.center.x + half_width)
+        return {name: (lower[name], upper[name]) for name in self._inputs}
+
+    def update_trust_region(self, x):
+        """
+        Accept or reject the step from the center to x based on the ratio of
+        the actual to the predicted change in the objective, and grow or
+        shrink the trust radius
+
+        Returns whether the step was accepted and its length, in the inf-norm
+        of the scaled inputs
+        """
+        center = self.center
+        step = np.max(np.abs((x - center.x) / self._scale))
+        if step == 0.0:
+            return True, 0.0
+
+        candidate = self._new_center(x)
+        lo, _ = self._low_fidelity(x)
+        predicted, _ = self._corrected(center, x, lo)
+        objective = self._objective
+        actual_change = np.sum(candidate.hi[objective] - center.hi[objective])
+        predicted_change = np.sum(predicted[objective] - center.hi[objective])
+        if predicted_change != 0.0:
+            ratio = actual_change / predicted_change
+        else:
+            ratio = 1.0 if actual_change == 0.0 else 0.0
+
+        if ratio < 0.25:
+            self.trust_radius = max(0.5 * min(self.trust_radius, step),
+                                    self.options["min_trust_radius"])
+        elif ratio > 0.75 and step >= 0.9 * self.trust_radius:
+            self.trust_radius = min(2.0 * self.trust_radius,
+                                    self.options["max_trust_radius"])
+
+        accepted = ratio >= self.options["accept_ratio"]
+        if accepted:
+            self.center = candidate
+        return accepted, step
+
+    def compute(self, inputs, outputs):
+        x = self._design(inputs)
+        if self.center is None:
+            self.center = self._new_center(x)
+
+        lo, _ = self._low_fidelity(x)
+        values, _ = self._corrected(self.center, x, lo)
+        for name in self._outputs:
+            outputs[name] = values[name].reshape(outputs[name].shape)
+
+    def compute_partials(self, inputs, partials):
+        x = self._design(inputs)
+        if self.center is None:
+            self.center = self._new_center(x)
+
+        lo, lo_jac = self._low_fidelity(x, derivatives=True)
+        _, jac = self._corrected(self.center, x, lo, lo_jac)
+        for name in self._outputs:
+            offset = 0
+            for wrt in self._inputs:
+                size = self._sizes[wrt]
+                partials[name, wrt] = jac[name][:, offset:offset + size]
+                offset += size
+
+
+def run_trust_region(problem, component, max_iter=20, tol=1e-6):
+    """
+    Repeatedly run a problem's driver on the corrected model with the design
+    variables bounded to the trust region, accepting or rejecting each
+    optimum as the next center, until an accepted step is below tol or a
+    step is rejected at the smallest trust radius
+
+    The component's inputs must be promoted to the model, where they are the
+    design variables. Returns the number of outer iterations.
+    """
+    inputs = component.options["inputs"]
+    design_vars = problem.model.get_design_vars(get_sizes=False)
+    bounds = {name: (design_vars[name]["lower"], design_vars[name]["upper"])
+              for name in inputs if name in design_vars}
+
+    def design():
+        return np.concatenate([np.real(problem.get_val(name)).ravel()
+                               for name in inputs])
+
+    if component.center is None:
+        problem.run_model()
+
+    try:
+        for i in range(max_iter):
+            for name, (lower, upper) in component.trust_region_bounds().items():
+                if name in bounds:
+                    problem.model.set_design_var_options(name,
+                                                         lower=np.maximum(lower, bounds[name][0]),
+                                                         upper=np.minimum(upper, bounds[name][1]))
+            problem.run_driver()
+
+            accepted, step = component.update_trust_region(design())
+            if accepted and step < tol:
+                break
+            if not accepted and component.trust_radius <= component.options["min_trust_radius"]:
+                break
+    finally:
+        for name, (lower, upper) in bounds.items():
+            problem.model.set_design_var_options(name, lower=lower, upper=upper)
+
+    # leave the problem at the final center, where it matches the expensive model
+    for name, value in component._split(component.center.x).items():
+        problem.set_val(name, value)
+    problem.run_model()
+    return i + 1
+
+
+if __name__ == "__main__":
+    import unittest
+    from openmdao.utils.assert_utils import assert_near_equal, assert_check_partials
+
+    def _low_fidelity():
+        model = om.Group()
+        model.add_subsystem("f", om.ExecComp(["y = (x - 1)**2 + z**2",
+                                              "c = x + z"]),
+                            promotes=["*"])
+        return model
+
+    def _high_fidelity():
+        model = om.Group()
+        model.add_subsystem("f", om.ExecComp(["y = (x - 1.3)**2 + 1.2*z**2 + 0.1*sin(3*x) + 0.5",
+                                              "c = 1.05*x + z"]),
+                            promotes=["*"])
+        return model
+
+    class TestMultiFidelityModel(unittest.TestCase):
+        def _problem(self, correction):
+            prob = om.Problem(reports=False)
+            prob.model.add_subsystem("motor",
+                                     MultiFidelityModel(low_fidelity=_low_fidelity(),
+                                                        high_fidelity=_high_fidelity(),
+                                                        inputs=["x", "z"],
+                                                        outputs=["y", "c"],
+                                                        correction=correction,
+                                                        trust_radius=0.25),
+                                     promotes=["*"])
+            return prob
+
+        def test_consistency_at_center(self):
+            for correction in ["additive", "multiplicative"]:
+                prob = self._problem(correction)
+                prob.setup(force_alloc_complex=True)
+                prob["x"] = 0.4
+                prob["z"] = 0.7
+                prob.run_model()
+
+                # values match the high fidelity model at the center
+                hi = om.Problem(model=_high_fidelity(), reports=False)
+                hi.setup()
+                hi["x"] = 0.4
+                hi["z"] = 0.7
+                hi.run_model()
+                assert_near_equal(prob["y"], hi["y"], tolerance=1e-12)
+                assert_near_equal(prob["c"], hi["c"], tolerance=1e-12)
+
+                # derivatives of the corrected model are consistent
+                data = prob.check_partials(method="fd", form="central",
+                                           out_stream=None)
+                assert_check_partials(data, atol=1e-5, rtol=1e-5)
+
+        def test_trust_region_steps(self):
+            prob = self._problem("additive")
+            prob.setup()
+            prob["x"] = 0.4
+            prob["z"] = 0.7
+            prob.run_model()
+            component = prob.model.motor
+            center = component.center
+
+            # the center stays fixed while the design moves
+            prob["x"] = 2.0
+            prob.run_model()
+            self.assertIs(component.center, center)
+            self.assertEqual(component.num_high_fidelity, 1)
+            lower, upper = component.trust_region_bounds()["x"]
+            np.testing.assert_allclose([lower[0], upper[0]], [0.15, 0.65])
+
+            # a step the corrected model mispredicts is rejected
+            accepted, step = component.update_trust_region(np.array([0.4, -0.7]))
+            self.assertFalse(accepted)
+            self.assertIs(component.center, center)
+            self.assertLess(component.trust_radius, 0.25)
+
+            # a well predicted step moves the center
+            accepted, step = component.update_trust_region(np.array([0.5, 0.5]))
+            self.assertTrue(accepted)
+            np.testing.assert_allclose(component.center.x, [0.5, 0.5])
+
+        def test_optimization(self):
+            prob = self._problem("additive")
+            prob.driver = om.ScipyOptimizeDriver(optimizer="SLSQP", tol=1e-10,
+                                                 disp=False)
+            prob.model.add_design_var("x", lower=-2, upper=3)
+            prob.model.add_design_var("z", lower=-2, upper=3)
+            prob.model.add_objective("y")
+            prob.model.add_constraint("c", lower=0.5)
+            prob.setup()
+            prob["x"] = 0.0
+            prob["z"] = 2.0
+            run_trust_region(prob, prob.model.motor, tol=1e-8)
+
+            # the optimum of the high fidelity model
+            hi = om.Problem(model=_high_fidelity(), reports=False)
+            hi.driver = om.ScipyOptimizeDriver(optimizer="SLSQP", tol=1e-10,
+                                               disp=False)
+            hi.model.add_design_var("x", lower=-2, upper=3)
+            hi.model.add_design_var("z", lower=-2, upper=3)
+            hi.model.add_objective("y")
+            hi.model.add_constraint("c", lower=0.5)
+            hi.setup()
+            hi["x"] = 0.0
+            hi["z"] = 2.0
+            hi.run_driver()
+
+            np.testing.assert_allclose(prob["x"], hi["x"], atol=1e-4)
+            np.testing.assert_allclose(prob["z"], hi["z"], atol=1e-4)
+
+            component = prob.model.motor
+            self.assertLess(component.num_high_fidelity,
+                            component.num_low_fidelity)
+
+            # the original design variable bounds are restored
+            self.assertEqual(prob.model.get_design_vars()["x"]["lower"], -2)
+
+    unittest.main()
@@ -0,0 +1,400 @@
+import numpy as np
+import openmdao.api as om
+from scipy.linalg import cho_factor, cho_solve
+from scipy.optimize import minimize
+
+
+def latin_hypercube(bounds, num_samples, seed=None):
+    """
+    Latin hypercube samples inside of bounds, an array of (lower, upper) pairs
+    """
+    bounds = np.atleast_2d(bounds)
+    rng = np.random.default_rng(seed)
+    ndim = bounds.shape[0]
+    samples = np.empty((num_samples, ndim))
+    for i in range(ndim):
+        edges = (rng.permutation(num_samples) + rng.random(num_samples)) / num_samples
+        samples[:, i] = bounds[i, 0] + edges * (bounds[i, 1] - bounds[i, 0])
+    return samples
+
+
+def sweep_order(points, start=0):
+    """
+    Greedy nearest neighbor ordering of points, beginning with points[start],
+    so each evaluation starts from a nearby converged state
+    """
+    points = np.atleast_2d(points)
+    scale = np.ptp(points, axis=0)
+    scale[scale == 0.0] = 1.0
+    scaled = points / scale
+
+    remaining = [i for i in range(points.shape[0]) if i != start]
+    order = [start]
+    while remaining:
+        distance = np.linalg.norm(scaled[remaining] - scaled[order[-1]], axis=1)
+        order.append(remaining.pop(int(np.argmin(distance))))
+    return np.array(order)
+
+
+class GaussianProcess(object):
+    """
+    Gradient-enhanced Gaussian process with a squared exponential kernel
+
+    Inputs are scaled to the unit hypercube using bounds and values are
+    normalized before fitting. Gradients, if given, are included as
+    additional observations.
+    """
+
+    def __init__(self, bounds, nugget=1e-10, length_scales=None):
+        self.bounds = np.atleast_2d(np.asarray(bounds, dtype=float))
+        self.ndim = self.bounds.shape[0]
+        self.nugget = nugget
+        self._range = self.bounds[:, 1] - self.bounds[:, 0]
+        if length_scales is None:
+            length_scales = np.full(self.ndim, 0.3)
+        self.length_scales = np.asarray(length_scales, dtype=float)
+
+        self.x = np.empty((0, self.ndim))
+        self.y = np.empty(0)
+        self.dy = None
+
+    def _scale(self, x):
+        return (np.atleast_2d(x) - self.bounds[:, 0]) / self._range
+
+    def _kernel(self, xa, xb, length_scales, gradients):
+        """
+        Covariance between observations at xa and xb, including the gradient
+        blocks if gradients is true
+        """
+        inv_l2 = 1.0 / length_scales**2
+        diff = xa[:, np.newaxis, :] - xb[np.newaxis, :, :]
+        k = np.exp(-0.5 * np.sum(diff**2 * inv_l2, axis=2))
+        if not gradients:
+            return k
+
+        na = xa.shape[0]
+        nb = xb.shape[0]
+        ndim = self.ndim
+        cov = np.empty((na * (ndim + 1), nb * (ndim + 1)))
+        cov[:na, :nb] = k
+        for j in range(ndim):
+            # cov(f(xa), df(xb)/dxb_j)
+            cov[:na, nb * (j + 1):nb * (j + 2)] = k * diff[:, :, j] * inv_l2[j]
+            # cov(df(xa)/dxa_j, f(xb))
+            cov[na * (j + 1):na * (j + 2), :nb] = -k * diff[:, :, j] * inv_l2[j]
+        for i in range(ndim):
+            for j in range(ndim):
+                block = -diff[:, :, i] * diff[:, :, j] * inv_l2[i] * inv_l2[j]
+                if i == j:
+                    block = block + inv_l2[i]
+                cov[na * (i + 1):na * (i + 2), nb * (j + 1):nb * (j + 2)] = k * block
+        return cov
+
+    def _targets(self):
+        target = (self.y - self._mean) / self._std
+        if self.dy is None:
+            return target
+        dy = self.dy * self._range / self._std
+        return np.concatenate([target, dy.T.ravel()])
+
+    def _factor(self, length_scales):
+        x = self._scale(self.x)
+        gradients = self.dy is not None
+        cov = self._kernel(x, x, length_scales, gradients)
+        cov[np.diag_indices_from(cov)] += self.nugget
+        return cho_factor(cov, lower=True)
+
+    def _neg_log_likelihood(self, log_length_scales):
+        length_scales = np.exp(log_length_scales)
+        try:
+            factor = self._factor(length_scales)
+        except np.linalg.LinAlgError:
+            return 1e20
+        target = self._targets()
+        alpha = cho_solve(factor, target)
+        return 0.5 * target @ alpha + np.sum(np.log(np.diag(factor[0])))
+
+    def fit(self, x, y, dy=None, optimize=True):
+        """
+        Fit the process to values y (and gradients dy) at x
+        """
+        self.x = np.atleast_2d(np.asarray(x, dtype=float))
+        self.y = np.asarray(y, dtype=float).ravel()
+        self.dy = None if dy is None else np.atleast_2d(np.asarray(dy, dtype=float))
+        self._refit(optimize)
+
+    def add_points(self, x, y, dy=None, optimize=False):
+        """
+        Add observations and refit, keeping the current length scales unless
+        optimize is true
+        """
+        x = np.atleast_2d(np.asarray(x, dtype=float))
+        self.x = np.vstack([self.x, x])
+        self.y = np.concatenate([self.y, np.asarray(y, dtype=float).ravel()])
+        if self.dy is not None:
+            if dy is None:
+                raise ValueError("Gradient-enhanced process needs gradients "
+                                 "for new points!")
+            self.dy = np.vstack([self.dy, np.atleast_2d(dy)])
+        self._refit(optimize)
+
+    def _refit(self, optimize):
+        self._mean = np.mean(self.y)
+        self._std = np.std(self.y)
+        if self._std == 0.0:
+            self._std = 1.0
+
+        if optimize:
+            result = minimize(self._neg_log_likelihood,
+                              np.log(self.length_scales),
+                              method="L-BFGS-B",
+                              bounds=[(np.log(1e-2), np.log(1e1))] * self.ndim)
+            self.length_scales = np.exp(result.x)
+
+        self._cho = self._factor(self.length_scales)
+        self._alpha = cho_solve(self._cho, self._targets())
+
+    def predict(self, x, gradient=False):
+        """
+        Mean prediction at x, and optionally its gradient with respect to x
+        """
+        xs = self._scale(x)
+        xt = self._scale(self.x)
+        n = xt.shape[0]
+        inv_l2 = 1.0 / self.length_scales**2
+        diff = xs[:, np.newaxis, :] - xt[np.newaxis, :, :]
+        k = np.exp(-0.5 * np.sum(diff**2 * inv_l2, axis=2))
+
+        if self.dy is None:
+            weights = self._alpha
+            mean = k @ weights
+        else:
+            cross = self._kernel(xs, xt, self.length_scales, gradients=True)[:xs.shape[0]]
+            mean = cross @ self._alpha
+
+        value = self._mean + self._std * mean
+        if not gradient:
+            return value
+
+        grad = np.empty((xs.shape[0], self.ndim))
+        for i in range(self.ndim):
+            dk = -k * diff[:, :, i] * inv_l2[i]
+            dmean = dk @ self._alpha[:n]
+            if self.dy is not None:
+                for j in range(self.ndim):
+                    block = -diff[:, :, i] * diff[:, :, j] * inv_l2[i] * inv_l2[j]
+                    if i == j:
+                        block = block + inv_l2[i]
+                    dmean += (k * block) @ self._alpha[n * (j + 1):n * (j + 2)]
+            grad[:, i] = dmean
+        grad *= self._std / self._range
+        return value, grad
+
+
+class OperatingMap(object):
+    """
+    Surrogates of motor outputs over the (rpm, current) operating envelope
+
+    The map is trained from evaluations of an already set up problem, such as
+    one containing Motor, and can be refit as new operating points arrive.
+    """
+
+    def __init__(self,
+                 bounds,
+                 inputs=("rpm", "rms_current"),
+                 outputs=("efficiency", "total_loss", "L", "phase_back_emf"),
+                 gradients=True):
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.bounds = np.atleast_2d(np.asarray(bounds, dtype=float))
+        self.gradients = gradients
+        self.surrogates = {name: GaussianProcess(self.bounds)
+                           for name in self.outputs}
+        self.num_evaluations = 0
+
+    def evaluate(self, problem, points):
+        """
+        Run the problem at each operating point, ordered so that each solve
+        starts from its nearest neighbor's converged state
+
+        Returns the values and, if the map is gradient-enhanced, the gradients
+        of each output with respect to the operating point
+        """
+        points = np.atleast_2d(points)
+        order = sweep_order(points)
+        num_points = points.shape[0]
+
+        values = {name: np.empty(num_points) for name in self.outputs}
+        grads = {name: np.empty((num_points, len(self.inputs)))
+                 for name in self.outputs}
+        for index in order:
+            for i, name in enumerate(self.inputs):
+                problem.set_val(name, points[index, i])
+            problem.run_model()
+            self.num_evaluations += 1
+
+            for name in self.outputs:
+                values[name][index] = problem.get_val(name).item()
+
+            if self.gradients:
+                totals = problem.compute_totals(of=self.outputs, wrt=self.inputs)
+                for name in self.outputs:
+                    for i, wrt in enumerate(self.inputs):
+                        grads[name][index, i] = totals[name, wrt].item()
+
+        if not self.gradients:
+            grads = None
+        return values, grads
+
+    def fit(self, problem, num_samples, seed=None):
+        """
+        Sample the operating envelope and fit each surrogate
+        """
+        points = latin_hypercube(self.bounds, num_samples, seed)
+        values, grads = self.evaluate(problem, points)
+        for name in self.outputs:
+            dy = grads[name] if grads is not None else None
+            self.surrogates[name].fit(points, values[name], dy)
+
+    def update(self, problem, points, optimize=False):
+        """
+        Evaluate the problem at new operating points and refit each surrogate
+        """
+        points = np.atleast_2d(points)
+        values, grads = self.evaluate(problem, points)
+        for name in self.outputs:
+            dy = grads[name] if grads is not None else None
+            self.surrogates[name].add_points(points, values[name], dy, optimize)
+
+
+class OperatingMapSurrogate(om.ExplicitComponent):
+    """
+    Vectorized evaluation of an OperatingMap at many operating points
+    """
+
+    def initialize(self):
+        self.options.declare("operating_map", types=OperatingMap, recordable=False,
+                             desc=" The fit operating map")
+        self.options.declare("num_points", default=1,
+                             desc=" Number of operating points evaluated at once")
+
+    def setup(self):
+        operating_map = self.options["operating_map"]
+        num_points = self.options["num_points"]
+
+        for name in operating_map.inputs:
+            self.add_input(name, shape=num_points)
+        for name in operating_map.outputs:
+            self.add_output(name, shape=num_points)
+
+    def setup_partials(self):
+        operating_map = self.options["operating_map"]
+        num_points = self.options["num_points"]
+
+        arange = np.arange(num_points)
+        for name in operating_map.outputs:
+            for wrt in operating_map.inputs:
+                self.declare_partials(name, wrt, rows=arange, cols=arange)
+
+    def _points(self, inputs):
+        operating_map = self.options["operating_map"]
+        return np.column_stack([inputs[name] for name in operating_map.inputs])
+
+    def compute(self, inputs, outputs):
+        operating_map = self.options["operating_map"]
+        points = self._points(inputs)
+        for name in operating_map.outputs:
+            outputs[name] = operating_map.surrogates[name].predict(points)
+
+    def compute_partials(self, inputs, partials):
+        operating_map = self.options["operating_map"]
+        points = self._points(inputs)
+        for name in operating_map.outputs:
+            _, grad = operating_map.surrogates[name].predict(points, gradient=True)
+            for i, wrt in enumerate(operating_map.inputs):
+                partials[name, wrt] = grad[:, i]
+
+
+if __name__ == "__main__":
+    import unittest
+    from openmdao.utils.assert_utils import assert_check_partials
+
+    def _operating_problem():
+        prob = om.Problem(reports=False)
+        prob.model.add_subsystem("motor",
+                                 om.ExecComp(["total_loss = 1e-4*rpm**1.5 + 0.02*rms_current**2",
+                                              "L = 1e-3 / (1 + 0.01*rms_current)"]),
+                                 promotes=["*"])
+        prob.setup()
+        return prob
+
+    _bounds = [[1000.0, 8000.0], [5.0, 50.0]]
+
+    class TestGaussianProcess(unittest.TestCase):
+        def test_gradients_improve_fit(self):
+            def f(x):
+                return np.sin(3 * x[:, 0]) * np.cos(2 * x[:, 1])
+
+            def df(x):
+                return np.column_stack([3 * np.cos(3 * x[:, 0]) * np.cos(2 * x[:, 1]),
+                                        -2 * np.sin(3 * x[:, 0]) * np.sin(2 * x[:, 1])])
+
+            bounds = [[0.0, 2.0], [0.0, 2.0]]
+            x = latin_hypercube(bounds, 16, seed=0)
+            test = latin_hypercube(bounds, 200, seed=1)
+
+            plain = GaussianProcess(bounds)
+            plain.fit(x, f(x))
+            enhanced = GaussianProcess(bounds)
+            enhanced.fit(x, f(x), df(x))
+
+            plain_error = np.max(np.abs(plain.predict(test) - f(test)))
+            enhanced_error = np.max(np.abs(enhanced.predict(test) - f(test)))
+            self.assertLess(enhanced_error, plain_error)
+            self.assertLess(enhanced_error, 0.1)
+
+            # interpolates the training values and gradients
+            value, grad = enhanced.predict(x, gradient=True)
+            np.testing.assert_allclose(value, f(x), atol=1e-6)
+            np.testing.assert_allclose(grad, df(x), atol=1e-4)
+
+    class TestOperatingMap(unittest.TestCase):
+        def test_fit_and_update(self):
+            prob = _operating_problem()
+            operating_map = OperatingMap(_bounds, outputs=["total_loss", "L"])
+            operating_map.fit(prob, 8, seed=0)
+
+            test = latin_hypercube(_bounds, 50, seed=2)
+            expected = 1e-4 * test[:, 0]**1.5 + 0.02 * test[:, 1]**2
+            error = np.max(np.abs(operating_map.surrogates["total_loss"].predict(test)
+                                  - expected))
+
+            operating_map.update(prob, latin_hypercube(_bounds, 8, seed=3))
+            self.assertEqual(operating_map.num_evaluations, 16)
+            updated_error = np.max(np.abs(operating_map.surrogates["total_loss"].predict(test)
+                                          - expected))
+            self.assertLess(updated_error, error)
+            self.assertLess(updated_error / np.max(expected), 1e-3)
+
+        def test_surrogate_component(self):
+            operating_map = OperatingMap(_bounds, outputs=["total_loss", "L"])
+            operating_map.fit(_operating_problem(), 10, seed=0)
+
+            prob = om.Problem(reports=False)
+            prob.model.add_subsystem("map",
+                                     OperatingMapSurrogate(operating_map=operating_map,
+                                                           num_points=5),
+                                     promotes=["*"])
+            prob.setup()
+            prob["rpm"] = np.linspace(1500, 7500, 5)
+            prob["rms_current"] = np.linspace(10, 45, 5)
+            prob.run_model()
+
+            expected = 1e-4 * prob["rpm"]**1.5 + 0.02 * prob["rms_current"]**2
+            np.testing.assert_allclose(prob["total_loss"], expected, rtol=1e-2)
+
+            data = prob.check_partials(method="fd", form="central", step=1e-3,
+                                       out_stream=None)
+            assert_check_partials(data, atol=1e-6, rtol=1e-4)
+
+    unittest.main()
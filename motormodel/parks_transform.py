@@ -3,6 +3,18 @@ import numpy as np
 import openmdao.api as om
 
 
+def _parks_matrix(theta_e):
+    """
+    abc to dq0 transform with the a-phase aligned with the d-axis
+    """
+    return 2/3 * np.array([
+        [np.cos(theta_e), np.cos(theta_e - 2*np.pi / 3),
+         np.cos(theta_e + 2*np.pi / 3)],
+        [np.sin(theta_e), np.sin(theta_e - 2*np.pi / 3),
+         np.sin(theta_e + 2*np.pi / 3)],
+        [0.5, 0.5, 0.5]])
+
+
 class ParksTransform(om.ExplicitComponent):
     def initialize(self):
         self.options.declare("theta_e", default=0.0, desc=" Electrical angle")
@@ -18,7 +30,12 @@ class ParksTransform(om.ExplicitComponent):
         self.add_output("d")
         self.add_output("q")
 
-        self.declare_partials("*", "*", method='cs')
+        # the transform is linear, so the partials are constant
+        mat = _parks_matrix(self.options["theta_e"])
+        for row, output in enumerate(["d", "q"]):
+            for col, phase in enumerate(["phaseA", "phaseB", "phaseC"]):
+                if mat[row, col] != 0.0:
+                    self.declare_partials(output, phase, val=mat[row, col])
 
     def compute(self, inputs, outputs):
         theta_e = self.options["theta_e"]
@@ -38,12 +55,7 @@ class ParksTransform(om.ExplicitComponent):
         #     [0.5, 0.5, 0.5]])
 
         # a-phase to d-axis alignment
-        mat = 2/3 * np.array([
-            [np.cos(theta_e), np.cos(theta_e - 2*np.pi / 3),
-             np.cos(theta_e + 2*np.pi / 3)],
-            [np.sin(theta_e), np.sin(theta_e - 2*np.pi / 3),
-             np.sin(theta_e + 2*np.pi / 3)],
-            [0.5, 0.5, 0.5]])
+        mat = _parks_matrix(theta_e)
 
         # mat = np.sqrt(2/3) * np.array([
         #     [np.cos(theta_e), np.cos(theta_e - 2*np.pi / 3),
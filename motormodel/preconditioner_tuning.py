@@ -0,0 +1,324 @@
+import copy
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+
+from mach import PDESolver
+
+from .motor_options import _nested_update
+
+# Candidate preconditioner settings for the EM solver, tried with the default
+# Krylov settings, after which the GMRES restart length is tuned
+_prec_candidates = {
+    True: [
+        {"type": "hypreboomeramg", "strength-threshold": 0.25},
+        {"type": "hypreboomeramg", "strength-threshold": 0.5},
+        {"type": "hypreboomeramg", "strength-threshold": 0.7},
+        {"type": "hypreilu", "lev-fill": 2},
+        {"type": "hypreilu", "lev-fill": 5},
+        {"type": "hypreilu", "lev-fill": 10},
+    ],
+    False: [
+        {"type": "hypreams"},
+    ]
+}
+
+_kdim_candidates = [50, 100, 200]
+
+
+def mesh_fingerprint(mesh_file, comm_size):
+    """
+    Key for tuned settings: a hash of the mesh file's contents and the number
+    of ranks it is partitioned over
+    """
+    digest = hashlib.sha1()
+    with open(mesh_file, "rb") as mesh:
+        for chunk in iter(lambda: mesh.read(1 << 20), b""):
+            digest.update(chunk)
+    return f"{digest.hexdigest()}-{comm_size}"
+
+
+def _resident_memory():
+    """
+    Current resident memory of this process in bytes, or None if it cannot be
+    read (/proc/self/statm is Linux only)
+    """
+    try:
+        with open("/proc/self/statm", "r") as statm:
+            pages = int(statm.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+    return pages * os.sysconf("SC_PAGE_SIZE")
+
+
+def _linear_converged(solver, inputs, step, lin_options, comm):
+    """
+    Whether the Newton step from the zero state solved J step = -R(0) to the
+    "lin-solver" tolerances
+    """
+    zero = np.zeros_like(step)
+    solver_inputs = dict(inputs, state=zero)
+    residual = np.zeros_like(step)
+    solver.calcResidual(solver_inputs, residual)
+    solver.linearize(solver_inputs)
+    lin_residual = np.zeros_like(step)
+    solver.jacobianVectorProduct(wrt_dot=step, wrt="state", res_dot=lin_residual)
+    lin_residual += residual
+
+    norms = comm.allreduce(np.array([np.dot(residual, residual),
+                                     np.dot(lin_residual, lin_residual)]))
+    initial, final = np.sqrt(norms)
+    return final <= max(lin_options.get("reltol", 0.0) * initial,
+                        lin_options.get("abstol", 0.0))
+
+
+class PreconditionerTuner(object):
+    """
+    Pick the fastest preconditioner and GMRES restart length for a mesh from
+    short benchmark solves, caching the winner in a JSON file
+
+    benchmark(overrides) must solve with the given "lin-prec" and
+    "lin-solver" overrides and return (seconds, memory in bytes, converged).
+    Candidates that do not converge or that use more than memory_budget bytes
+    are skipped. The memory budget is not enforced for benchmarks that report
+    None for their memory. With a communicator, only rank 0 reads and writes the cache
+    and every rank must run the benchmarks.
+    """
+
+    def __init__(self, cache_file, memory_budget=None,
+                 prec_candidates=None, kdim_candidates=None, comm=None):
+        self.cache_file = Path(cache_file)
+        self.memory_budget = memory_budget
+        self.comm = comm
+        self.prec_candidates = prec_candidates
+        self.kdim_candidates = kdim_candidates if kdim_candidates is not None \
+            else _kdim_candidates
+        self.num_benchmarks = 0
+
+    def _load(self):
+        cache = {}
+        if (self.comm is None or self.comm.rank == 0) and self.cache_file.exists():
+            with open(self.cache_file, "r") as cache_file:
+                cache = json.load(cache_file)
+        if self.comm is not None:
+            cache = self.comm.bcast(cache, root=0)
+        return cache
+
+    def _store(self, key, overrides):
+        cache = self._load()
+        cache[key] = overrides
+        if self.comm is None or self.comm.rank == 0:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.cache_file, "w") as cache_file:
+                json.dump(cache, cache_file, indent=2)
+
+    def _fastest(self, benchmark, candidates):
+        best = None
+        best_time = np.inf
+        for overrides in candidates:
+            seconds, memory, converged = benchmark(overrides)
+            self.num_benchmarks += 1
+            if not converged:
+                continue
+            if self.memory_budget is not None and memory is not None \
+                    and memory > self.memory_budget:
+                continue
+            if seconds < best_time:
+                best = overrides
+                best_time = seconds
+        return best
+
+    def tune(self, key, benchmark):
+        """
+        Return the cached overrides for key, or benchmark the candidates and
+        cache the winner
+
+        Returns None if no candidate converged within the memory budget.
+        """
+        cache = self._load()
+        if key in cache:
+            return cache[key]
+
+        prec = self._fastest(benchmark,
+                             [{"lin-prec": candidate}
+                              for candidate in self.prec_candidates])
+        if prec is None:
+            return None
+
+        kdim = self._fastest(benchmark,
+                             [{"lin-prec": prec["lin-prec"],
+                               "lin-solver": {"kdim": kdim}}
+                              for kdim in self.kdim_candidates])
+        overrides = kdim if kdim is not None else prec
+
+        self._store(key, overrides)
+        return overrides
+
+
+def _benchmark_em(em_options, comm, current_density, max_linear_iter):
+    """
+    Make a benchmark that times one Newton step (a single linear solve with the
+    assembled Jacobian) of the first rotor position
+    """
+    base = copy.deepcopy(em_options)
+    base.update(base["multipoint"][0])
+    _nested_update(base, {
+        "nonlin-solver": {"maxiter": 1, "abort": False, "printlevel": -1},
+        "lin-solver": {"maxiter": max_linear_iter, "printlevel": -1}
+    })
+
+    def benchmark(overrides):
+        options = copy.deepcopy(base)
+        options["lin-prec"] = copy.deepcopy(overrides["lin-prec"])
+        options["lin-prec"].setdefault("printlevel", -1)
+        _nested_update(options, {key: value for key, value in overrides.items()
+                                 if key != "lin-prec"})
+
+        memory_before = _resident_memory()
+        solver = PDESolver(type="magnetostatic", solver_options=options, comm=comm)
+        inputs = {
+            "current_density:phaseA": np.array([current_density]),
+            "current_density:phaseB": np.array([-0.5 * current_density]),
+            "current_density:phaseC": np.array([-0.5 * current_density])
+        }
+        state = np.zeros(solver.getStateSize())
+
+        start = time.perf_counter()
+        try:
+            solver.solveForState(inputs, state)
+            solved = True
+        except RuntimeError:
+            solved = False
+        seconds = time.perf_counter() - start
+
+        # the solver, its matrix, and its preconditioner are still alive
+        memory_after = _resident_memory()
+        if memory_before is None or memory_after is None:
+            memory = None
+        else:
+            memory = max(memory_after - memory_before, 0)
+
+        solved = all(comm.allgather(solved and bool(np.all(np.isfinite(state)))))
+        converged = solved and _linear_converged(solver, inputs, state,
+                                                 options["lin-solver"], comm)
+        del solver
+
+        # every rank must agree on the timing and outcome
+        seconds = max(comm.allgather(seconds))
+        memories = comm.allgather(memory)
+        memory = None if None in memories else max(memories)
+        return seconds, memory, converged
+
+    return benchmark
+
+
+def tune_em_options(em_options, comm, cache_file, two_dimensional=True,
+                    memory_budget=None, current_density=11e6, max_linear_iter=50):
+    """
+    Apply the tuned preconditioner and Krylov settings for the EM mesh to
+    em_options, benchmarking the candidates if the mesh has not been tuned
+    """
+    key = mesh_fingerprint(em_options["mesh"]["file"], comm.size)
+    tuner = PreconditionerTuner(cache_file,
+                                memory_budget=memory_budget,
+                                prec_candidates=_prec_candidates[two_dimensional],
+                                comm=comm)
+    cached = tuner.tune(key, _benchmark_em(em_options, comm,
+                                           current_density, max_linear_iter))
+    if cached is None:
+        return em_options
+
+    em_options["lin-prec"] = copy.deepcopy(cached["lin-prec"])
+    _nested_update(em_options, {name: value for name, value in cached.items()
+                                if name != "lin-prec"})
+    return em_options
+
+
+if __name__ == "__main__":
+    import tempfile
+    import unittest
+
+    class TestPreconditionerTuner(unittest.TestCase):
+        def benchmark(self, overrides):
+            # ILU is fast but memory hungry, large strength thresholds fail
+            prec = overrides["lin-prec"]
+            kdim = overrides.get("lin-solver", {}).get("kdim", 200)
+            if prec["type"] == "hypreilu":
+                seconds = 1.0 / prec["lev-fill"]
+                memory = 100 * prec["lev-fill"]
+            else:
+                seconds = 1.0 + prec["strength-threshold"]
+                memory = 50
+            seconds += abs(kdim - 100) / 1000
+            converged = prec.get("strength-threshold", 0.0) < 0.6
+            return seconds, memory, converged
+
+        def test_tune_and_cache(self):
+            with tempfile.TemporaryDirectory() as tmp:
+                cache = Path(tmp) / "tuning.json"
+                tuner = PreconditionerTuner(cache, memory_budget=600,
+                                            prec_candidates=_prec_candidates[True])
+                overrides = tuner.tune("mesh-4", self.benchmark)
+                self.assertEqual(overrides, {"lin-prec": {"type": "hypreilu", "lev-fill": 5},
+                                             "lin-solver": {"kdim": 100}})
+                self.assertEqual(tuner.num_benchmarks, 9)
+
+                # a later run starts with the winner
+                tuner = PreconditionerTuner(cache, prec_candidates=_prec_candidates[True])
+                self.assertEqual(tuner.tune("mesh-4", self.benchmark), overrides)
+                self.assertEqual(tuner.num_benchmarks, 0)
+
+                # without a memory budget the densest ILU wins
+                tuner = PreconditionerTuner(cache, prec_candidates=_prec_candidates[True])
+                overrides = tuner.tune("mesh-8", self.benchmark)
+                self.assertEqual(overrides["lin-prec"]["lev-fill"], 10)
+
+        def test_linear_converged(self):
+            class Solver(object):
+                """
+                Stand in for a mach solver with the residual K u - f
+                """
+                K = np.diag([2.0, 3.0, 4.0])
+                f = np.ones(3)
+
+                def calcResidual(self, inputs, residual):
+                    residual[:] = self.K @ inputs["state"] - self.f
+
+                def linearize(self, inputs):
+                    pass
+
+                def jacobianVectorProduct(self, wrt_dot, wrt, res_dot):
+                    res_dot += self.K @ wrt_dot
+
+            class Comm(object):
+                def allreduce(self, a):
+                    return a
+
+            solver = Solver()
+            exact = np.linalg.solve(solver.K, solver.f)
+            options = {"reltol": 1e-8, "abstol": 0.0}
+            self.assertTrue(_linear_converged(solver, {}, exact, options, Comm()))
+            # a finite but inaccurate step is not converged
+            self.assertFalse(_linear_converged(solver, {}, 0.9 * exact, options, Comm()))
+
+        def test_resident_memory(self):
+            memory = _resident_memory()
+            if memory is None:
+                self.skipTest("/proc/self/statm is not available")
+            block = np.ones(1 << 24)
+            self.assertGreater(_resident_memory() - memory, 0.5 * block.nbytes)
+
+        def test_mesh_fingerprint(self):
+            with tempfile.TemporaryDirectory() as tmp:
+                mesh = Path(tmp) / "motor.smb"
+                mesh.write_bytes(b"mesh")
+                self.assertNotEqual(mesh_fingerprint(mesh, 1), mesh_fingerprint(mesh, 4))
+                key = mesh_fingerprint(mesh, 1)
+                mesh.write_bytes(b"mesh2")
+                self.assertNotEqual(mesh_fingerprint(mesh, 1), key)
+
+    unittest.main()
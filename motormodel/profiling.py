@@ -0,0 +1,278 @@
+import atexit
+import csv
+import json
+import re
+import sys
+import time
+from pathlib import Path
+
+# System methods that are timed, under the name used in reports
+_timed_methods = {
+    "_solve_nonlinear": "solve_nonlinear",
+    "_apply_nonlinear": "apply_nonlinear",
+    "_linearize": "linearize",
+    "_solve_linear": "solve_linear",
+    "_apply_linear": "apply_linear",
+}
+
+# per rotor position subsystems are named with the rotation index, for
+# example em_states.solver2, torque.torque2, or functionals2
+_rotation_pattern = re.compile(r"\.(?:solver|torque|flux_linkage|d_q_flux_linkage|functionals)(\d+)(?:[._]|$)")
+
+
+def _rotation(pathname):
+    match = _rotation_pattern.search(pathname)
+    return int(match.group(1)) if match is not None else None
+
+
+class Profiler(object):
+    """
+    Per subsystem wall clock times, call counts, and solver iteration counts
+
+    attach wraps the timed methods of every system in a model; nothing is
+    wrapped (and nothing costs anything) until then. Times are inclusive, so
+    a group's time includes its children. With a communicator, gather combines
+    the records of every rank on rank 0, reporting the mean and max time
+    over the ranks.
+    """
+
+    def __init__(self, comm=None):
+        self.comm = comm
+        self.records = {}
+        self._wrapped = []
+
+    def _record(self, pathname, method):
+        system_records = self.records.setdefault(pathname, {
+            "methods": {},
+            "nonlinear_iterations": 0,
+            "linear_iterations": 0
+        })
+        return system_records, system_records["methods"].setdefault(method, {"calls": 0, "time": 0.0})
+
+    def _wrap(self, system, attr, method):
+        original = getattr(system, attr)
+        profiler = self
+
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                system_records, record = profiler._record(system.pathname, method)
+                record["calls"] += 1
+                record["time"] += elapsed
+                if attr == "_solve_nonlinear" and system.nonlinear_solver is not None:
+                    system_records["nonlinear_iterations"] += system.nonlinear_solver._iter_count
+                elif attr == "_solve_linear" and system.linear_solver is not None:
+                    system_records["linear_iterations"] += system.linear_solver._iter_count
+
+        setattr(system, attr, timed)
+        self._wrapped.append((system, attr))
+
+    def attach(self, model):
+        """
+        Time every system in model, including model itself
+        """
+        for system in model.system_iter(recurse=True, include_self=True):
+            for attr, method in _timed_methods.items():
+                self._wrap(system, attr, method)
+
+    def detach(self):
+        for system, attr in self._wrapped:
+            delattr(system, attr)
+        self._wrapped = []
+
+    def gather(self):
+        """
+        Combine the records of every rank, returning them on rank 0 and None
+        on the other ranks
+        """
+        if self.comm is None or self.comm.size == 1:
+            all_records = [self.records]
+        else:
+            all_records = self.comm.gather(self.records, root=0)
+            if self.comm.rank != 0:
+                return None
+
+        combined = {}
+        for records in all_records:
+            for pathname, system_records in records.items():
+                entry = combined.setdefault(pathname, {
+                    "rotation": _rotation(pathname),
+                    "methods": {},
+                    "nonlinear_iterations": system_records["nonlinear_iterations"],
+                    "linear_iterations": system_records["linear_iterations"]
+                })
+                for method, record in system_records["methods"].items():
+                    times = entry["methods"].setdefault(method, {"calls": record["calls"],
+                                                                 "times": []})
+                    times["times"].append(record["time"])
+
+        for entry in combined.values():
+            for method, record in entry["methods"].items():
+                times = record.pop("times")
+                record["time_mean"] = sum(times) / len(times)
+                record["time_max"] = max(times)
+        return combined
+
+    def rotation_times(self, combined):
+        """
+        Total solve time (max over ranks) of the top level system of each
+        rotor position
+        """
+        rotations = {}
+        for pathname, entry in combined.items():
+            rotation = entry["rotation"]
+            if rotation is None or _rotation(pathname.rsplit(".", 1)[0]) == rotation:
+                continue
+            rotations[rotation] = rotations.get(rotation, 0.0) + \
+                sum(record["time_max"] for record in entry["methods"].values())
+        return dict(sorted(rotations.items()))
+
+    def write_report(self, path):
+        """
+        Write the gathered records as JSON, or as CSV if path ends in .csv
+        """
+        combined = self.gather()
+        if combined is None:
+            return None
+
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if path.suffix == ".csv":
+            with open(path, "w", newline="") as report:
+                writer = csv.writer(report)
+                writer.writerow(["system", "rotation", "method", "calls", "time_mean",
+                                 "time_max", "nonlinear_iterations", "linear_iterations"])
+                for pathname, entry in combined.items():
+                    for method, record in entry["methods"].items():
+                        writer.writerow([pathname, entry["rotation"], method, record["calls"],
+                                         record["time_mean"], record["time_max"],
+                                         entry["nonlinear_iterations"], entry["linear_iterations"]])
+        else:
+            with open(path, "w") as report:
+                json.dump({"systems": combined,
+                           "rotations": self.rotation_times(combined)},
+                          report, indent=2)
+        return combined
+
+    def print_table(self, combined=None, out_stream=sys.stdout, num_rows=25):
+        """
+        Print the systems that took the longest, along with the time spent on
+        each rotor position
+        """
+        if combined is None:
+            combined = self.gather()
+        if combined is None:
+            return
+
+        rows = []
+        for pathname, entry in combined.items():
+            for method, record in entry["methods"].items():
+                rows.append((record["time_max"], pathname or "<model>", method, record["calls"]))
+        rows.sort(reverse=True)
+
+        width = max([len(row[1]) for row in rows[:num_rows]] + [6])
+        print(f"{'system':<{width}}  {'method':<15}  {'calls':>7}  {'time (s)':>10}",
+              file=out_stream)
+        for seconds, pathname, method, calls in rows[:num_rows]:
+            print(f"{pathname:<{width}}  {method:<15}  {calls:>7}  {seconds:>10.4f}",
+                  file=out_stream)
+
+        rotations = self.rotation_times(combined)
+        if rotations:
+            print("", file=out_stream)
+            for rotation, seconds in rotations.items():
+                print(f"rotation {rotation}: {seconds:.4f} s", file=out_stream)
+
+
+def profile_model(model, report_path):
+    """
+    Profile every system in model, writing the report to report_path after
+    each model evaluation and printing a table of the slowest systems when
+    the run ends
+    """
+    profiler = Profiler(comm=model.comm)
+    profiler.attach(model)
+    profiler.last_report = None
+
+    solve_nonlinear = model._solve_nonlinear
+
+    def solve_and_report(*args, **kwargs):
+        solve_nonlinear(*args, **kwargs)
+        profiler.last_report = profiler.write_report(report_path)
+
+    model._solve_nonlinear = solve_and_report
+
+    def print_last_report():
+        if profiler.last_report is not None:
+            profiler.print_table(profiler.last_report)
+
+    atexit.register(print_last_report)
+    return profiler
+
+
+if __name__ == "__main__":
+    import io
+    import tempfile
+    import unittest
+    import openmdao.api as om
+
+    def _problem():
+        prob = om.Problem(reports=False)
+        states = prob.model.add_subsystem("em_states", om.Group())
+        for idx in range(2):
+            solver = states.add_subsystem(f"solver{idx}", om.Group())
+            solver.add_subsystem("state", om.ExecComp("y = 2*x"))
+        prob.model.add_subsystem("thermal", om.ExecComp("t = 3*x"))
+        prob.model.add_design_var("em_states.solver0.state.x")
+        prob.model.add_objective("em_states.solver0.state.y")
+        prob.setup()
+        return prob
+
+    class TestProfiler(unittest.TestCase):
+        def test_profile(self):
+            prob = _problem()
+            profiler = Profiler()
+            profiler.attach(prob.model)
+            prob.run_model()
+            prob.run_model()
+            prob.compute_totals()
+
+            records = profiler.gather()
+            record = records["em_states.solver1.state"]["methods"]["solve_nonlinear"]
+            self.assertEqual(record["calls"], 2)
+            self.assertEqual(records["em_states.solver1.state"]["rotation"], 1)
+            self.assertIn("solve_linear", records["em_states.solver0.state"]["methods"])
+            self.assertEqual(list(profiler.rotation_times(records).keys()), [0, 1])
+
+            with tempfile.TemporaryDirectory() as tmp:
+                profiler.write_report(Path(tmp) / "profile.json")
+                with open(Path(tmp) / "profile.json") as report:
+                    self.assertIn("thermal", json.load(report)["systems"])
+                profiler.write_report(Path(tmp) / "profile.csv")
+                with open(Path(tmp) / "profile.csv") as report:
+                    self.assertEqual(next(csv.reader(report))[0], "system")
+
+            table = io.StringIO()
+            profiler.print_table(out_stream=table)
+            self.assertIn("rotation 1", table.getvalue())
+
+        def test_profile_model(self):
+            prob = _problem()
+            with tempfile.TemporaryDirectory() as tmp:
+                profiler = profile_model(prob.model, Path(tmp) / "profile.json")
+                prob.run_model()
+                self.assertTrue((Path(tmp) / "profile.json").exists())
+                self.assertEqual(profiler.last_report[""]["methods"]["solve_nonlinear"]["calls"], 1)
+
+        def test_detach(self):
+            prob = _problem()
+            profiler = Profiler()
+            profiler.attach(prob.model)
+            profiler.detach()
+            prob.run_model()
+            self.assertEqual(profiler.records, {})
+
+    unittest.main()
@@ -0,0 +1,487 @@
+import time
+
+import numpy as np
+
+from mach import MachState
+
+from .adjoint_recycling import AdjointRecycler
+from .telemetry import solve_tolerance
+
+
+def _allreduce(comm, a):
+    if comm is None:
+        return a
+    return comm.allreduce(a)
+
+
+def _orthonormalize(y, comm=None):
+    """
+    Orthonormalize the columns of a row-distributed matrix using two passes
+    over its Gram matrix, dropping directions that are numerically dependent
+    """
+    for _ in range(2):
+        gram = _allreduce(comm, y.T @ y)
+        eigvals, eigvecs = np.linalg.eigh(gram)
+        keep = eigvals > 1e-12 * max(eigvals[-1], np.finfo(float).tiny)
+        y = y @ (eigvecs[:, keep] / np.sqrt(eigvals[keep]))
+    return y
+
+
+def randomized_svd(snapshots, rank, comm=None, oversample=5, power_iters=1, seed=0):
+    """
+    Truncated SVD of a row-distributed matrix of snapshots (one per column)
+
+    Returns the left singular vectors (distributed like snapshots) and the
+    singular values
+    """
+    num_snapshots = snapshots.shape[1]
+    size = min(rank + oversample, num_snapshots)
+
+    # every rank must draw the same test matrix
+    rng = np.random.default_rng(seed)
+    omega = rng.standard_normal((num_snapshots, size))
+
+    q = _orthonormalize(snapshots @ omega, comm)
+    for _ in range(power_iters):
+        z = _allreduce(comm, snapshots.T @ q)
+        q = _orthonormalize(snapshots @ z, comm)
+
+    b = _allreduce(comm, q.T @ snapshots)
+    u_b, sigma, _ = np.linalg.svd(b, full_matrices=False)
+    rank = min(rank, sigma.size)
+    return q @ u_b[:, :rank], sigma[:rank]
+
+
+class ReducedBasis(object):
+    """
+    Proper orthogonal decomposition basis built from state snapshots
+    """
+
+    def __init__(self,
+                 comm=None,
+                 max_rank=20,
+                 energy_tol=1e-8,
+                 min_snapshots=4,
+                 max_snapshots=50,
+                 rebuild_every=1):
+        self.comm = comm
+        self.max_rank = max_rank
+        self.energy_tol = energy_tol
+        self.min_snapshots = min_snapshots
+        self.max_snapshots = max_snapshots
+        self.rebuild_every = rebuild_every
+
+        self.snapshots = []
+        self.basis = None
+        self.singular_values = None
+        self.jacobian = None
+        self._since_build = 0
+
+    @property
+    def ready(self):
+        return self.basis is not None
+
+    @property
+    def rank(self):
+        return 0 if self.basis is None else self.basis.shape[1]
+
+    def add_snapshot(self, state):
+        """
+        Store a converged state, rebuilding the basis when enough new
+        snapshots have been collected
+        """
+        self.snapshots.append(np.array(state, copy=True))
+        if len(self.snapshots) > self.max_snapshots:
+            self.snapshots.pop(0)
+
+        self._since_build += 1
+        if len(self.snapshots) >= self.min_snapshots \
+                and self._since_build >= self.rebuild_every:
+            self.build()
+
+    def build(self):
+        snapshots = np.column_stack(self.snapshots)
+        rank = min(self.max_rank, snapshots.shape[1])
+        vectors, sigma = randomized_svd(snapshots, rank, comm=self.comm)
+
+        # keep enough modes to capture all but energy_tol of the snapshot energy
+        energy = np.cumsum(sigma**2)
+        if energy[-1] > 0.0:
+            keep = np.searchsorted(energy, (1.0 - self.energy_tol) * energy[-1]) + 1
+            keep = min(keep, sigma.size)
+        else:
+            keep = 1
+        self.basis = vectors[:, :keep]
+        self.singular_values = sigma[:keep]
+        # the cached reduced Jacobian belongs to the old basis
+        self.jacobian = None
+        self._since_build = 0
+
+    def expand(self, coefficients):
+        return self.basis @ coefficients
+
+    def project(self, vector):
+        return _allreduce(self.comm, self.basis.T @ vector)
+
+    def norm(self, vector):
+        return np.sqrt(_allreduce(self.comm, np.dot(vector, vector)))
+
+
+def reduced_jacobian(jacvec, basis):
+    """
+    Galerkin projection of the full Jacobian (applied by jacvec) onto a
+    reduced basis
+    """
+    return np.column_stack([basis.project(jacvec(basis.basis[:, j]))
+                            for j in range(basis.rank)])
+
+
+def reduced_solve(residual, linearize, basis, coefficients,
+                  rel_tol=1e-10, abs_tol=1e-12, max_iter=20, refresh_ratio=0.5):
+    """
+    Newton's method on the Galerkin projection of a nonlinear problem onto a
+    reduced basis
+
+    residual(state) returns the full residual and linearize(state) returns a
+    function that applies the full Jacobian to a vector. The reduced Jacobian
+    is cached on the basis and reused across iterations and solves until a
+    step fails to cut the reduced residual by refresh_ratio, when it is
+    rebuilt at the current state. If no step along a fresh Jacobian's Newton
+    direction lowers the reduced residual, the iteration stops at the current
+    iterate. Returns the reduced coefficients, the state, the full residual at
+    the solution, and the number of iterations.
+    """
+    coefficients = np.array(coefficients, dtype=float, copy=True)
+    state = basis.expand(coefficients)
+    full_res = residual(state)
+    res = basis.project(full_res)
+    res0 = np.linalg.norm(res)
+
+    def newton_step(res_norm):
+        step = np.linalg.solve(basis.jacobian, -res)
+
+        # backtrack on the reduced residual norm
+        alpha = 1.0
+        for _ in range(10):
+            trial = coefficients + alpha * step
+            trial_state = basis.expand(trial)
+            trial_full_res = residual(trial_state)
+            trial_res = basis.project(trial_full_res)
+            if np.linalg.norm(trial_res) < res_norm:
+                return trial, trial_state, trial_full_res, trial_res
+            alpha *= 0.5
+        return None
+
+    iterations = 0
+    for iterations in range(max_iter):
+        res_norm = np.linalg.norm(res)
+        if res_norm <= max(rel_tol * res0, abs_tol):
+            break
+
+        fresh = basis.jacobian is None
+        if fresh:
+            basis.jacobian = reduced_jacobian(linearize(state), basis)
+        step = newton_step(res_norm)
+        if not fresh and (step is None or np.linalg.norm(step[3]) > refresh_ratio * res_norm):
+            # the cached Jacobian is too stale, rebuild it at the current state
+            basis.jacobian = reduced_jacobian(linearize(state), basis)
+            step = newton_step(res_norm)
+        if step is None:
+            # the line search failed, so keep the current iterate
+            break
+
+        coefficients, state, full_res, res = step
+    else:
+        iterations = max_iter
+
+    return coefficients, state, full_res, iterations
+
+
+class MotorState(MachState):
+    """
+    MachState with optional warm starts from the previous rotor position,
+    reduced-order solves in a POD basis built from previous converged states,
+    linear solves recycled across the right-hand sides of all the
+    functionals of the state, and convergence telemetry for each solve
+
+    The reduced solution is accepted only if its full residual meets the
+    same tolerances as a full solve (rom_tol, or the nonlinear solver's
+    reltol if rom_tol is None, relative to the residual of the initial guess,
+    and the nonlinear solver's abstol); otherwise the full nonlinear problem
+    is solved and its state is added to the snapshots.
+    """
+
+    def initialize(self):
+        super().initialize()
+        self.options.declare("reduced_basis", types=ReducedBasis, default=None,
+                             allow_none=True, recordable=False,
+                             desc=" The reduced basis shared between runs")
+        self.options.declare("warm_start", default=None, recordable=False,
+                             desc=" RotorWarmStart that provides the initial guess from the"
+                                  " previous rotor position's state")
+        self.options.declare("rotation_index", default=0,
+                             desc=" Index of this state's rotor position")
+        self.options.declare("rom_tol", default=None, allow_none=True,
+                             desc=" Relative full residual tolerance for accepting a reduced solution,"
+                                  " or None to use the nonlinear solver's reltol")
+        self.options.declare("max_reduced_iter", default=20,
+                             desc=" Maximum number of reduced Newton iterations")
+        self.options.declare("telemetry", default=False,
+                             desc=" Record the residuals, convergence, and time of each solve"
+                                  " in self.telemetry")
+        self.options.declare("adjoint_recycling", default=False,
+                             desc=" Reuse linear solves for right-hand sides in the span of those"
+                                  " already solved since the last linearization")
+
+    def setup(self):
+        super().setup()
+        self.num_reduced_solves = 0
+        self.num_full_solves = 0
+        self.telemetry = {"failed_solves": 0}
+        if self.options["adjoint_recycling"]:
+            self.recyclers = {mode: AdjointRecycler(comm=self.comm if self.comm.size > 1 else None)
+                              for mode in ("fwd", "rev")}
+        else:
+            self.recyclers = None
+
+    def _solver_inputs(self, inputs, state):
+        solver_inputs = dict(zip(inputs.keys(), inputs.values()))
+        solver_inputs["state"] = state
+        return solver_inputs
+
+    def _residual(self, inputs, state):
+        residual = np.zeros_like(state)
+        self.solver.calcResidual(self._solver_inputs(inputs, state), residual)
+        return residual
+
+    def _residual_norm(self, inputs, state):
+        residual = self._residual(inputs, state)
+        norm2 = np.dot(residual, residual)
+        if self.comm.size > 1:
+            norm2 = self.comm.allreduce(norm2)
+        return np.sqrt(norm2)
+
+    def _linearize(self, inputs, state):
+        self.solver.linearize(self._solver_inputs(inputs, state))
+
+        def jacvec(vector):
+            product = np.zeros_like(state)
+            self.solver.jacobianVectorProduct(wrt_dot=vector,
+                                              wrt="state",
+                                              res_dot=product)
+            return product
+        return jacvec
+
+    def _reduced_solve_nonlinear(self, inputs, outputs):
+        """
+        Try a reduced solve, returning whether it was accepted, the residual
+        norm it had to reach, and the number of reduced Newton iterations
+        """
+        basis = self.options["reduced_basis"]
+        nonlin_options = dict(self.solver.getOptions()["nonlin-solver"])
+        if self.options["rom_tol"] is not None:
+            nonlin_options["reltol"] = self.options["rom_tol"]
+        tolerance = solve_tolerance(basis.norm(self._residual(inputs, outputs["state"])),
+                                    nonlin_options)
+
+        coefficients = basis.project(outputs["state"])
+        _, state, full_res, iterations = reduced_solve(lambda u: self._residual(inputs, u),
+                                                       lambda u: self._linearize(inputs, u),
+                                                       basis,
+                                                       coefficients,
+                                                       max_iter=self.options["max_reduced_iter"])
+
+        if basis.norm(full_res) > tolerance:
+            return False, tolerance, iterations
+
+        outputs["state"] = state
+        return True, tolerance, iterations
+
+    def linearize(self, inputs, outputs, partials):
+        super().linearize(inputs, outputs, partials)
+        if self.recyclers is not None:
+            for recycler in self.recyclers.values():
+                recycler.reset()
+
+    def solve_linear(self, d_outputs, d_residuals, mode):
+        if self.recyclers is None:
+            super().solve_linear(d_outputs, d_residuals, mode)
+            return
+
+        # fwd solves J d_outputs = d_residuals, rev solves J^T d_residuals = d_outputs
+        rhs_vec, sol_vec = (d_residuals, d_outputs) if mode == "fwd" \
+            else (d_outputs, d_residuals)
+        rhs = rhs_vec["state"].copy()
+
+        def solve(vector):
+            rhs_vec["state"] = vector
+            super(MotorState, self).solve_linear(d_outputs, d_residuals, mode)
+            return sol_vec["state"].copy()
+
+        solution = self.recyclers[mode].solve(rhs, solve)
+        rhs_vec["state"] = rhs
+        sol_vec["state"] = solution
+
+    def solve_nonlinear(self, inputs, outputs):
+        basis = self.options["reduced_basis"]
+        warm_start = self.options["warm_start"]
+        idx = self.options["rotation_index"]
+
+        start = time.perf_counter()
+        if warm_start is not None:
+            warm_start.guess(idx, outputs["state"],
+                             lambda u: self._residual_norm(inputs, u))
+
+        if self.options["telemetry"]:
+            initial_residual = self._residual_norm(inputs, outputs["state"])
+
+        reduced = rejected = False
+        reduced_iterations = 0
+        if basis is not None and basis.ready:
+            reduced, tolerance, reduced_iterations = self._reduced_solve_nonlinear(inputs, outputs)
+            rejected = not reduced
+        if reduced:
+            self.num_reduced_solves += 1
+        else:
+            super().solve_nonlinear(inputs, outputs)
+            self.num_full_solves += 1
+            if basis is not None:
+                basis.add_snapshot(outputs["state"])
+
+        if warm_start is not None:
+            warm_start.store(idx, outputs["state"])
+
+        if self.options["telemetry"]:
+            residual = self._residual_norm(inputs, outputs["state"])
+            if not reduced:
+                tolerance = solve_tolerance(initial_residual,
+                                            self.solver.getOptions()["nonlin-solver"])
+            converged = residual <= tolerance
+            self.telemetry.update({
+                "initial_residual": initial_residual,
+                "residual": residual,
+                "tolerance": tolerance,
+                "converged": float(converged),
+                "reduced_solve": float(reduced),
+                "rejected_reduced_solve": float(rejected),
+                "reduced_iterations": reduced_iterations,
+                "solve_time": time.perf_counter() - start,
+                "failed_solves": self.telemetry["failed_solves"] + (not converged)
+            })
+
+
+if __name__ == "__main__":
+    import unittest
+
+    class TestReducedOrder(unittest.TestCase):
+        # nonlinear diffusion-like problem: K u + c u^3 = p0 f0 + p1 f1
+        n = 200
+        x = np.linspace(0, 1, n)
+        K = (2 * np.eye(n) - np.eye(n, k=1) - np.eye(n, k=-1)) * (n + 1)**2
+        forcing = [np.sin(np.pi * x), np.exp(-50 * (x - 0.3)**2)]
+
+        def residual(self, u, p):
+            return self.K @ u + 50 * u**3 - sum(pi * fi for pi, fi in zip(p, self.forcing))
+
+        def linearize(self, u):
+            jac = self.K + np.diag(150 * u**2)
+            return lambda v: jac @ v
+
+        def full_solve(self, p):
+            u = np.zeros(self.n)
+            for _ in range(50):
+                r = self.residual(u, p)
+                if np.linalg.norm(r) < 1e-10:
+                    break
+                u -= np.linalg.solve(self.K + np.diag(150 * u**2), r)
+            return u
+
+        def test_randomized_svd(self):
+            rng = np.random.default_rng(0)
+            a = rng.standard_normal((300, 6)) @ rng.standard_normal((6, 30))
+            vectors, sigma = randomized_svd(a, 6)
+            np.testing.assert_allclose(sigma, np.linalg.svd(a, compute_uv=False)[:6],
+                                       rtol=1e-10)
+            # the basis spans the columns of a
+            np.testing.assert_allclose(vectors @ (vectors.T @ a), a, atol=1e-8)
+
+        def test_reduced_solve(self):
+            basis = ReducedBasis(min_snapshots=6)
+            rng = np.random.default_rng(1)
+            for p in rng.uniform(5, 50, (16, 2)):
+                basis.add_snapshot(self.full_solve(p))
+            self.assertTrue(basis.ready)
+            self.assertLess(basis.rank, 17)
+
+            p = np.array([20.0, 35.0])
+            _, state, full_res, _ = reduced_solve(lambda u: self.residual(u, p),
+                                                  self.linearize,
+                                                  basis,
+                                                  np.zeros(basis.rank))
+            exact = self.full_solve(p)
+            np.testing.assert_allclose(state, exact, atol=1e-3 * np.max(np.abs(exact)))
+
+            res0 = np.linalg.norm(self.residual(np.zeros(self.n), p))
+            self.assertLess(np.linalg.norm(full_res), 1e-2 * res0)
+
+        def test_cached_jacobian(self):
+            basis = ReducedBasis(min_snapshots=6)
+            rng = np.random.default_rng(2)
+            for p in rng.uniform(5, 50, (16, 2)):
+                basis.add_snapshot(self.full_solve(p))
+
+            linearizations = []
+
+            def linearize(u):
+                linearizations.append(1)
+                return self.linearize(u)
+
+            for p in [[20.0, 35.0], [21.0, 34.0]]:
+                linearizations.clear()
+                _, state, _, iterations = reduced_solve(lambda u: self.residual(u, p),
+                                                        linearize,
+                                                        basis,
+                                                        np.zeros(basis.rank))
+                exact = self.full_solve(p)
+                np.testing.assert_allclose(state, exact, atol=1e-3 * np.max(np.abs(exact)))
+            # the second solve reuses the first one's reduced Jacobian
+            self.assertLess(len(linearizations), iterations)
+
+            # rebuilding the basis drops the cached Jacobian
+            basis.build()
+            self.assertIsNone(basis.jacobian)
+
+        def test_failed_line_search(self):
+            basis = ReducedBasis(min_snapshots=6)
+            rng = np.random.default_rng(3)
+            for p in rng.uniform(5, 50, (16, 2)):
+                basis.add_snapshot(self.full_solve(p))
+
+            # a Jacobian with the wrong sign makes every Newton step uphill
+            p = np.array([20.0, 35.0])
+            start = np.zeros(basis.rank)
+            coefficients, state, full_res, iterations = reduced_solve(
+                lambda u: self.residual(u, p),
+                lambda u: (lambda v: -self.linearize(u)(v)),
+                basis,
+                start)
+            np.testing.assert_array_equal(coefficients, start)
+            np.testing.assert_array_equal(state, np.zeros(self.n))
+            np.testing.assert_allclose(full_res, self.residual(np.zeros(self.n), p))
+            self.assertEqual(iterations, 0)
+
+        def test_residual_check_rejects_new_physics(self):
+            basis = ReducedBasis(min_snapshots=4)
+            for p in [5.0, 15.0, 30.0, 50.0]:
+                basis.add_snapshot(self.full_solve([p, 0.0]))
+
+            # a load shape the snapshots never saw
+            p = np.array([5.0, 40.0])
+            _, _, full_res, _ = reduced_solve(lambda u: self.residual(u, p),
+                                              self.linearize,
+                                              basis,
+                                              np.zeros(basis.rank))
+            res0 = np.linalg.norm(self.residual(np.zeros(self.n), p))
+            self.assertGreater(np.linalg.norm(full_res), 1e-1 * res0)
+
+    unittest.main()
@@ -0,0 +1,234 @@
+import warnings
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+
+def rotate_coordinates(coords, angle, dim=2):
+    """
+    Rotate interleaved nodal coordinates about the z axis
+    """
+    points = np.asarray(coords, dtype=float).reshape(-1, dim).copy()
+    cos = np.cos(angle)
+    sin = np.sin(angle)
+    x = points[:, 0].copy()
+    y = points[:, 1].copy()
+    points[:, 0] = cos * x - sin * y
+    points[:, 1] = sin * x + cos * y
+    return points.ravel()
+
+
+def rotation_permutation(coords, angle, dim=2, radius=None, tol=1e-8):
+    """
+    Node index map that rotates the nodal field inside radius by angle and
+    leaves the nodes outside it in place
+
+    Returns source such that rotated = field[source], and the radius that was
+    used. Every node inside radius must land on an existing node when rotated
+    (as in a sliding-band mesh). If radius is None, it is the radius of the
+    innermost node that does not, so the rotor and airgap are rotated and the
+    stator, whose slots break the symmetry, is kept.
+    """
+    points = np.asarray(coords, dtype=float).reshape(-1, dim)
+    radii = np.hypot(points[:, 0], points[:, 1])
+    tol = tol * np.max(radii)
+
+    # the rotated field at a node is the field at the node rotated back
+    rotated = rotate_coordinates(points.ravel(), -angle, dim).reshape(-1, dim)
+    distance, nearest = cKDTree(points).query(rotated)
+    matched = distance <= tol
+
+    if radius is None:
+        radius = np.min(radii[~matched]) if not np.all(matched) else np.inf
+    inside = radii < radius - tol
+    if not np.all(matched[inside]):
+        raise ValueError("The mesh inside the rotating radius is not symmetric under "
+                         "rotation by the rotor position shift!")
+
+    source = np.arange(points.shape[0])
+    source[inside] = nearest[inside]
+    return source, radius
+
+
+class RotorWarmStart(object):
+    """
+    Initial guesses for the magnetostatic state at each rotor position
+
+    The multipoint rotor positions are integer shifts of the magnet attribute
+    pattern, so the state at one position is close to the previous position's
+    converged state rotated by the shift. The guess for a position is the
+    candidate with the smallest residual out of its own last state and the
+    previous position's state rotated in either direction; once a rotated
+    guess wins, its direction is kept.
+
+    Only the nodes inside radius (by default the rotor and the airgap, see
+    rotation_permutation) are rotated, by a node index map computed once per
+    shift. The stator keeps the previous position's values. On a mesh that is
+    not symmetric under the shift (no sliding band), fewer than min_fraction of
+    the nodes move, so the rotated guess would not cover the magnets; the warm
+    start then warns and is disabled.
+    """
+
+    def __init__(self, coords, rotations, pitch, comm=None, dim=2, radius=None,
+                 min_fraction=0.1):
+        self.rotations = list(rotations)
+        self.pitch = pitch
+        self.comm = comm
+        self.dim = dim
+        self.radius = radius
+        self.min_fraction = min_fraction
+        self.enabled = True
+
+        coords = np.asarray(coords, dtype=float)
+        if comm is not None:
+            self.sizes = np.array(comm.allgather(coords.size // dim))
+            self.coords = np.concatenate(comm.allgather(coords))
+            self.offset = np.sum(self.sizes[:comm.rank])
+            self.local_size = self.sizes[comm.rank]
+        else:
+            self.coords = coords
+            self.offset = 0
+            self.local_size = coords.size // dim
+
+        self.states = {}
+        self.direction = None
+        self._permutations = {}
+        self.num_rotated_guesses = 0
+
+    def _permutation(self, angle):
+        key = round(angle / self.pitch)
+        if key not in self._permutations:
+            # every rank holds all the coordinates, so every rank builds the same map
+            source, self.radius = rotation_permutation(self.coords, key * self.pitch,
+                                                       dim=self.dim,
+                                                       radius=self.radius)
+            num_moved = np.count_nonzero(source != np.arange(source.size))
+            if num_moved < self.min_fraction * source.size:
+                warnings.warn(f"Only {num_moved} of {source.size} mesh nodes are symmetric "
+                              f"under the rotor position shift (radius {self.radius:g}), "
+                              "so the rotor is not covered; disabling rotor warm starts")
+                self.enabled = False
+            self._permutations[key] = source[self.offset:self.offset + self.local_size]
+        return self._permutations[key]
+
+    def rotate(self, state, angle):
+        """
+        Rotate this rank's part of a nodal state by angle
+        """
+        if self.comm is not None:
+            state = np.concatenate(self.comm.allgather(state))
+        return state[self._permutation(angle)]
+
+    def guess(self, idx, state, residual_norm):
+        """
+        Overwrite state with the best available initial guess for rotor
+        position idx, using residual_norm(state) to rank the candidates
+        """
+        if not self.enabled or idx == 0 or (idx - 1) not in self.states:
+            return
+
+        if state.size != self.local_size:
+            raise ValueError("Rotor position warm starts require a nodal state "
+                             "with one degree of freedom per mesh node!")
+
+        angle = (self.rotations[idx] - self.rotations[idx - 1]) * self.pitch
+        self._permutation(angle)
+        if not self.enabled:
+            return
+
+        directions = [self.direction] if self.direction is not None else [1, -1]
+        candidates = [(direction, self.rotate(self.states[idx - 1], direction * angle))
+                      for direction in directions]
+        if idx in self.states:
+            candidates.append((None, state.copy()))
+
+        norms = [residual_norm(candidate) for _, candidate in candidates]
+        direction, best = candidates[int(np.argmin(norms))]
+        if direction is not None:
+            self.direction = direction
+            self.num_rotated_guesses += 1
+        state[:] = best
+
+    def store(self, idx, state):
+        self.states[idx] = np.array(state, copy=True)
+
+
+if __name__ == "__main__":
+    import unittest
+
+    class TestRotorWarmStart(unittest.TestCase):
+        # polar grid that is symmetric under rotation by the pitch
+        num_theta = 48
+        pitch = 2 * np.pi / num_theta
+        r, theta = np.meshgrid(np.linspace(0.5, 1.0, 6),
+                               np.arange(num_theta) * pitch)
+        coords = np.column_stack([(r * np.cos(theta)).ravel(),
+                                  (r * np.sin(theta)).ravel()]).ravel()
+
+        def field(self, shift):
+            points = self.coords.reshape(-1, 2)
+            phi = np.arctan2(points[:, 1], points[:, 0])
+            return np.hypot(points[:, 0], points[:, 1]) * np.cos(4 * (phi - shift))
+
+        def test_rotation_is_permutation(self):
+            source, radius = rotation_permutation(self.coords, 3 * self.pitch)
+            self.assertEqual(radius, np.inf)
+            np.testing.assert_allclose(self.field(0.0)[source],
+                                       self.field(3 * self.pitch), atol=1e-10)
+            self.assertEqual(np.unique(source).size, source.size)
+
+        def test_stator_is_kept(self):
+            # a stator ring whose 27 nodes do not line up with the 48 fold rotor
+            stator_theta = np.arange(27) * 2 * np.pi / 27
+            stator = np.column_stack([1.5 * np.cos(stator_theta),
+                                      1.5 * np.sin(stator_theta)]).ravel()
+            coords = np.concatenate([self.coords, stator])
+            source, radius = rotation_permutation(coords, 3 * self.pitch)
+            self.assertAlmostEqual(radius, 1.5)
+
+            num_rotor = self.coords.size // 2
+            np.testing.assert_array_equal(source[num_rotor:], np.arange(num_rotor, coords.size // 2))
+            field = np.concatenate([self.field(0.0), np.ones(27)])
+            np.testing.assert_allclose(field[source][:num_rotor],
+                                       self.field(3 * self.pitch), atol=1e-10)
+
+            # an asymmetric mesh inside the given radius is an error
+            with self.assertRaises(ValueError):
+                rotation_permutation(coords, 3 * self.pitch, radius=2.0)
+
+        def test_guess_picks_direction(self):
+            rotations = [0, 2, 4]
+            warm_start = RotorWarmStart(self.coords, rotations, self.pitch)
+            warm_start.store(0, self.field(0.0))
+
+            # the "true" state at each position is the field rotated by the shift
+            for idx in [1, 2]:
+                exact = self.field(-rotations[idx] * self.pitch)
+                state = np.zeros_like(exact)
+                warm_start.guess(idx, state, lambda u: np.linalg.norm(u - exact))
+                np.testing.assert_allclose(state, exact, atol=1e-10)
+                warm_start.store(idx, exact)
+
+            self.assertEqual(warm_start.direction, -1)
+            self.assertEqual(warm_start.num_rotated_guesses, 2)
+
+        def test_asymmetric_rotor_disables(self):
+            # unstructured rotor: only the node at the center maps onto itself
+            rng = np.random.default_rng(0)
+            r = np.sqrt(rng.random(200))
+            theta = 2 * np.pi * rng.random(200)
+            coords = np.concatenate([[0.0, 0.0],
+                                     np.column_stack([r * np.cos(theta),
+                                                      r * np.sin(theta)]).ravel()])
+            warm_start = RotorWarmStart(coords, [0, 1], self.pitch)
+            previous = rng.random(201)
+            warm_start.store(0, previous)
+
+            state = np.ones(201)
+            with self.assertWarns(UserWarning):
+                warm_start.guess(1, state, lambda u: np.linalg.norm(u - previous))
+            np.testing.assert_array_equal(state, np.ones(201))
+            self.assertFalse(warm_start.enabled)
+            self.assertEqual(warm_start.num_rotated_guesses, 0)
+
+    unittest.main()
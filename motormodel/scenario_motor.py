@@ -2,6 +2,9 @@ import openmdao.api as om
 from mphys.scenario import Scenario
 from mphys.coupling_group import CouplingGroup
 
+from .thermal_response import ThermalResponseCache
+from .field_transfer import FieldTransfer
+
 
 class ScenarioMotor(Scenario):
     def initialize(self):
@@ -14,6 +17,8 @@ class ScenarioMotor(Scenario):
                              desc="The Mphys builder for the EM motor solver")
         self.options.declare("thermal_builder", default=None, recordable=False,
                              desc="The Mphys builder for the thermal solver")
+        self.options.declare("thermal_transfer", default=None, recordable=False,
+                             desc="Transfer between the thermal and EM meshes when they differ")
         # self.options.declare("in_MultipointParallel", default=False, types=bool,
         #                      desc="Set to `True` if adding this scenario inside a MultipointParallel Group.")
         # self.options.declare("geometry_builder", default=None, recordable=False,
@@ -22,6 +27,7 @@ class ScenarioMotor(Scenario):
     def setup(self):
         em_motor_builder = self.options["em_motor_builder"]
         thermal_builder = self.options["thermal_builder"]
+        thermal_transfer = self.options["thermal_transfer"]
         # geometry_builder = self.options["geometry_builder"]
 
         # if self.options["in_MultipointParallel"]:
@@ -42,12 +48,47 @@ class ScenarioMotor(Scenario):
                 "thermal", thermal_builder, self.name)
 
         coupling_group = CouplingGroup()
+        if thermal_transfer is not None and em_motor_builder.coupled == "thermal":
+            # interpolate the thermal state onto the EM mesh
+            coupling_group.add_subsystem("temperature_transfer",
+                                         FieldTransfer(transfer=thermal_transfer),
+                                         promotes_inputs=[("field_in", "conduct_state")],
+                                         promotes_outputs=[("field_out", "temperature")])
+
         em = em_motor_builder.get_coupling_group_subsystem(self.name)
         coupling_group.mphys_add_subsystem("em", em)
 
-        if thermal_builder is not None:
+        if thermal_transfer is not None:
+            # conservatively restrict the EM heat sources onto the thermal mesh
+            coupling_group.add_subsystem("load_transfer",
+                                         FieldTransfer(transfer=thermal_transfer,
+                                                       reverse=True),
+                                         promotes_inputs=[("field_in", "thermal_load")],
+                                         promotes_outputs=[("field_out", "thermal_load:thermal_mesh")])
+
+        if thermal_builder is not None and em_motor_builder.coupled == "thermal:superposition":
+            # superpose cached unit responses instead of solving for the thermal state
+            regions = em_motor_builder.heat_source_regions
+            coupling_group.add_subsystem("thermal",
+                                         ThermalResponseCache(solver=thermal_builder.solver,
+                                                              regions=regions),
+                                         promotes_inputs=[("mesh_coords", "x_conduct_vol"),
+                                                          "fluid_temp",
+                                                          "fluid_temp:in-slot-cooling",
+                                                          "h",
+                                                          "fill_factor",
+                                                          "h:in-slot-cooling",
+                                                          "h:airgap-convection",
+                                                          *[f"thermal_load:{region}" for region in regions]],
+                                         promotes_outputs=[("state", "conduct_state")])
+        elif thermal_builder is not None:
             thermal = thermal_builder.get_coupling_group_subsystem(self.name)
-            coupling_group.mphys_add_subsystem("thermal", thermal)
+            if thermal_transfer is not None:
+                coupling_group.add_subsystem("thermal", thermal,
+                                             promotes_inputs=[("thermal_load", "thermal_load:thermal_mesh"), "*"],
+                                             promotes_outputs=["*"])
+            else:
+                coupling_group.mphys_add_subsystem("thermal", thermal)
             # coupling_group.promotes("thermal", ("conduct_state", "temperature"))
 
         if em_motor_builder.coupled == "thermal":
@@ -142,7 +183,7 @@ class ScenarioMotor(Scenario):
                            "strands_in_hand",
                            "fill_factor"]
 
-        if em_motor_builder.coupled == "thermal":
+        if em_motor_builder.coupled == "thermal" and self.options["thermal_transfer"] is None:
             self.connect("conduct_state", "temperature")
         # elif em_motor_builder.coupled == "thermal:feedforward":
             # self.promotes("em_pre", any=[("temperature", "reference_temperature")])
@@ -153,7 +194,7 @@ class ScenarioMotor(Scenario):
             #                 f"solver{idx}.temperature")
 
         # self.connect("em_pre.slot_area", "slot_area")
-        if em_motor_builder.coupled == "thermal" or em_motor_builder.coupled == "thermal:feedforward":
+        if em_motor_builder.coupled in ("thermal", "thermal:feedforward", "thermal:superposition"):
             em_pre_promotes.append("wire_length")
 
         # promote all unconnected inputs from em_pre
@@ -162,8 +203,22 @@ class ScenarioMotor(Scenario):
         # self.promotes("coupling", any=[('conduct_state', 'temperature')])
         # coupling_group.promotes('thermal', outputs=[('conduct_state', 'temperature')])
 
+        em_post_promotes = []
+        if em_motor_builder.analytic_geometry:
+            em_post_promotes += ["stator_or",
+                                 "rotor_or",
+                                 "rotor_ir",
+                                 "magnet_thickness",
+                                 "tooth_tip_angle",
+                                 "slot_radius_stator",
+                                 "slot_radius_tooth",
+                                 "shoe_spacing",
+                                 "coolant_thickness",
+                                 "winding_temperature"]
+
         # promote all unconnected I/O from em_post
         self.promotes("em_post", any=[
+            *em_post_promotes,
             "average_torque",
             #   "energy",
             "core_loss",
@@ -0,0 +1,290 @@
+import numpy as np
+import openmdao.api as om
+
+# Exponents of the cross-section scale factor s and the stack length ratio for
+# Motor outputs that are exactly homogeneous under similarity scaling. The
+# DC loss and phase resistance include the end turns and are not.
+motor_output_exponents = {
+    "average_torque": (2, 1),
+    "phase_back_emf": (1, 1),
+    "L": (0, 1),
+    "core_loss": (2, 1),
+    "mass": (2, 1),
+}
+
+# Cross-section lengths of the Motor geometry that are independent inputs
+# (stator_od and friends are computed from the radii by geom_convert)
+motor_length_inputs = [
+    "stator_or",
+    "stator_ir",
+    "rotor_or",
+    "rotor_ir",
+    "slot_depth",
+    "tooth_width",
+    "magnet_thickness",
+    "tooth_tip_thickness",
+    "slot_radius",
+    "shoe_spacing",
+    "strand_radius",
+]
+
+
+def _independent(model, name):
+    """
+    Whether name is set by an IndepVarComp (or is an unconnected input)
+    rather than computed by the model
+    """
+    source = model.get_source(name)
+    if source.startswith("_auto_ivc."):
+        return True
+    owner = model._get_subsystem(source.rsplit(".", 1)[0])
+    return isinstance(owner, om.IndepVarComp)
+
+
+class SimilarityScaledModel(om.ExplicitComponent):
+    """
+    Component that maps the outputs of a cached solved design to designs whose
+    cross-section is a uniform scaling of it
+
+    For a 2D magnetostatic model, scaling every cross-section length by s and
+    the current density by 1/s leaves the flux density unchanged, so the
+    nonlinear iron is handled exactly and every output listed in
+    output_exponents scales as s**a * (stack_length / stack_length_0)**b. The
+    phase current scales with s since the number of turns is fixed. Designs
+    that are not similar to any cached design are solved with the full model
+    and cached.
+
+    Every scaled and fixed input must be an independent input of the model;
+    values set on computed variables would be overwritten when the model runs.
+    Motor computes its current density from rms_current, so the current
+    density only needs to be listed for models where it is an input.
+    """
+
+    def initialize(self):
+        self.options.declare("model", types=om.Group, recordable=False,
+                             desc=" The full model, for example Motor")
+        self.options.declare("length_inputs", types=list,
+                             default=motor_length_inputs,
+                             desc=" Cross-section lengths that scale with s")
+        self.options.declare("stack_input", default="stack_length",
+                             desc=" Axial length that the outputs are proportional to")
+        self.options.declare("current_density_input", default=None, allow_none=True,
+                             desc=" Current density input that scales with 1/s, or None if the model"
+                                  " computes it")
+        self.options.declare("current_input", default="rms_current",
+                             desc=" Phase current that scales with s")
+        self.options.declare("fixed_inputs", types=list, default=["rpm"],
+                             desc=" Inputs that must be unchanged for designs to be similar")
+        self.options.declare("output_exponents", types=dict,
+                             default=motor_output_exponents,
+                             desc=" Exponents of s and the stack length ratio for each output")
+        self.options.declare("rtol", default=1e-10,
+                             desc=" Relative tolerance used to detect similar designs")
+
+    def setup(self):
+        self.problem = om.Problem(model=self.options["model"],
+                                  comm=self.comm,
+                                  reports=False)
+        self.problem.setup()
+        self.problem.final_setup()
+
+        self._exponents = self._input_exponents()
+        self._inputs = list(self._exponents.keys()) + self.options["fixed_inputs"]
+        for name in self._inputs:
+            if not _independent(self.problem.model, name):
+                raise ValueError(f"{self.pathname}: {name} is computed by the model, so it "
+                                 "cannot be set as a similarity input!")
+        self._outputs = list(self.options["output_exponents"].keys())
+
+        for name in self._inputs:
+            self.add_input(name, val=self.problem.get_val(name))
+        for name in self._outputs:
+            self.add_output(name, val=self.problem.get_val(name))
+
+        self.designs = []
+        self.num_full_solves = 0
+        self.num_scaled = 0
+
+    def setup_partials(self):
+        self.declare_partials(self._outputs, self._inputs)
+
+    def _input_exponents(self):
+        """
+        Exponent of s (and of the stack ratio, for the stack input) for each
+        scaled input
+        """
+        exponents = {name: (1, 0) for name in self.options["length_inputs"]}
+        exponents[self.options["stack_input"]] = (0, 1)
+        if self.options["current_density_input"] is not None:
+            exponents[self.options["current_density_input"]] = (-1, 0)
+        exponents[self.options["current_input"]] = (1, 0)
+        return exponents
+
+    def _values(self, inputs):
+        return {name: np.real(inputs[name]).ravel().copy() for name in self._inputs}
+
+    def _factors(self, values, design):
+        """
+        Return (s, stack ratio) if values are a similarity scaling of design,
+        otherwise None
+        """
+        rtol = self.options["rtol"]
+        baseline = design["inputs"]
+        for name in self.options["fixed_inputs"]:
+            if not np.allclose(values[name], baseline[name], rtol=rtol, atol=0.0):
+                return None
+
+        stack_input = self.options["stack_input"]
+        stack_ratio = values[stack_input][0] / baseline[stack_input][0]
+        s = values[self.options["length_inputs"][0]][0] / \
+            baseline[self.options["length_inputs"][0]][0]
+        if not s > 0.0 or not stack_ratio > 0.0:
+            return None
+
+        for name, (a, b) in self._exponents.items():
+            expected = baseline[name] * s**a * stack_ratio**b
+            if not np.allclose(values[name], expected, rtol=rtol, atol=0.0):
+                return None
+        return s, stack_ratio
+
+    def _solve(self, values):
+        problem = self.problem
+        for name in self._inputs:
+            problem.set_val(name, values[name])
+        problem.run_model()
+        self.num_full_solves += 1
+
+        outputs = {name: problem.get_val(name).ravel().copy()
+                   for name in self._outputs}
+        totals = problem.compute_totals(of=self._outputs, wrt=self._inputs)
+        jac = {(of, wrt): np.atleast_2d(totals[of, wrt]).copy()
+               for of in self._outputs for wrt in self._inputs}
+        design = {"inputs": values, "outputs": outputs, "jac": jac}
+        self.designs.append(design)
+        return design
+
+    def _design(self, values):
+        """
+        Find a cached design similar to values, solving the full model if there
+        is none
+        """
+        for design in self.designs:
+            factors = self._factors(values, design)
+            if factors is not None:
+                return design, factors, False
+        return self._solve(values), (1.0, 1.0), True
+
+    def compute(self, inputs, outputs):
+        design, (s, stack_ratio), solved = self._design(self._values(inputs))
+        if not solved:
+            self.num_scaled += 1
+
+        for name, (a, b) in self.options["output_exponents"].items():
+            outputs[name] = design["outputs"][name].reshape(outputs[name].shape) \
+                * s**a * stack_ratio**b
+
+    def compute_partials(self, inputs, partials):
+        # f(T x) = s**a t**b f(x), so df/dx at T x is s**a t**b df/dx(x) / dT
+        design, (s, stack_ratio), _ = self._design(self._values(inputs))
+        for of, (a, b) in self.options["output_exponents"].items():
+            scale = s**a * stack_ratio**b
+            for wrt in self._inputs:
+                in_a, in_b = self._exponents.get(wrt, (0, 0))
+                partials[of, wrt] = design["jac"][of, wrt] * scale \
+                    / (s**in_a * stack_ratio**in_b)
+
+
+if __name__ == "__main__":
+    import unittest
+    from openmdao.utils.assert_utils import assert_near_equal
+
+    def _model():
+        # a saturating "motor" that is homogeneous under similarity scaling,
+        # which like Motor computes its diameter and current density
+        model = om.Group()
+        model.add_subsystem("convert",
+                            om.ExecComp(["d = 2 * r",
+                                         "current_density = 1e7 * (rms_current / 20) * (0.05 / r)**2"],
+                                        r={"val": 0.05},
+                                        rms_current={"val": 20.0}),
+                            promotes=["*"])
+        model.add_subsystem("motor",
+                            om.ExecComp(["average_torque = r**2 * stack_length * tanh(1e-6 * current_density * r) * cos(0.1*rpm/1000)",
+                                         "L = stack_length * w / d * (1 + 0.1 * tanh(rms_current / (r * 1e3)))"],
+                                        r={"val": 0.05},
+                                        d={"val": 0.1},
+                                        w={"val": 0.01},
+                                        stack_length={"val": 0.1},
+                                        current_density={"val": 1e7},
+                                        rms_current={"val": 20.0},
+                                        rpm={"val": 3000.0}),
+                            promotes=["*"])
+        return model
+
+    def _problem(length_inputs=("r", "w")):
+        prob = om.Problem(reports=False)
+        prob.model.add_subsystem("scaled",
+                                 SimilarityScaledModel(model=_model(),
+                                                       length_inputs=list(length_inputs),
+                                                       output_exponents={"average_torque": (2, 1),
+                                                                         "L": (0, 1)}),
+                                 promotes=["*"])
+        prob.setup()
+        return prob
+
+    def _full(values):
+        prob = om.Problem(model=_model(), reports=False)
+        prob.setup()
+        for name, val in values.items():
+            prob[name] = val
+        prob.run_model()
+        return prob
+
+    class TestSimilarityScaledModel(unittest.TestCase):
+        def test_scaled_design(self):
+            prob = _problem()
+            prob.run_model()
+
+            s = 1.7
+            values = {"r": 0.05 * s, "w": 0.01 * s, "stack_length": 0.25,
+                      "rms_current": 20.0 * s, "rpm": 3000.0}
+            for name, val in values.items():
+                prob[name] = val
+            prob.run_model()
+
+            component = prob.model.scaled
+            self.assertEqual(component.num_full_solves, 1)
+            self.assertEqual(component.num_scaled, 1)
+
+            full = _full(values)
+            assert_near_equal(prob["average_torque"], full["average_torque"], tolerance=1e-12)
+            assert_near_equal(prob["L"], full["L"], tolerance=1e-12)
+
+            data = prob.check_partials(method="fd", form="central", step=1e-7,
+                                       out_stream=None)
+            # finite differences leave the similar family, so compare against the full model
+            for (of, wrt), derivs in data["scaled"].items():
+                full_totals = full.compute_totals(of=[of], wrt=[wrt])
+                assert_near_equal(derivs["J_fwd"], full_totals[of, wrt], tolerance=1e-8)
+
+        def test_dissimilar_design(self):
+            prob = _problem()
+            prob.run_model()
+
+            # changing a single length is not a similarity scaling
+            prob["w"] = 0.02
+            prob.run_model()
+            self.assertEqual(prob.model.scaled.num_full_solves, 2)
+
+            # nor is scaling the geometry at fixed current
+            prob["r"] = 0.1
+            prob["w"] = 0.04
+            prob.run_model()
+            self.assertEqual(prob.model.scaled.num_full_solves, 3)
+
+        def test_computed_inputs(self):
+            # the diameter is computed from r, so setting it would be overwritten
+            with self.assertRaises(ValueError):
+                _problem(length_inputs=("d", "w"))
+
+    unittest.main()
@@ -0,0 +1,338 @@
+import re
+import struct
+from pathlib import Path
+
+# Entity types in the order they are counted in a PUMI .smb header
+_smb_types = ["vertex", "edge", "triangle", "quad", "hex", "prism", "pyramid", "tet"]
+
+# Magic number and newest format version of PUMI .smb files
+_smb_magic = 0
+_smb_version = 6
+
+# Nonzeros per matrix row for a degree 1 discretization
+_nnz_per_row = {2: 7, 3: 15}
+
+# Preconditioner memory relative to the assembled matrix
+_prec_complexity = {
+    "hypreboomeramg": 2.0,
+    "hypreams": 3.0,
+    "hypreilu": 3.0,
+    "hypregsmoother": 0.0,
+}
+
+# Rough mesh storage (coordinates, adjacencies, tags) per mesh entity
+_bytes_per_entity = 100
+
+# Functionals evaluated on every rotor position's state besides the flux
+# linkages (torque and flux magnitude), and those evaluated only on the first
+# rotor position's state (losses, mass, airgap flux)
+_functionals_per_rotation = 2
+_first_rotation_functionals = 6
+
+
+def _read_unsigneds(data, offset, count):
+    return list(struct.unpack_from(f">{count}I", data, offset))
+
+
+def read_smb_header(mesh_file):
+    """
+    Read the dimension and the number of entities of each type from the
+    header of a PUMI .smb mesh file without loading the mesh
+
+    Only the fixed size header is read, so the counts are an estimate for
+    sizing: the remote copy (peer) data of a partitioned mesh is not read.
+    """
+    with open(mesh_file, "rb") as smb:
+        data = smb.read(4 * (4 + len(_smb_types)))
+
+    # magic, version, dimension, number of parts, then the entity counts
+    if len(data) < 4 * (4 + len(_smb_types)):
+        raise ValueError(f"{mesh_file} is too short to be a .smb mesh!")
+    magic, version, dim, num_parts = _read_unsigneds(data, 0, 4)
+    if magic != _smb_magic or version > _smb_version or dim not in (2, 3):
+        raise ValueError(f"{mesh_file} does not have a valid .smb header!")
+    counts = _read_unsigneds(data, 16, len(_smb_types))
+    return {"version": version,
+            "dim": dim,
+            "num_parts": num_parts,
+            "counts": dict(zip(_smb_types, counts))}
+
+
+def mesh_entity_counts(mesh_file):
+    """
+    Estimated entity counts of a mesh, summed over its part files
+    (<stem><rank>.smb) if it has been partitioned
+
+    Entities on part boundaries are counted once per part, since the peer
+    data that links their copies is not read.
+    """
+    mesh_file = Path(mesh_file)
+    if mesh_file.exists():
+        parts = [mesh_file]
+    else:
+        pattern = re.compile(re.escape(mesh_file.stem) + r"\d+" + re.escape(mesh_file.suffix))
+        parts = sorted(part for part in mesh_file.parent.glob(f"{mesh_file.stem}*{mesh_file.suffix}")
+                       if pattern.fullmatch(part.name))
+        if not parts:
+            raise FileNotFoundError(f"Could not find mesh {mesh_file} or any of its parts!")
+
+    headers = [read_smb_header(part) for part in parts]
+    counts = {entity: sum(header["counts"][entity] for header in headers)
+              for entity in _smb_types}
+    return headers[0]["dim"], counts
+
+
+def num_dofs(counts, dim, basis="h1", degree=1):
+    """
+    Number of degrees of freedom of an H1 or Nedelec finite element space
+    """
+    counts = {entity: counts.get(entity, 0) for entity in _smb_types}
+    p = degree
+    if basis.lower() == "h1":
+        dofs = counts["vertex"] + (p - 1) * counts["edge"]
+        dofs += (p - 1) * (p - 2) // 2 * counts["triangle"] + (p - 1)**2 * counts["quad"]
+        if dim == 3:
+            dofs += (p - 1) * (p - 2) * (p - 3) // 6 * counts["tet"]
+        return dofs
+    if basis.lower() == "nedelec":
+        dofs = p * counts["edge"] + p * (p - 1) * counts["triangle"]
+        if dim == 3:
+            dofs += p * (p - 1) * (p - 2) // 2 * counts["tet"]
+        return dofs
+    raise ValueError(f"Unknown basis type {basis}!")
+
+
+def _krylov_vectors(lin_solver):
+    solver_type = lin_solver.get("type", "gmres").lower()
+    kdim = lin_solver.get("kdim", 100)
+    if solver_type == "gmres":
+        return kdim + 2
+    if solver_type == "fgmres":
+        return 2 * kdim + 2
+    if solver_type == "minres":
+        return 6
+    return 4
+
+
+def _solver_bytes(options, dim, counts, dofs):
+    """
+    Memory of one mach solver: its copy of the mesh, the assembled Jacobian,
+    the preconditioner, and the Newton and Krylov vectors
+    """
+    degree = options.get("space-dis", {}).get("degree", 1)
+    nnz = _nnz_per_row[dim] * degree**dim * dofs
+    matrix = 12 * nnz + 4 * dofs
+    prec_type = options.get("lin-prec", {}).get("type", "hypreboomeramg")
+    prec = _prec_complexity.get(prec_type, 2.0) * matrix
+    mesh = _bytes_per_entity * sum(counts.values())
+    krylov = 8 * dofs * _krylov_vectors(options.get("lin-solver", {}))
+    newton = 8 * dofs * 3
+    return {"mesh": mesh, "matrix": matrix, "preconditioner": prec,
+            "krylov": krylov, "newton": newton}
+
+
+def _input_copies(em_options, num_rotations, shared_functionals):
+    """
+    Number of em_state and x_em_vol input copies held by the components that
+    depend on them
+    """
+    # every functional holds its own copy of the state and mesh coordinates
+    num_flux_linkages = sum(len(sources) for sources in em_options.get("current", {}).values())
+    if shared_functionals:
+        # the flux magnitude is still evaluated by its own functional
+        per_rotation = 3
+    else:
+        per_rotation = 1 + _functionals_per_rotation + num_flux_linkages
+    state_inputs = num_rotations * per_rotation + _first_rotation_functionals
+    return state_inputs, state_inputs + num_rotations
+
+
+def estimate_motor_memory(em_options, thermal_options=None, coupled=None, shared_functionals=False,
+                          comm_size=1):
+    """
+    Estimate the sizes and memory of a Motor problem from the solver options
+    and mesh headers, without building any solvers
+
+    Counts one EM solver per rotor position in em_options["multipoint"], one
+    thermal solver if coupled to the finite element thermal model, and the
+    OpenMDAO vectors for x_em_vol and each em_state, including the input copy
+    held by every component that depends on them. With shared_functionals,
+    each rotor position's torque and flux linkages share one copy.
+
+    If a mesh header cannot be read, only the solver and input counts are
+    estimated from the options, and the DOFs and memory are None.
+    """
+    num_rotations = len(em_options.get("multipoint", [{}]))
+    state_inputs, mesh_inputs = _input_copies(em_options, num_rotations, shared_functionals)
+    thermal = coupled in ("thermal", "thermal:feedforward", "thermal:superposition") \
+        and thermal_options is not None
+
+    report = {
+        "dim": None,
+        "num_rotations": num_rotations,
+        "num_em_solvers": num_rotations,
+        "num_thermal_solvers": 1 if thermal else 0,
+        "mesh_entities": None,
+        "em_dofs": None,
+        "thermal_dofs": None,
+        "em_state_inputs": state_inputs,
+        "x_em_vol_inputs": mesh_inputs,
+        "memory": None,
+        "peak_per_rank": None,
+        "comm_size": comm_size,
+        "mesh_error": None,
+    }
+
+    try:
+        dim, counts = mesh_entity_counts(em_options["mesh"]["file"])
+        if thermal:
+            thermal_dim, thermal_counts = mesh_entity_counts(thermal_options["mesh"]["file"])
+    except (OSError, ValueError) as err:
+        report["mesh_error"] = str(err)
+        return report
+
+    space = em_options.get("space-dis", {})
+    em_dofs = num_dofs(counts, dim,
+                       basis=space.get("basis-type", "h1"),
+                       degree=space.get("degree", 1))
+    report["dim"] = dim
+    report["mesh_entities"] = counts
+    report["em_dofs"] = em_dofs
+    report["thermal_dofs"] = 0
+
+    solver = _solver_bytes(em_options, dim, counts, em_dofs)
+    em_bytes = {key: num_rotations * value for key, value in solver.items()}
+
+    coords_size = dim * counts["vertex"]
+    # outputs and residuals, nonlinear and linear
+    vectors = 4 * 8 * (num_rotations * em_dofs + coords_size)
+    # nonlinear and linear inputs
+    vectors += 2 * 8 * (state_inputs * em_dofs + mesh_inputs * coords_size)
+
+    thermal_bytes = {}
+    if thermal:
+        thermal_space = thermal_options.get("space-dis", {})
+        thermal_dofs = num_dofs(thermal_counts, thermal_dim,
+                                basis=thermal_space.get("basis-type", "h1"),
+                                degree=thermal_space.get("degree", 1))
+        report["thermal_dofs"] = thermal_dofs
+        thermal_bytes = _solver_bytes(thermal_options, thermal_dim, thermal_counts, thermal_dofs)
+        vectors += 6 * 8 * (thermal_dofs + thermal_dim * thermal_counts["vertex"])
+
+    memory = {
+        "vectors": vectors,
+        "mesh": em_bytes["mesh"] + thermal_bytes.get("mesh", 0),
+        "matrices": em_bytes["matrix"] + thermal_bytes.get("matrix", 0),
+        "preconditioners": em_bytes["preconditioner"] + thermal_bytes.get("preconditioner", 0),
+        "krylov": em_bytes["krylov"] + thermal_bytes.get("krylov", 0),
+        "newton": em_bytes["newton"] + thermal_bytes.get("newton", 0),
+    }
+    memory["total"] = sum(memory.values())
+    report["memory"] = memory
+    # everything is partitioned over the ranks
+    report["peak_per_rank"] = memory["total"] / comm_size
+    return report
+
+
+def format_memory_report(report):
+    def size(num_bytes):
+        if num_bytes is None:
+            return "unknown"
+        for unit in ["B", "KB", "MB", "GB"]:
+            if num_bytes < 1024:
+                return f"{num_bytes:.1f} {unit}"
+            num_bytes /= 1024
+        return f"{num_bytes:.1f} TB"
+
+    lines = [
+        f"EM solvers:          {report['num_em_solvers']} ({report['num_rotations']} rotor positions)",
+        f"Thermal solvers:     {report['num_thermal_solvers']}",
+        f"EM DOFs:             {report['em_dofs'] if report['em_dofs'] is not None else 'unknown'}",
+        f"Thermal DOFs:        {report['thermal_dofs'] if report['thermal_dofs'] is not None else 'unknown'}",
+        f"em_state inputs:     {report['em_state_inputs']}",
+        f"x_em_vol inputs:     {report['x_em_vol_inputs']}",
+    ]
+    if report["memory"] is None:
+        lines.append(f"{'memory:':<21}unknown ({report['mesh_error']})")
+    else:
+        for name, num_bytes in report["memory"].items():
+            lines.append(f"{name + ':':<21}{size(num_bytes)}")
+    lines.append(f"{'peak per rank:':<21}{size(report['peak_per_rank'])} ({report['comm_size']} ranks)")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    import tempfile
+    import unittest
+
+    def _write_smb(path, dim, counts, magic=0):
+        data = struct.pack(">4I", magic, 5, dim, 1)
+        data += struct.pack(f">{len(_smb_types)}I", *[counts.get(entity, 0) for entity in _smb_types])
+        data += b"\x00" * 64
+        with open(path, "wb") as smb:
+            smb.write(data)
+
+    class TestSizing(unittest.TestCase):
+        counts = {"vertex": 1000, "edge": 2900, "triangle": 1900}
+
+        def test_read_header(self):
+            with tempfile.TemporaryDirectory() as tmp:
+                path = Path(tmp) / "motor.smb"
+                _write_smb(path, 2, self.counts)
+                header = read_smb_header(path)
+                self.assertEqual(header["dim"], 2)
+                self.assertEqual(header["counts"]["edge"], 2900)
+
+                _write_smb(path, 2, self.counts, magic=7)
+                with self.assertRaises(ValueError):
+                    read_smb_header(path)
+
+                # partitioned meshes are read from their part files
+                _write_smb(Path(tmp) / "parts0.smb", 2, self.counts)
+                _write_smb(Path(tmp) / "parts1.smb", 2, self.counts)
+                dim, counts = mesh_entity_counts(Path(tmp) / "parts.smb")
+                self.assertEqual(counts["vertex"], 2000)
+
+        def test_num_dofs(self):
+            self.assertEqual(num_dofs(self.counts, 2, "h1", 1), 1000)
+            self.assertEqual(num_dofs(self.counts, 2, "h1", 2), 3900)
+            self.assertEqual(num_dofs({"vertex": 10, "edge": 30, "triangle": 20, "tet": 5},
+                                      3, "nedelec", 1), 30)
+
+        def test_estimate(self):
+            with tempfile.TemporaryDirectory() as tmp:
+                path = Path(tmp) / "motor.smb"
+                _write_smb(path, 2, self.counts)
+                em_options = {
+                    "mesh": {"file": str(path)},
+                    "space-dis": {"degree": 1, "basis-type": "h1"},
+                    "lin-solver": {"type": "gmres", "kdim": 100},
+                    "lin-prec": {"type": "hypreboomeramg"},
+                    "current": {"phaseA": {"z": [1], "-z": [2]}},
+                    "multipoint": [{}, {}, {}],
+                }
+                report = estimate_motor_memory(em_options, comm_size=4)
+                self.assertEqual(report["num_em_solvers"], 3)
+                self.assertEqual(report["em_dofs"], 1000)
+                self.assertEqual(report["memory"]["krylov"], 3 * 8 * 1000 * 102)
+                self.assertAlmostEqual(report["peak_per_rank"], report["memory"]["total"] / 4)
+
+                # more rotor positions need more memory
+                em_options["multipoint"].append({})
+                self.assertGreater(estimate_motor_memory(em_options)["memory"]["total"],
+                                   report["memory"]["total"])
+                self.assertIn("peak per rank", format_memory_report(report))
+
+                shared = estimate_motor_memory(em_options, shared_functionals=True)
+                self.assertEqual(shared["em_state_inputs"], 4 * 3 + 6)
+                self.assertLess(shared["memory"]["vectors"],
+                                estimate_motor_memory(em_options)["memory"]["vectors"])
+
+                # falls back to the options alone without a readable header
+                _write_smb(path, 2, self.counts, magic=7)
+                fallback = estimate_motor_memory(em_options, shared_functionals=True)
+                self.assertIsNone(fallback["memory"])
+                self.assertEqual(fallback["em_state_inputs"], shared["em_state_inputs"])
+                self.assertIn("unknown", format_memory_report(fallback))
+
+    unittest.main()
@@ -0,0 +1,86 @@
+import openmdao.api as om
+
+# Telemetry that MotorState records for its most recent solve
+_telemetry_outputs = {
+    "initial_residual": " Residual norm of the initial guess",
+    "residual": " Residual norm of the solved state",
+    "tolerance": " Residual norm the solve was judged against: the reduced-order acceptance"
+                 " tolerance for reduced solves, otherwise the nonlinear solver's tolerances",
+    "converged": " 1 if the residual met the tolerance of the path that produced the state,"
+                 " otherwise 0",
+    "reduced_solve": " 1 if the state came from a reduced-order solve, otherwise 0",
+    "rejected_reduced_solve": " 1 if a reduced-order solve was tried and rejected before the full"
+                              " solve, otherwise 0",
+    "reduced_iterations": " Number of reduced Newton iterations",
+    "solve_time": " Wall clock time of the solve in seconds",
+    "failed_solves": " Number of solves so far that did not converge",
+}
+
+
+def solve_tolerance(initial_residual, nonlin_options):
+    """
+    Residual norm a full solve must reach according to the "nonlin-solver"
+    tolerances
+    """
+    return max(nonlin_options.get("reltol", 0.0) * initial_residual,
+               nonlin_options.get("abstol", 0.0))
+
+
+def solve_converged(initial_residual, residual, nonlin_options):
+    """
+    Whether a solve converged according to the "nonlin-solver" tolerances
+    """
+    return residual <= solve_tolerance(initial_residual, nonlin_options)
+
+
+class StateTelemetry(om.ExplicitComponent):
+    """
+    Component that exposes the convergence telemetry of a state's most recent
+    solve as outputs, so that it is saved by case recorders and visible to
+    optimizers even when the solver does not abort on failure
+
+    mach does not report the Newton or Krylov iteration counts of a full
+    solve, so only reduced solves report iterations. The outputs have no
+    derivatives.
+    """
+
+    def initialize(self):
+        self.options.declare("state", recordable=False,
+                             desc=" The MotorState whose solves are reported")
+
+    def setup(self):
+        for name, desc in _telemetry_outputs.items():
+            self.add_output(name, val=0.0, desc=desc)
+
+    def compute(self, inputs, outputs):
+        telemetry = self.options["state"].telemetry
+        for name in _telemetry_outputs:
+            outputs[name] = telemetry.get(name, 0.0)
+
+
+if __name__ == "__main__":
+    import unittest
+
+    class TestStateTelemetry(unittest.TestCase):
+        def test_state_telemetry(self):
+            class State(object):
+                telemetry = {"initial_residual": 10.0, "residual": 1e-3,
+                             "converged": 0.0, "failed_solves": 2.0}
+
+            prob = om.Problem(reports=False)
+            prob.model.add_subsystem("telemetry", StateTelemetry(state=State()))
+            prob.setup()
+            prob.run_model()
+            self.assertEqual(prob["telemetry.residual"], 1e-3)
+            self.assertEqual(prob["telemetry.failed_solves"], 2.0)
+            self.assertEqual(prob["telemetry.reduced_solve"], 0.0)
+            self.assertEqual(prob["telemetry.rejected_reduced_solve"], 0.0)
+
+        def test_converged(self):
+            options = {"reltol": 1e-8, "abstol": 1e-8}
+            self.assertTrue(solve_converged(1.0, 5e-9, options))
+            self.assertFalse(solve_converged(1.0, 1e-6, options))
+            self.assertTrue(solve_converged(1e4, 5e-5, options))
+            self.assertEqual(solve_tolerance(1e4, options), 1e-4)
+
+    unittest.main()
@@ -0,0 +1,548 @@
+import numpy as np
+import openmdao.api as om
+import scipy.linalg
+import scipy.optimize
+
+# Nodes of the lumped parameter thermal network
+_nodes = ["windings", "teeth", "yoke", "airgap", "magnets"]
+
+# Conductances between pairs of nodes
+_edges = {
+    "winding_tooth": ("windings", "teeth"),
+    "tooth_yoke": ("teeth", "yoke"),
+    "tooth_airgap": ("teeth", "airgap"),
+    "magnet_airgap": ("magnets", "airgap"),
+}
+
+# Conductances between a node and a fluid at a fixed temperature
+_boundaries = {
+    "winding_coolant": ("windings", "fluid_temp:in-slot-cooling"),
+    "yoke_housing": ("yoke", "fluid_temp"),
+}
+
+_conductances = [*_edges.keys(), *_boundaries.keys()]
+
+
+class ThermalNetworkConductances(om.ExplicitComponent):
+    """
+    Thermal conductances of the lumped parameter thermal network built from the
+    motor geometry and the convective heat transfer coefficients
+
+    Each stator slot holds two coil sides separated by an in-slot cooling duct.
+    Heat generated in a coil side conducts through the winding and the slot
+    liner either to the tooth wall or to the coolant duct wall. The teeth
+    conduct to the yoke, which convects to the housing fluid, and the teeth
+    and magnets both convect to the air in the airgap.
+
+    The network nodes are mean temperatures. winding_hot_spot_resistance is
+    the rise from the mean to the peak temperature of a coil side per watt
+    of winding loss, for a slab with uniform generation cooled on both faces.
+    """
+
+    def initialize(self):
+        self.options.declare("k_copper", default=400.0,
+                             desc=" Thermal conductivity of the winding conductors")
+        self.options.declare("k_insulation", default=0.2,
+                             desc=" Thermal conductivity of the winding and slot liner insulation")
+        self.options.declare("k_iron", default=30.0,
+                             desc=" Thermal conductivity of the stator laminations")
+        self.options.declare("liner_thickness", default=2e-4,
+                             desc=" Thickness of the slot liner")
+
+    def setup(self):
+        self.add_input("stator_or",
+                       desc=" The outer radius of the stator")
+        self.add_input("stator_ir",
+                       desc=" The inner radius of the stator")
+        self.add_input("rotor_or",
+                       desc=" The outer radius of the rotor")
+        self.add_input("slot_depth",
+                       desc=" The distance between the the stator inner radius and the edge of the stator yoke")
+        self.add_input("tooth_width",
+                       desc=" The width of the tooth")
+        self.add_input("tooth_tip_thickness",
+                       desc=" The thickness at the end of the tooth")
+        self.add_input("stack_length",
+                       desc=" The axial depth of the motor")
+        self.add_input("coolant_thickness", val=0.0,
+                       desc=" The width of the in-slot cooling duct")
+        self.add_input("num_slots",
+                       desc=" The number of slots in the motor")
+        self.add_input("fill_factor",
+                       desc=" The fraction of the slot area occupied by copper")
+        self.add_input("h", val=50.0,
+                       desc=" The heat transfer coefficient on the outer stator surface"
+                            " (50 W/m^2/K is typical of a fan cooled housing)")
+        self.add_input("h:in-slot-cooling",
+                       desc=" The heat transfer coefficient of the in-slot cooling duct")
+        self.add_input("h:airgap-convection",
+                       desc=" The heat transfer coefficient in the airgap")
+
+        for conductance in _conductances:
+            self.add_input(f"calibration:{conductance}", val=1.0,
+                           desc=" Calibration multiplier on the conductance")
+            self.add_output(f"G:{conductance}",
+                            desc=" Thermal conductance between network nodes")
+
+        self.add_output("tooth_core_loss_fraction",
+                        desc=" The fraction of the stator core loss generated in the teeth")
+        self.add_output("winding_hot_spot_resistance",
+                        desc=" Rise of the peak winding temperature above the mean per unit winding loss")
+
+    def setup_partials(self):
+        # each output only depends on a few inputs, let coloring find which
+        self.declare_partials('*', '*', method='cs')
+        self.declare_coloring(wrt='*', method='cs', show_summary=False)
+
+    def compute(self, inputs, outputs):
+        k_cu = self.options["k_copper"]
+        k_ins = self.options["k_insulation"]
+        k_fe = self.options["k_iron"]
+        t_liner = self.options["liner_thickness"]
+
+        stator_or = inputs["stator_or"][0]
+        stator_ir = inputs["stator_ir"][0]
+        rotor_or = inputs["rotor_or"][0]
+        slot_depth = inputs["slot_depth"][0]
+        tooth_width = inputs["tooth_width"][0]
+        tooth_tip_thickness = inputs["tooth_tip_thickness"][0]
+        stack_length = inputs["stack_length"][0]
+        coolant_thickness = inputs["coolant_thickness"][0]
+        num_slots = inputs["num_slots"][0]
+        fill_factor = inputs["fill_factor"][0]
+        h_housing = inputs["h"][0]
+        h_coolant = inputs["h:in-slot-cooling"][0]
+        h_airgap = inputs["h:airgap-convection"][0]
+
+        r_tooth = stator_ir + tooth_tip_thickness
+        r_yoke = r_tooth + slot_depth
+        r_yoke_mid = (r_yoke + stator_or) / 2
+
+        # Equivalent conductivity of the copper/insulation composite
+        k_winding = k_ins * ((1 + fill_factor) * k_cu + (1 - fill_factor) * k_ins) / \
+            ((1 - fill_factor) * k_cu + (1 + fill_factor) * k_ins)
+
+        # each slot holds two coil sides, one on each side of the cooling duct
+        slot_width = np.pi * (r_tooth + r_yoke) / num_slots - tooth_width
+        coil_width = (slot_width - coolant_thickness) / 2
+        num_coil_sides = 2 * num_slots
+        coil_face_area = slot_depth * stack_length
+
+        # mean temperature of a slab with uniform generation conducting to
+        # both faces is reached through b / (6 k A) to each face
+        R_winding = coil_width / (6 * k_winding * coil_face_area)
+        # and its peak, q b^2 / (8 k), is q b^2 / (24 k) above the mean
+        outputs["winding_hot_spot_resistance"] = R_winding / (4 * num_coil_sides)
+        R_liner = t_liner / (k_ins * coil_face_area)
+        R_duct = 1 / (h_coolant * coil_face_area)
+
+        # mean tooth temperature is reached halfway along the tooth
+        tooth_area = num_slots * tooth_width * stack_length
+        R_tooth_half = (slot_depth / 2 + tooth_tip_thickness) / \
+            (k_fe * tooth_area)
+        R_yoke_in = np.log(r_yoke_mid / r_yoke) / \
+            (2 * np.pi * k_fe * stack_length)
+        R_yoke_out = np.log(stator_or / r_yoke_mid) / \
+            (2 * np.pi * k_fe * stack_length)
+        housing_area = 2 * np.pi * stator_or * stack_length
+
+        G = {
+            "winding_tooth": num_coil_sides / (R_winding + R_liner),
+            "winding_coolant": num_coil_sides / (R_winding + R_liner + R_duct),
+            "tooth_yoke": 1 / (R_tooth_half + R_yoke_in),
+            "tooth_airgap": 1 / (R_tooth_half + 1 / (h_airgap * 2 * np.pi * stator_ir * stack_length)),
+            "magnet_airgap": h_airgap * 2 * np.pi * rotor_or * stack_length,
+            "yoke_housing": h_housing * housing_area / (1 + h_housing * housing_area * R_yoke_out),
+        }
+
+        for conductance in _conductances:
+            outputs[f"G:{conductance}"] = inputs[f"calibration:{conductance}"] * \
+                G[conductance]
+
+        teeth_area = num_slots * tooth_width * (slot_depth + tooth_tip_thickness)
+        yoke_area = np.pi * (stator_or**2 - r_yoke**2)
+        outputs["tooth_core_loss_fraction"] = teeth_area / \
+            (teeth_area + yoke_area)
+
+
+class LumpedThermalNetwork(om.ImplicitComponent):
+    """
+    Steady state nodal temperatures of the lumped parameter thermal network
+
+    The residual is the net heat leaving each node,
+        R = G T - G_b T_b - P
+    which is linear in the temperatures and bilinear in the conductances.
+    """
+
+    def setup(self):
+        for conductance in _conductances:
+            self.add_input(f"G:{conductance}",
+                           desc=" Thermal conductance between network nodes")
+        self.add_input("tooth_core_loss_fraction",
+                       desc=" The fraction of the stator core loss generated in the teeth")
+
+        self.add_input("dc_loss",
+                       desc=" The DC losses in the windings")
+        self.add_input("ac_loss",
+                       desc=" The AC losses in the windings")
+        self.add_input("core_loss",
+                       desc=" The core losses in the stator")
+        self.add_input("magnet_loss", val=0.0,
+                       desc=" The eddy current losses in the magnets and rotor")
+
+        fluids = sorted({fluid for _, fluid in _boundaries.values()})
+        for fluid in fluids:
+            self.add_input(fluid, val=300.0,
+                           desc=" The temperature of the fluid at a network boundary")
+
+        self.add_output("temperature", val=300.0, shape=len(_nodes),
+                        desc=" The mean temperature of each network node")
+
+        self.declare_partials("temperature", "*")
+
+    def _dtype(self):
+        return complex if self.under_complex_step else float
+
+    def _conductance_matrix(self, inputs):
+        num_nodes = len(_nodes)
+        G = np.zeros((num_nodes, num_nodes), dtype=self._dtype())
+        for conductance, (a, b) in _edges.items():
+            i = _nodes.index(a)
+            j = _nodes.index(b)
+            g = inputs[f"G:{conductance}"][0]
+            G[i, i] += g
+            G[j, j] += g
+            G[i, j] -= g
+            G[j, i] -= g
+        for conductance, (a, _) in _boundaries.items():
+            i = _nodes.index(a)
+            G[i, i] += inputs[f"G:{conductance}"][0]
+        return G
+
+    def _heat_input(self, inputs):
+        num_nodes = len(_nodes)
+        P = np.zeros(num_nodes, dtype=self._dtype())
+        tooth_fraction = inputs["tooth_core_loss_fraction"][0]
+        core_loss = inputs["core_loss"][0]
+        P[_nodes.index("windings")] = inputs["dc_loss"][0] + inputs["ac_loss"][0]
+        P[_nodes.index("teeth")] = tooth_fraction * core_loss
+        P[_nodes.index("yoke")] = (1 - tooth_fraction) * core_loss
+        P[_nodes.index("magnets")] = inputs["magnet_loss"][0]
+
+        for conductance, (a, fluid) in _boundaries.items():
+            P[_nodes.index(a)] += inputs[f"G:{conductance}"][0] * \
+                inputs[fluid][0]
+        return P
+
+    def apply_nonlinear(self, inputs, outputs, residuals):
+        G = self._conductance_matrix(inputs)
+        P = self._heat_input(inputs)
+        residuals["temperature"] = G @ outputs["temperature"] - P
+
+    def solve_nonlinear(self, inputs, outputs):
+        G = self._conductance_matrix(inputs)
+        P = self._heat_input(inputs)
+        outputs["temperature"] = np.linalg.solve(G, P)
+
+    def linearize(self, inputs, outputs, partials):
+        T = outputs["temperature"]
+        G = self._conductance_matrix(inputs)
+        partials["temperature", "temperature"] = G
+        self.lu = scipy.linalg.lu_factor(G)
+
+        for conductance, (a, b) in _edges.items():
+            i = _nodes.index(a)
+            j = _nodes.index(b)
+            dR = np.zeros(len(_nodes))
+            dR[i] = T[i] - T[j]
+            dR[j] = T[j] - T[i]
+            partials["temperature", f"G:{conductance}"] = dR
+
+        for conductance, (a, fluid) in _boundaries.items():
+            i = _nodes.index(a)
+            dR = np.zeros(len(_nodes))
+            dR[i] = T[i] - inputs[fluid][0]
+            partials["temperature", f"G:{conductance}"] = dR
+
+        fluids = sorted({fluid for _, fluid in _boundaries.values()})
+        for fluid in fluids:
+            dR = np.zeros(len(_nodes))
+            for conductance, (a, boundary_fluid) in _boundaries.items():
+                if boundary_fluid == fluid:
+                    dR[_nodes.index(a)] -= inputs[f"G:{conductance}"][0]
+            partials["temperature", fluid] = dR
+
+        winding_loss = np.zeros(len(_nodes))
+        winding_loss[_nodes.index("windings")] = -1
+        partials["temperature", "dc_loss"] = winding_loss
+        partials["temperature", "ac_loss"] = winding_loss
+
+        tooth_fraction = inputs["tooth_core_loss_fraction"][0]
+        core_loss = inputs["core_loss"][0]
+        dR = np.zeros(len(_nodes))
+        dR[_nodes.index("teeth")] = -tooth_fraction
+        dR[_nodes.index("yoke")] = -(1 - tooth_fraction)
+        partials["temperature", "core_loss"] = dR
+
+        dR = np.zeros(len(_nodes))
+        dR[_nodes.index("teeth")] = -core_loss
+        dR[_nodes.index("yoke")] = core_loss
+        partials["temperature", "tooth_core_loss_fraction"] = dR
+
+        dR = np.zeros(len(_nodes))
+        dR[_nodes.index("magnets")] = -1
+        partials["temperature", "magnet_loss"] = dR
+
+    def solve_linear(self, d_outputs, d_residuals, mode):
+        if mode == "fwd":
+            d_outputs["temperature"] = scipy.linalg.lu_solve(
+                self.lu, d_residuals["temperature"])
+        elif mode == "rev":
+            d_residuals["temperature"] = scipy.linalg.lu_solve(
+                self.lu, d_outputs["temperature"], trans=1)
+
+
+class ThermalNetwork(om.Group):
+    """
+    Lumped parameter thermal network model of the motor
+
+    A low fidelity alternative to the finite element thermal model that
+    outputs the estimated peak winding temperature (the mean winding node
+    temperature plus the conduction rise inside the coil sides) and the mean
+    magnet temperature
+    """
+
+    def initialize(self):
+        self.options.declare("conductance_options", types=dict, default=None, allow_none=True,
+                             desc=" Options passed to ThermalNetworkConductances")
+
+    def setup(self):
+        self.add_subsystem("conductances",
+                           ThermalNetworkConductances(
+                               **(self.options["conductance_options"] or {})),
+                           promotes_inputs=["*"])
+
+        self.add_subsystem("network",
+                           LumpedThermalNetwork(),
+                           promotes_inputs=["dc_loss",
+                                            "ac_loss",
+                                            "core_loss",
+                                            "magnet_loss",
+                                            "fluid_temp",
+                                            "fluid_temp:in-slot-cooling"],
+                           promotes_outputs=[("temperature", "network_temperature")])
+
+        for conductance in _conductances:
+            self.connect(f"conductances.G:{conductance}",
+                         f"network.G:{conductance}")
+        self.connect("conductances.tooth_core_loss_fraction",
+                     "network.tooth_core_loss_fraction")
+
+        self.add_subsystem("max_winding_temperature",
+                           om.ExecComp("max_winding_temperature = temperature + "
+                                       "(dc_loss + ac_loss) * winding_hot_spot_resistance",
+                                       temperature={"val": 300.0}),
+                           promotes_inputs=["dc_loss", "ac_loss"],
+                           promotes_outputs=["max_winding_temperature"])
+        self.connect("conductances.winding_hot_spot_resistance",
+                     "max_winding_temperature.winding_hot_spot_resistance")
+        self.connect("network_temperature", "max_winding_temperature.temperature",
+                     src_indices=[_nodes.index("windings")])
+
+        self.add_subsystem("max_magnet_temperature",
+                           om.ExecComp("max_magnet_temperature = temperature",
+                                       temperature={"val": 300.0}),
+                           promotes_outputs=["max_magnet_temperature"])
+        self.connect("network_temperature", "max_magnet_temperature.temperature",
+                     src_indices=[_nodes.index("magnets")])
+
+
+def calibrate_thermal_network(cases,
+                              outputs=["max_winding_temperature",
+                                       "max_magnet_temperature"],
+                              conductances=_conductances,
+                              conductance_options=None):
+    """
+    Fit the network's calibration multipliers to reference temperatures
+
+    Parameters
+    ----------
+    cases : list of tuple
+        Each case is (inputs, temperatures) where inputs is a dict of network
+        input values and temperatures is a dict of reference values for each
+        of the outputs, for example from the finite element thermal model
+    outputs : list of str
+        The temperatures to match
+    conductances : list of str
+        The conductances whose calibration multipliers are fit
+    conductance_options : dict
+        Options passed to ThermalNetworkConductances, or None for the defaults
+
+    Returns
+    -------
+    calibration : dict
+        Calibration multiplier for each fit conductance
+    """
+    problem = om.Problem()
+    problem.model.add_subsystem("network",
+                                ThermalNetwork(
+                                    conductance_options=conductance_options),
+                                promotes=["*"])
+    problem.setup()
+
+    calibration_names = [f"calibration:{conductance}"
+                         for conductance in conductances]
+
+    def _residuals(log_multipliers):
+        for name, log_multiplier in zip(calibration_names, log_multipliers):
+            problem[name] = np.exp(log_multiplier)
+
+        residuals = []
+        jacobian = []
+        for inputs, temperatures in cases:
+            for name, val in inputs.items():
+                problem[name] = val
+            problem.run_model()
+            totals = problem.compute_totals(of=outputs,
+                                            wrt=calibration_names,
+                                            driver_scaling=False)
+            for output in outputs:
+                residuals.append(problem.get_val(output)[0] - temperatures[output])
+                # chain rule through the log scaling of the multipliers
+                jacobian.append([totals[output, name][0, 0] * np.exp(log_multiplier)
+                                 for name, log_multiplier in zip(calibration_names,
+                                                                 log_multipliers)])
+        return np.array(residuals), np.array(jacobian)
+
+    result = scipy.optimize.least_squares(lambda x: _residuals(x)[0],
+                                          np.zeros(len(conductances)),
+                                          jac=lambda x: _residuals(x)[1],
+                                          bounds=(np.log(1e-2), np.log(1e2)))
+
+    return {conductance: np.exp(log_multiplier)
+            for conductance, log_multiplier in zip(conductances, result.x)}
+
+
+if __name__ == "__main__":
+    import unittest
+    from openmdao.utils.assert_utils import assert_check_partials, assert_check_totals, assert_near_equal
+
+    _inputs = {
+        "stator_or": 0.11,
+        "stator_ir": 0.095,
+        "rotor_or": 0.094,
+        "slot_depth": 0.012,
+        "tooth_width": 0.005,
+        "tooth_tip_thickness": 0.001,
+        "stack_length": 0.05,
+        "coolant_thickness": 0.0015,
+        "num_slots": 24,
+        "fill_factor": 0.5,
+        "h": 50.0,
+        "h:in-slot-cooling": 2000.0,
+        "h:airgap-convection": 100.0,
+        "dc_loss": 400.0,
+        "ac_loss": 50.0,
+        "core_loss": 200.0,
+        "fluid_temp": 300.0,
+        "fluid_temp:in-slot-cooling": 310.0,
+    }
+
+    class TestThermalNetwork(unittest.TestCase):
+        def test_energy_balance(self):
+            problem = om.Problem()
+            problem.model.add_subsystem("lptn",
+                                        ThermalNetwork(),
+                                        promotes=["*"])
+            problem.setup()
+            for name, val in _inputs.items():
+                problem[name] = val
+            problem.run_model()
+
+            T = problem.get_val("network_temperature")
+            G_coolant = problem.get_val("lptn.conductances.G:winding_coolant")
+            G_housing = problem.get_val("lptn.conductances.G:yoke_housing")
+
+            # all the heat generated must leave through the fluids
+            heat_out = G_coolant * (T[0] - _inputs["fluid_temp:in-slot-cooling"]) \
+                + G_housing * (T[2] - _inputs["fluid_temp"])
+            assert_near_equal(heat_out,
+                              _inputs["dc_loss"] + _inputs["ac_loss"] + _inputs["core_loss"],
+                              tolerance=1e-10)
+
+            # without magnet losses the magnets sit at the airgap temperature
+            assert_near_equal(T[4], T[3], tolerance=1e-10)
+            self.assertGreater(problem.get_val("max_winding_temperature")[0],
+                               _inputs["fluid_temp:in-slot-cooling"])
+
+        def test_hot_spot(self):
+            problem = om.Problem()
+            problem.model.add_subsystem("lptn",
+                                        ThermalNetwork(),
+                                        promotes=["*"])
+            problem.setup()
+            for name, val in _inputs.items():
+                problem[name] = val
+            problem.run_model()
+
+            # peak of q b^2 / (8 k) against a mean of q b^2 / (12 k) above the faces
+            T = problem.get_val("network_temperature")
+            G_winding_tooth = problem.get_val("lptn.conductances.G:winding_tooth")[0]
+            R_liner = 2e-4 / (0.2 * _inputs["slot_depth"] * _inputs["stack_length"])
+            R_winding = 2 * _inputs["num_slots"] / G_winding_tooth - R_liner
+            loss_per_side = (_inputs["dc_loss"] + _inputs["ac_loss"]) / (2 * _inputs["num_slots"])
+            mean_rise = loss_per_side * R_winding / 2
+            assert_near_equal(problem.get_val("max_winding_temperature")[0] - T[0],
+                              mean_rise * (12 / 8 - 1), tolerance=1e-10)
+
+        def test_derivatives(self):
+            problem = om.Problem()
+            problem.model.add_subsystem("lptn",
+                                        ThermalNetwork(),
+                                        promotes=["*"])
+            problem.setup(force_alloc_complex=True)
+            for name, val in _inputs.items():
+                problem[name] = val
+            problem["magnet_loss"] = 5.0
+            problem.run_model()
+
+            data = problem.check_partials(method="cs", form="central")
+            assert_check_partials(data)
+
+            data = problem.check_totals(of=["max_winding_temperature",
+                                            "max_magnet_temperature"],
+                                        wrt=["slot_depth", "tooth_width",
+                                             "h:in-slot-cooling", "dc_loss",
+                                             "fluid_temp:in-slot-cooling"],
+                                        method="cs")
+            assert_check_totals(data)
+
+        def test_calibration(self):
+            # reference temperatures from a network with known multipliers
+            true_calibration = {"winding_tooth": 0.7, "winding_coolant": 1.3}
+            reference = om.Problem()
+            reference.model.add_subsystem("lptn",
+                                          ThermalNetwork(),
+                                          promotes=["*"])
+            reference.setup()
+
+            cases = []
+            for dc_loss, h_coolant in [(400.0, 2000.0), (800.0, 500.0), (200.0, 4000.0)]:
+                inputs = dict(_inputs)
+                inputs["dc_loss"] = dc_loss
+                inputs["h:in-slot-cooling"] = h_coolant
+                for name, val in inputs.items():
+                    reference[name] = val
+                for conductance, multiplier in true_calibration.items():
+                    reference[f"calibration:{conductance}"] = multiplier
+                reference.run_model()
+                cases.append((inputs,
+                              {"max_winding_temperature": reference.get_val("max_winding_temperature")[0],
+                               "max_magnet_temperature": reference.get_val("max_magnet_temperature")[0]}))
+
+            calibration = calibrate_thermal_network(cases,
+                                                    conductances=list(true_calibration.keys()))
+            for conductance, multiplier in true_calibration.items():
+                assert_near_equal(calibration[conductance], multiplier, tolerance=1e-5)
+
+    unittest.main()
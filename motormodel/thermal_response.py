@@ -0,0 +1,351 @@
+import numpy as np
+import openmdao.api as om
+
+from mach import PDESolver
+
+from .utils import design_var_dependents, fingerprint
+
+
+class ThermalResponses(object):
+    """
+    Cache of linear thermal responses used to superpose temperature fields
+
+    With constant conductivities the thermal state is affine in the heat source
+    and fluid temperature inputs for fixed heat transfer coefficients:
+
+        T = T_0 + sum_r s_r U_r + sum_f T_f V_f
+
+    where s_r is the total load in region r, U_r is the response to a unit
+    load with the cached shape of region r, T_f is the temperature of fluid f,
+    and V_f is the response to a unit increase in that fluid temperature.
+    """
+
+    def __init__(self, solve, dot=np.dot, sum=np.sum, shape_tol=1e-2):
+        """
+        Parameters
+        ----------
+        solve : callable
+            solve(loads, fluid_temps) -> state, where loads is a dict of region
+            load fields and fluid_temps is a dict of scalar fluid temperatures
+        dot : callable
+            Inner product between two (possibly distributed) fields
+        sum : callable
+            Sum of a (possibly distributed) field
+        shape_tol : float
+            Relative change in a region's normalized load shape that triggers
+            recomputing that region's unit response
+        """
+        self.solve = solve
+        self.dot = dot
+        self.sum = sum
+        self.shape_tol = shape_tol
+
+        self.key = None
+        self.num_solves = 0
+        self.invalidate()
+
+    def invalidate(self):
+        self.baseline = None
+        self.shapes = {}
+        self.load_responses = {}
+        self.fluid_responses = {}
+
+    def update(self, key, loads, fluid_temps):
+        """
+        Make sure the cache holds responses for the current key and load shapes
+
+        Parameters
+        ----------
+        key : str
+            Fingerprint of the inputs the thermal operator depends on
+        loads : dict
+            Region name -> load field
+        fluid_temps : dict
+            Fluid temperature name -> scalar temperature
+        """
+        if key != self.key:
+            self.invalidate()
+            self.key = key
+
+        zero_loads = {region: np.zeros_like(load)
+                      for region, load in loads.items()}
+        zero_fluids = {fluid: 0.0 for fluid in fluid_temps}
+
+        if self.baseline is None:
+            self.baseline = self._solve(zero_loads, zero_fluids)
+
+        for fluid in fluid_temps:
+            if fluid not in self.fluid_responses:
+                unit_fluids = dict(zero_fluids)
+                unit_fluids[fluid] = 1.0
+                self.fluid_responses[fluid] = \
+                    self._solve(zero_loads, unit_fluids) - self.baseline
+
+        for region, load in loads.items():
+            total = self.sum(load)
+            if total == 0.0:
+                if region not in self.shapes:
+                    self.shapes[region] = None
+                    self.load_responses[region] = np.zeros_like(self.baseline)
+                continue
+
+            shape = load / total
+            cached_shape = self.shapes.get(region)
+            if cached_shape is not None:
+                diff = shape - cached_shape
+                if self.dot(diff, diff)**0.5 <= \
+                        self.shape_tol * self.dot(shape, shape)**0.5:
+                    continue
+
+            unit_loads = dict(zero_loads)
+            unit_loads[region] = shape
+            self.shapes[region] = shape
+            self.load_responses[region] = \
+                self._solve(unit_loads, zero_fluids) - self.baseline
+
+    def superpose(self, totals, fluid_temps, state=None):
+        """
+        Superpose the cached responses
+
+        Parameters
+        ----------
+        totals : dict
+            Region name -> total load in that region
+        fluid_temps : dict
+            Fluid temperature name -> scalar temperature
+        state : np.ndarray
+            Optional array to store the superposed state in
+        """
+        if state is None:
+            state = np.empty_like(self.baseline)
+        state[:] = self.baseline
+        for region, total in totals.items():
+            state += total * self.load_responses[region]
+        for fluid, temp in fluid_temps.items():
+            state += temp * self.fluid_responses[fluid]
+        return state
+
+    def _solve(self, loads, fluid_temps):
+        self.num_solves += 1
+        return self.solve(loads, fluid_temps)
+
+
+class ThermalResponseCache(om.ExplicitComponent):
+    """
+    Thermal state from superposed unit responses of the thermal solver
+
+    Replaces the thermal state solve for repeated evaluations at fixed geometry
+    and heat transfer coefficients. The unit responses are recomputed whenever
+    the mesh, a heat transfer coefficient, or the fill factor changes, or when
+    the shape of a region's load drifts from the cached shape.
+
+    Derivatives are only provided with respect to the fluid temperatures and
+    the total load in each region, so they are exact only while each region's
+    load keeps its cached shape. Differentiating with respect to anything the
+    mesh, the parameters, or the region loads depend on raises; use the full
+    thermal solve to optimize.
+    """
+
+    def initialize(self):
+        self.options.declare("solver",
+                             types=PDESolver,
+                             desc="the thermal mach solver object",
+                             recordable=False)
+        self.options.declare("regions", types=list,
+                             desc=" The names of the heat source regions")
+        self.options.declare("fluids", types=list,
+                             default=["fluid_temp",
+                                      "fluid_temp:in-slot-cooling"],
+                             desc=" The fluid temperature inputs the state is affine in")
+        self.options.declare("parameters", types=list,
+                             default=["h",
+                                      "fill_factor",
+                                      "h:in-slot-cooling",
+                                      "h:airgap-convection"],
+                             desc=" Inputs that invalidate the cached responses when changed")
+        self.options.declare("shape_tol", default=1e-2,
+                             desc=" Relative change in a region's load shape that triggers a new unit solve")
+
+    def setup(self):
+        self.solver = self.options["solver"]
+        regions = self.options["regions"]
+
+        mesh_size = self.solver.getFieldSize("mesh_coords")
+        self.add_input("mesh_coords",
+                       distributed=True,
+                       shape=mesh_size,
+                       tags=["mphys_coordinates"])
+
+        load_size = self.solver.getFieldSize("thermal_load")
+        for region in regions:
+            self.add_input(f"thermal_load:{region}",
+                           distributed=True,
+                           shape=load_size,
+                           tags=["mphys_coupling"])
+
+        for fluid in self.options["fluids"]:
+            self.add_input(fluid, tags=["mphys_input"])
+
+        for parameter in self.options["parameters"]:
+            self.add_input(parameter,
+                           shape=self.solver.getFieldSize(parameter),
+                           tags=["mphys_input"])
+
+        self.add_output("state",
+                        distributed=True,
+                        shape=self.solver.getStateSize(),
+                        tags=["mphys_coupling"])
+
+        self.responses = ThermalResponses(self._solve,
+                                          dot=self._dot,
+                                          sum=self._sum,
+                                          shape_tol=self.options["shape_tol"])
+        self._checked_design_vars = False
+
+    def _check_design_vars(self):
+        """
+        Raise if a design variable reaches an input without exact derivatives
+        """
+        if self._checked_design_vars:
+            return
+        self._checked_design_vars = True
+
+        inputs = ["mesh_coords"] + self.options["parameters"] + \
+            [f"thermal_load:{region}" for region in self.options["regions"]]
+        dependents = design_var_dependents(self,
+                                           [f"{self.pathname}.{input}" for input in inputs])
+        if dependents:
+            raise ValueError(f"{self.msginfo}: design variables reach {', '.join(dependents)}, "
+                             "but the superposed thermal state has no exact derivatives "
+                             "with respect to them; use coupled=\"thermal\"")
+
+    def compute(self, inputs, outputs):
+        self._update(inputs)
+
+        totals = {region: self._sum(inputs[f"thermal_load:{region}"])
+                  for region in self.options["regions"]}
+        fluid_temps = {fluid: inputs[fluid][0]
+                       for fluid in self.options["fluids"]}
+        self.responses.superpose(totals, fluid_temps, state=outputs["state"])
+
+    def compute_jacvec_product(self, inputs, d_inputs, d_outputs, mode):
+        if "state" not in d_outputs:
+            return
+
+        self._check_design_vars()
+        self._update(inputs)
+        responses = self.responses
+        if mode == "fwd":
+            for region in self.options["regions"]:
+                load = f"thermal_load:{region}"
+                if load in d_inputs:
+                    d_outputs["state"] += self._sum(d_inputs[load]) * \
+                        responses.load_responses[region]
+            for fluid in self.options["fluids"]:
+                if fluid in d_inputs:
+                    d_outputs["state"] += d_inputs[fluid][0] * \
+                        responses.fluid_responses[fluid]
+
+        elif mode == "rev":
+            for region in self.options["regions"]:
+                load = f"thermal_load:{region}"
+                if load in d_inputs:
+                    d_inputs[load] += self._dot(d_outputs["state"],
+                                                responses.load_responses[region])
+            for fluid in self.options["fluids"]:
+                if fluid in d_inputs:
+                    d_inputs[fluid] += self._dot(d_outputs["state"],
+                                                 responses.fluid_responses[fluid])
+
+    def _update(self, inputs):
+        self._current_inputs = inputs
+        key = fingerprint(inputs["mesh_coords"],
+                           *[inputs[parameter]
+                             for parameter in self.options["parameters"]])
+
+        # every rank must agree on whether the cache is stale
+        if self.comm.allreduce(int(key != self.responses.key)) > 0:
+            self.responses.invalidate()
+            self.responses.key = key
+
+        self.responses.update(key,
+                              {region: inputs[f"thermal_load:{region}"]
+                               for region in self.options["regions"]},
+                              {fluid: inputs[fluid][0]
+                               for fluid in self.options["fluids"]})
+
+    def _solve(self, loads, fluid_temps):
+        inputs = self._current_inputs
+        solver_inputs = {
+            "mesh_coords": inputs["mesh_coords"],
+            "thermal_load": sum(loads.values()),
+        }
+        for parameter in self.options["parameters"]:
+            solver_inputs[parameter] = inputs[parameter]
+        for fluid, temp in fluid_temps.items():
+            solver_inputs[fluid] = np.array([temp])
+
+        state = np.zeros(self.solver.getStateSize())
+        self.solver.solveForState(solver_inputs, state)
+        return state
+
+    def _dot(self, a, b):
+        return self.comm.allreduce(np.dot(a, b))
+
+    def _sum(self, a):
+        return self.comm.allreduce(np.sum(a))
+
+
+if __name__ == "__main__":
+    import unittest
+
+    class TestThermalResponses(unittest.TestCase):
+        # small conduction-like system: K T = q + b T_f
+        n = 10
+        K = 2 * np.eye(n) - np.eye(n, k=1) - np.eye(n, k=-1)
+        K[0, 0] = K[-1, -1] = 3
+        b = np.zeros(n)
+        b[0] = b[-1] = 1.0
+
+        def solve(self, loads, fluid_temps):
+            rhs = sum(loads.values()) + self.b * fluid_temps["fluid_temp"]
+            return np.linalg.solve(self.K, rhs)
+
+        def test_superposition(self):
+            responses = ThermalResponses(self.solve)
+
+            rng = np.random.default_rng(0)
+            shape_a = np.zeros(self.n)
+            shape_a[2:4] = rng.random(2)
+            shape_b = np.zeros(self.n)
+            shape_b[6:9] = rng.random(3)
+
+            loads = {"windings": shape_a, "stator": shape_b}
+            responses.update("key", loads, {"fluid_temp": 300.0})
+            self.assertEqual(responses.num_solves, 4)
+
+            # scaled loads with the same shapes need no new solves
+            for scale_a, scale_b, temp in [(1.0, 1.0, 300.0),
+                                           (3.5, 0.2, 350.0),
+                                           (0.0, 7.0, 275.0)]:
+                loads = {"windings": scale_a * shape_a,
+                         "stator": scale_b * shape_b}
+                responses.update("key", loads, {"fluid_temp": temp})
+                state = responses.superpose(
+                    {region: np.sum(load) for region, load in loads.items()},
+                    {"fluid_temp": temp})
+                np.testing.assert_allclose(
+                    state, self.solve(loads, {"fluid_temp": temp}))
+            self.assertEqual(responses.num_solves, 4)
+
+            # a new shape only recomputes that region
+            loads["windings"] = shape_a
+            loads["stator"] = np.roll(shape_b, 1)
+            responses.update("key", loads, {"fluid_temp": 300.0})
+            self.assertEqual(responses.num_solves, 5)
+
+            # a new key invalidates everything
+            responses.update("new key", loads, {"fluid_temp": 300.0})
+            self.assertEqual(responses.num_solves, 9)
+
+    unittest.main()
@@ -0,0 +1,659 @@
+import numpy as np
+import openmdao.api as om
+import scipy.linalg
+
+from .thermal_network import ThermalNetworkConductances
+from .thermal_network import _nodes, _edges, _boundaries, _conductances
+
+_fluids = sorted({fluid for _, fluid in _boundaries.values()})
+
+# Loss time series and the nodes they heat
+_losses = ["dc_loss", "ac_loss", "core_loss", "magnet_loss"]
+
+
+class ThermalNetworkCapacitances(om.ExplicitComponent):
+    """
+    Heat capacities of the lumped parameter thermal network nodes
+    """
+
+    def initialize(self):
+        self.options.declare("materials", types=dict,
+                             default={
+                                 "copper": {"rho": 8960.0, "cp": 385.0},
+                                 "insulation": {"rho": 1400.0, "cp": 1100.0},
+                                 "iron": {"rho": 8120.0, "cp": 420.0},
+                                 "magnet": {"rho": 7500.0, "cp": 440.0},
+                                 "air": {"rho": 1.0, "cp": 1007.0},
+                             },
+                             desc=" Density and specific heat of each material")
+
+    def setup(self):
+        self.add_input("stator_or",
+                       desc=" The outer radius of the stator")
+        self.add_input("stator_ir",
+                       desc=" The inner radius of the stator")
+        self.add_input("rotor_or",
+                       desc=" The outer radius of the rotor")
+        self.add_input("magnet_thickness",
+                       desc=" The radial thickness of the magnets")
+        self.add_input("slot_depth",
+                       desc=" The distance between the the stator inner radius and the edge of the stator yoke")
+        self.add_input("tooth_width",
+                       desc=" The width of the tooth")
+        self.add_input("tooth_tip_thickness",
+                       desc=" The thickness at the end of the tooth")
+        self.add_input("stack_length",
+                       desc=" The axial depth of the motor")
+        self.add_input("coolant_thickness", val=0.0,
+                       desc=" The width of the in-slot cooling duct")
+        self.add_input("num_slots",
+                       desc=" The number of slots in the motor")
+        self.add_input("fill_factor",
+                       desc=" The fraction of the slot area occupied by copper")
+
+        for node in _nodes:
+            self.add_output(f"C:{node}",
+                            desc=" Heat capacity of the network node")
+
+    def setup_partials(self):
+        # each output only depends on a few inputs, let coloring find which
+        self.declare_partials('*', '*', method='cs')
+        self.declare_coloring(wrt='*', method='cs', show_summary=False)
+
+    def compute(self, inputs, outputs):
+        materials = self.options["materials"]
+
+        def rho_cp(material):
+            return materials[material]["rho"] * materials[material]["cp"]
+
+        stator_or = inputs["stator_or"][0]
+        stator_ir = inputs["stator_ir"][0]
+        rotor_or = inputs["rotor_or"][0]
+        magnet_thickness = inputs["magnet_thickness"][0]
+        slot_depth = inputs["slot_depth"][0]
+        tooth_width = inputs["tooth_width"][0]
+        tooth_tip_thickness = inputs["tooth_tip_thickness"][0]
+        stack_length = inputs["stack_length"][0]
+        coolant_thickness = inputs["coolant_thickness"][0]
+        num_slots = inputs["num_slots"][0]
+        fill_factor = inputs["fill_factor"][0]
+
+        r_tooth = stator_ir + tooth_tip_thickness
+        r_yoke = r_tooth + slot_depth
+        slot_width = np.pi * (r_tooth + r_yoke) / num_slots - tooth_width
+
+        winding_volume = num_slots * (slot_width - coolant_thickness) * \
+            slot_depth * stack_length
+        teeth_volume = num_slots * tooth_width * \
+            (slot_depth + tooth_tip_thickness) * stack_length
+        yoke_volume = np.pi * (stator_or**2 - r_yoke**2) * stack_length
+        airgap_volume = np.pi * (stator_ir**2 - rotor_or**2) * stack_length
+        magnet_volume = np.pi * \
+            (rotor_or**2 - (rotor_or - magnet_thickness)**2) * stack_length
+
+        outputs["C:windings"] = winding_volume * \
+            (fill_factor * rho_cp("copper") +
+             (1 - fill_factor) * rho_cp("insulation"))
+        outputs["C:teeth"] = teeth_volume * rho_cp("iron")
+        outputs["C:yoke"] = yoke_volume * rho_cp("iron")
+        outputs["C:airgap"] = airgap_volume * rho_cp("air")
+        outputs["C:magnets"] = magnet_volume * rho_cp("magnet")
+
+
+def _conductance_matrix(G_values, dtype=float):
+    num_nodes = len(_nodes)
+    G = np.zeros((num_nodes, num_nodes), dtype=dtype)
+    for conductance, (a, b) in _edges.items():
+        i = _nodes.index(a)
+        j = _nodes.index(b)
+        g = G_values[conductance]
+        G[i, i] += g
+        G[j, j] += g
+        G[i, j] -= g
+        G[j, i] -= g
+    for conductance, (a, _) in _boundaries.items():
+        G[_nodes.index(a), _nodes.index(a)] += G_values[conductance]
+    return G
+
+
+def _node_losses(losses, tooth_fraction, dtype=float):
+    """
+    Heat generated at each node from the (interpolated) loss values
+    """
+    P = np.zeros(len(_nodes), dtype=dtype)
+    P[_nodes.index("windings")] = losses["dc_loss"] + losses["ac_loss"]
+    P[_nodes.index("teeth")] = tooth_fraction * losses["core_loss"]
+    P[_nodes.index("yoke")] = (1 - tooth_fraction) * losses["core_loss"]
+    P[_nodes.index("magnets")] = losses["magnet_loss"]
+    return P
+
+
+def _node_loss_sensitivity(loss, tooth_fraction):
+    """
+    Derivative of the node heat generation with respect to one loss
+    """
+    dP = np.zeros(len(_nodes))
+    if loss in ("dc_loss", "ac_loss"):
+        dP[_nodes.index("windings")] = 1.0
+    elif loss == "core_loss":
+        dP[_nodes.index("teeth")] = tooth_fraction
+        dP[_nodes.index("yoke")] = 1 - tooth_fraction
+    elif loss == "magnet_loss":
+        dP[_nodes.index("magnets")] = 1.0
+    return dP
+
+
+def _interp_weights(t, times):
+    """
+    Weights w such that np.interp(t, times, data) == w @ data
+    """
+    return np.array([np.interp(t, times, unit)
+                     for unit in np.eye(times.size)])
+
+
+def _ks_max(data, rho):
+    """
+    Kreisselmeier-Steinhauser aggregate of data and its derivative
+    """
+    data_max = np.max(data)
+    exponents = np.exp(rho * (data - data_max))
+    summation = np.sum(exponents)
+    return data_max + np.log(summation) / rho, exponents / summation
+
+
+class ThermalNetworkTransient(om.ExplicitComponent):
+    """
+    Transient response of the lumped parameter thermal network to loss time
+    series over a duty cycle
+
+    Integrates C dT/dt + G T = P(t) + G_b T_b with implicit Euler. The step
+    size is chosen by step doubling and restricted to max_step / 2**m so the
+    factorization of C/dt + G is reused every time a step size repeats.
+    Derivatives are computed by differentiating the discrete time stepping
+    with the accepted steps held fixed, sweeping forward in time for forward
+    mode and backward in time (adjoint) for reverse mode.
+    """
+
+    def initialize(self):
+        self.options.declare("times", types=(list, np.ndarray),
+                             desc=" The times the loss time series are given at")
+        self.options.declare("max_step", default=None,
+                             desc=" The largest time step allowed, defaults to the longest segment")
+        self.options.declare("tol", default=0.1,
+                             desc=" Allowed local error in the node temperatures per step")
+        self.options.declare("max_refinements", types=int, default=10,
+                             desc=" The number of times the step may be halved")
+        self.options.declare("rho", default=50.0,
+                             desc=" KS aggregation parameter for the peak temperatures")
+
+    def setup(self):
+        times = np.asarray(self.options["times"], dtype=float)
+        num_times = times.size
+
+        for conductance in _conductances:
+            self.add_input(f"G:{conductance}",
+                           desc=" Thermal conductance between network nodes")
+        for node in _nodes:
+            self.add_input(f"C:{node}",
+                           desc=" Heat capacity of the network node")
+        self.add_input("tooth_core_loss_fraction",
+                       desc=" The fraction of the stator core loss generated in the teeth")
+        self.add_input("winding_hot_spot_resistance", val=0.0,
+                       desc=" Rise of the peak winding temperature above the mean per unit winding loss")
+
+        for loss in _losses:
+            self.add_input(f"{loss}_profile", val=0.0, shape=num_times,
+                           desc=" The loss at each time in the duty cycle")
+
+        for fluid in _fluids:
+            self.add_input(fluid, val=300.0,
+                           desc=" The temperature of the fluid at a network boundary")
+        self.add_input("initial_temperature", val=300.0,
+                       desc=" The uniform temperature of the motor at the start of the duty cycle")
+
+        self.add_output("temperature_profile", val=300.0,
+                        shape=(num_times, len(_nodes)),
+                        desc=" The node temperatures at each time in the duty cycle")
+        self.add_output("peak_winding_temperature", val=300.0,
+                        desc=" The (KS aggregated) peak winding hot spot temperature over the duty cycle")
+        self.add_output("peak_magnet_temperature", val=300.0,
+                        desc=" The (KS aggregated) peak magnet temperature over the duty cycle")
+
+        self.times = times
+        self.max_step = self.options["max_step"]
+        if self.max_step is None:
+            self.max_step = np.max(np.diff(times))
+
+    def _parameters(self, inputs):
+        G_values = {conductance: inputs[f"G:{conductance}"][0]
+                    for conductance in _conductances}
+        C = np.array([inputs[f"C:{node}"][0] for node in _nodes])
+        return G_values, C
+
+    def _factor(self, dt):
+        lu = self.factorizations.get(dt)
+        if lu is None:
+            lu = scipy.linalg.lu_factor(np.diag(self.C / dt) + self.G)
+            self.factorizations[dt] = lu
+        return lu
+
+    def _losses_at(self, inputs, t):
+        return {loss: np.interp(t, self.times, inputs[f"{loss}_profile"])
+                for loss in _losses}
+
+    def _step(self, inputs, T, t, dt):
+        P = _node_losses(self._losses_at(inputs, t + dt),
+                         inputs["tooth_core_loss_fraction"][0],
+                         dtype=self.dtype)
+        return scipy.linalg.lu_solve(self._factor(dt),
+                                     self.C / dt * T + P + self.b)
+
+    def compute(self, inputs, outputs):
+        self._integrate(inputs)
+
+        states = np.array(self.states)
+        outputs["temperature_profile"] = states[self.profile_steps]
+
+        rho = self.options["rho"]
+        outputs["peak_winding_temperature"], self.winding_weights = \
+            _ks_max(self._winding_hot_spot(inputs, states), rho)
+        outputs["peak_magnet_temperature"], self.magnet_weights = \
+            _ks_max(states[:, _nodes.index("magnets")], rho)
+
+    def _integrate(self, inputs):
+        """
+        March the network through the duty cycle, storing the accepted steps
+        and states for the derivative sweeps
+        """
+        self.dtype = complex if self.under_complex_step else float
+        G_values, self.C = self._parameters(inputs)
+        self.G = _conductance_matrix(G_values, dtype=self.dtype)
+        self.b = np.zeros(len(_nodes), dtype=self.dtype)
+        for conductance, (a, fluid) in _boundaries.items():
+            self.b[_nodes.index(a)] += G_values[conductance] * inputs[fluid][0]
+
+        # factorizations only depend on the step size for this evaluation
+        self.factorizations = {}
+
+        tol = self.options["tol"]
+        max_refinements = self.options["max_refinements"]
+
+        T = np.full(len(_nodes), inputs["initial_temperature"][0],
+                    dtype=self.dtype)
+        # accepted steps: (time at the start of the step, step size)
+        self.steps = []
+        self.states = [T]
+        self.profile_steps = [0]
+
+        refinement = 0
+        for t_end in self.times[1:]:
+            t = self.times[len(self.profile_steps) - 1]
+            while t < t_end and not np.isclose(t, t_end, rtol=1e-12, atol=0.0):
+                dt = self.max_step / 2**refinement
+                if t + dt > t_end:
+                    dt = t_end - t
+
+                full = self._step(inputs, T, t, dt)
+                half = self._step(inputs, T, t, dt / 2)
+                double_half = self._step(inputs, half, t + dt / 2, dt / 2)
+
+                error = np.max(np.abs(double_half - full))
+                if error > tol and refinement < max_refinements:
+                    refinement += 1
+                    continue
+
+                # keep the more accurate pair of half steps
+                self.steps.extend([(t, dt / 2), (t + dt / 2, dt / 2)])
+                self.states.extend([half, double_half])
+                T = double_half
+                t += dt
+
+                # implicit Euler's local error scales with dt**2
+                if error < tol / 4 and refinement > 0:
+                    refinement -= 1
+
+            self.profile_steps.append(len(self.states) - 1)
+
+        # interpolation weights of the loss profiles at each stored state
+        state_times = [self.times[0]] + [t + dt for t, dt in self.steps]
+        self.state_weights = np.array([_interp_weights(t, self.times)
+                                       for t in state_times])
+
+        rho = self.options["rho"]
+        states = np.array(self.states)
+        _, self.winding_weights = _ks_max(
+            self._winding_hot_spot(inputs, states), rho)
+        _, self.magnet_weights = _ks_max(
+            states[:, _nodes.index("magnets")], rho)
+
+    def _winding_loss(self, inputs):
+        """
+        Winding loss at each stored state
+        """
+        return self.state_weights @ (inputs["dc_loss_profile"] + inputs["ac_loss_profile"])
+
+    def _winding_hot_spot(self, inputs, states):
+        """
+        Peak winding temperature at each stored state, treating the rise
+        inside the coil sides as quasi-steady
+        """
+        return states[:, _nodes.index("windings")] + \
+            inputs["winding_hot_spot_resistance"][0] * self._winding_loss(inputs)
+
+    def _residual_sensitivity(self, inputs, k, d_inputs):
+        """
+        Directional derivative of step k's residual
+            R_k = (C/dt + G) T_k - C/dt T_{k-1} - P(t_k) - b
+        with respect to the inputs (excluding the initial temperature)
+        """
+        t, dt = self.steps[k]
+        T = self.states[k + 1]
+        T_prev = self.states[k]
+        tooth_fraction = inputs["tooth_core_loss_fraction"][0]
+
+        dR = np.zeros(len(_nodes))
+        for conductance, (a, b) in _edges.items():
+            name = f"G:{conductance}"
+            if name in d_inputs:
+                i = _nodes.index(a)
+                j = _nodes.index(b)
+                dg = d_inputs[name][0]
+                dR[i] += dg * (T[i] - T[j])
+                dR[j] += dg * (T[j] - T[i])
+        for conductance, (a, fluid) in _boundaries.items():
+            i = _nodes.index(a)
+            name = f"G:{conductance}"
+            if name in d_inputs:
+                dR[i] += d_inputs[name][0] * (T[i] - inputs[fluid][0])
+            if fluid in d_inputs:
+                dR[i] -= inputs[name][0] * d_inputs[fluid][0]
+        for n, node in enumerate(_nodes):
+            name = f"C:{node}"
+            if name in d_inputs:
+                dR[n] += d_inputs[name][0] * (T[n] - T_prev[n]) / dt
+
+        weights = _interp_weights(t + dt, self.times)
+        for loss in _losses:
+            name = f"{loss}_profile"
+            if name in d_inputs:
+                dR -= np.dot(weights, d_inputs[name]) * \
+                    _node_loss_sensitivity(loss, tooth_fraction)
+        if "tooth_core_loss_fraction" in d_inputs:
+            core_loss = np.dot(weights, inputs["core_loss_profile"])
+            dP = np.zeros(len(_nodes))
+            dP[_nodes.index("teeth")] = core_loss
+            dP[_nodes.index("yoke")] = -core_loss
+            dR -= d_inputs["tooth_core_loss_fraction"][0] * dP
+        return dR
+
+    def _residual_sensitivity_transpose(self, inputs, k, adjoint, d_inputs):
+        """
+        Accumulate -adjoint^T dR_k/dinputs into d_inputs
+        """
+        t, dt = self.steps[k]
+        T = self.states[k + 1]
+        T_prev = self.states[k]
+        tooth_fraction = inputs["tooth_core_loss_fraction"][0]
+
+        for conductance, (a, b) in _edges.items():
+            name = f"G:{conductance}"
+            if name in d_inputs:
+                i = _nodes.index(a)
+                j = _nodes.index(b)
+                d_inputs[name] -= (adjoint[i] - adjoint[j]) * (T[i] - T[j])
+        for conductance, (a, fluid) in _boundaries.items():
+            i = _nodes.index(a)
+            name = f"G:{conductance}"
+            if name in d_inputs:
+                d_inputs[name] -= adjoint[i] * (T[i] - inputs[fluid][0])
+            if fluid in d_inputs:
+                d_inputs[fluid] += adjoint[i] * inputs[name][0]
+        for n, node in enumerate(_nodes):
+            name = f"C:{node}"
+            if name in d_inputs:
+                d_inputs[name] -= adjoint[n] * (T[n] - T_prev[n]) / dt
+
+        weights = _interp_weights(t + dt, self.times)
+        for loss in _losses:
+            name = f"{loss}_profile"
+            if name in d_inputs:
+                d_inputs[name] += weights * \
+                    np.dot(adjoint, _node_loss_sensitivity(loss, tooth_fraction))
+        if "tooth_core_loss_fraction" in d_inputs:
+            core_loss = np.dot(weights, inputs["core_loss_profile"])
+            d_inputs["tooth_core_loss_fraction"] += core_loss * \
+                (adjoint[_nodes.index("teeth")] - adjoint[_nodes.index("yoke")])
+
+    def _output_seeds(self, d_outputs):
+        """
+        Derivative of the reverse mode seeds with respect to each stored state
+        """
+        seeds = np.zeros((len(self.states), len(_nodes)))
+        if "temperature_profile" in d_outputs:
+            for row, step in enumerate(self.profile_steps):
+                seeds[step] += d_outputs["temperature_profile"][row]
+        if "peak_winding_temperature" in d_outputs:
+            seeds[:, _nodes.index("windings")] += \
+                d_outputs["peak_winding_temperature"][0] * self.winding_weights
+        if "peak_magnet_temperature" in d_outputs:
+            seeds[:, _nodes.index("magnets")] += \
+                d_outputs["peak_magnet_temperature"][0] * self.magnet_weights
+        return seeds
+
+    def compute_jacvec_product(self, inputs, d_inputs, d_outputs, mode):
+        # the stored steps may be from a complex step evaluation
+        if self.dtype is not float:
+            self._integrate(inputs)
+
+        if mode == "fwd":
+            dT = np.zeros(len(_nodes))
+            if "initial_temperature" in d_inputs:
+                dT[:] = d_inputs["initial_temperature"][0]
+            d_states = [dT]
+            for k, (_, dt) in enumerate(self.steps):
+                rhs = self.C / dt * dT - \
+                    self._residual_sensitivity(inputs, k, d_inputs)
+                dT = scipy.linalg.lu_solve(self._factor(dt), rhs)
+                d_states.append(dT)
+            d_states = np.array(d_states)
+
+            if "temperature_profile" in d_outputs:
+                d_outputs["temperature_profile"] += d_states[self.profile_steps]
+            if "peak_winding_temperature" in d_outputs:
+                d_hot_spot = d_states[:, _nodes.index("windings")]
+                if "winding_hot_spot_resistance" in d_inputs:
+                    d_hot_spot = d_hot_spot + d_inputs["winding_hot_spot_resistance"][0] * \
+                        self._winding_loss(inputs)
+                for loss in ("dc_loss", "ac_loss"):
+                    if f"{loss}_profile" in d_inputs:
+                        d_hot_spot = d_hot_spot + inputs["winding_hot_spot_resistance"][0] * \
+                            (self.state_weights @ d_inputs[f"{loss}_profile"])
+                d_outputs["peak_winding_temperature"] += np.dot(
+                    self.winding_weights, d_hot_spot)
+            if "peak_magnet_temperature" in d_outputs:
+                d_outputs["peak_magnet_temperature"] += np.dot(
+                    self.magnet_weights, d_states[:, _nodes.index("magnets")])
+
+        elif mode == "rev":
+            seeds = self._output_seeds(d_outputs)
+
+            # sweep backwards in time, the adjoint of step k+1 feeds step k
+            # through the C/dt T_k term of its residual
+            carry = np.zeros(len(_nodes))
+            for k in reversed(range(len(self.steps))):
+                _, dt = self.steps[k]
+                adjoint = scipy.linalg.lu_solve(self._factor(dt),
+                                                seeds[k + 1] + carry,
+                                                trans=1)
+                self._residual_sensitivity_transpose(inputs, k, adjoint,
+                                                     d_inputs)
+                carry = self.C / dt * adjoint
+
+            if "initial_temperature" in d_inputs:
+                d_inputs["initial_temperature"] += np.sum(seeds[0] + carry)
+
+            if "peak_winding_temperature" in d_outputs:
+                d_peak = d_outputs["peak_winding_temperature"][0]
+                if "winding_hot_spot_resistance" in d_inputs:
+                    d_inputs["winding_hot_spot_resistance"] += d_peak * \
+                        np.dot(self.winding_weights, self._winding_loss(inputs))
+                for loss in ("dc_loss", "ac_loss"):
+                    if f"{loss}_profile" in d_inputs:
+                        d_inputs[f"{loss}_profile"] += d_peak * \
+                            inputs["winding_hot_spot_resistance"][0] * \
+                            (self.winding_weights @ self.state_weights)
+
+
+class TransientThermalNetwork(om.Group):
+    """
+    Lumped parameter thermal network model of the motor over a duty cycle
+
+    Outputs the peak winding hot spot and magnet temperatures over the loss
+    time series
+    """
+
+    def initialize(self):
+        self.options.declare("times", types=(list, np.ndarray),
+                             desc=" The times the loss time series are given at")
+        self.options.declare("transient_options", types=dict, default=None, allow_none=True,
+                             desc=" Options passed to ThermalNetworkTransient")
+        self.options.declare("conductance_options", types=dict, default=None, allow_none=True,
+                             desc=" Options passed to ThermalNetworkConductances")
+        self.options.declare("capacitance_options", types=dict, default=None, allow_none=True,
+                             desc=" Options passed to ThermalNetworkCapacitances")
+
+    def setup(self):
+        self.add_subsystem("conductances",
+                           ThermalNetworkConductances(
+                               **(self.options["conductance_options"] or {})),
+                           promotes_inputs=["*"])
+        self.add_subsystem("capacitances",
+                           ThermalNetworkCapacitances(
+                               **(self.options["capacitance_options"] or {})),
+                           promotes_inputs=["*"])
+
+        self.add_subsystem("transient",
+                           ThermalNetworkTransient(times=self.options["times"],
+                                                   **(self.options["transient_options"] or {})),
+                           promotes_inputs=[*[f"{loss}_profile" for loss in _losses],
+                                            *_fluids,
+                                            "initial_temperature"],
+                           promotes_outputs=["temperature_profile",
+                                             "peak_winding_temperature",
+                                             "peak_magnet_temperature"])
+
+        for conductance in _conductances:
+            self.connect(f"conductances.G:{conductance}",
+                         f"transient.G:{conductance}")
+        for node in _nodes:
+            self.connect(f"capacitances.C:{node}",
+                         f"transient.C:{node}")
+        self.connect("conductances.tooth_core_loss_fraction",
+                     "transient.tooth_core_loss_fraction")
+        self.connect("conductances.winding_hot_spot_resistance",
+                     "transient.winding_hot_spot_resistance")
+
+
+if __name__ == "__main__":
+    import unittest
+    from openmdao.utils.assert_utils import assert_check_partials, assert_check_totals, assert_near_equal
+
+    _inputs = {
+        "stator_or": 0.11,
+        "stator_ir": 0.095,
+        "rotor_or": 0.094,
+        "magnet_thickness": 0.004,
+        "slot_depth": 0.012,
+        "tooth_width": 0.005,
+        "tooth_tip_thickness": 0.001,
+        "stack_length": 0.05,
+        "coolant_thickness": 0.0015,
+        "num_slots": 24,
+        "fill_factor": 0.5,
+        "h": 50.0,
+        "h:in-slot-cooling": 2000.0,
+        "h:airgap-convection": 100.0,
+        "fluid_temp": 300.0,
+        "fluid_temp:in-slot-cooling": 310.0,
+        "initial_temperature": 300.0,
+    }
+
+    # takeoff, climb, and cruise
+    _times = [0.0, 60.0, 300.0, 900.0, 1800.0]
+    _dc_loss = [1200.0, 1200.0, 700.0, 300.0, 300.0]
+    _core_loss = [300.0, 300.0, 250.0, 200.0, 200.0]
+
+    def _problem(times=_times, **transient_options):
+        problem = om.Problem()
+        problem.model.add_subsystem("lptn",
+                                    TransientThermalNetwork(times=times,
+                                                            transient_options=transient_options),
+                                    promotes=["*"])
+        problem.setup(force_alloc_complex=True)
+        for name, val in _inputs.items():
+            problem[name] = val
+        problem["dc_loss_profile"] = _dc_loss
+        problem["ac_loss_profile"] = 0.1 * np.array(_dc_loss)
+        problem["core_loss_profile"] = _core_loss
+        problem["magnet_loss_profile"] = 5.0
+        return problem
+
+    class TestTransientThermalNetwork(unittest.TestCase):
+        def test_steady_state_limit(self):
+            from motormodel.thermal_network import ThermalNetwork
+
+            # constant losses for long enough reach the steady state network
+            problem = _problem(times=[0.0, 1e5, 2e5, 3e5, 4e5])
+            problem["dc_loss_profile"] = 400.0
+            problem["ac_loss_profile"] = 50.0
+            problem["core_loss_profile"] = 200.0
+            problem["magnet_loss_profile"] = 0.0
+            problem.run_model()
+
+            steady = om.Problem()
+            steady.model.add_subsystem("lptn", ThermalNetwork(), promotes=["*"])
+            steady.setup()
+            for name, val in _inputs.items():
+                if name not in ("magnet_thickness", "initial_temperature"):
+                    steady[name] = val
+            steady["dc_loss"] = 400.0
+            steady["ac_loss"] = 50.0
+            steady["core_loss"] = 200.0
+            steady.run_model()
+
+            assert_near_equal(problem.get_val("temperature_profile")[-1],
+                              steady.get_val("network_temperature"),
+                              tolerance=1e-6)
+
+        def test_factorization_reuse(self):
+            problem = _problem()
+            problem.run_model()
+
+            transient = problem.model.lptn.transient
+            # far fewer factorizations than steps
+            self.assertGreater(len(transient.steps), 10)
+            self.assertLess(len(transient.factorizations),
+                            len(transient.steps) / 2)
+
+            peak = problem.get_val("peak_winding_temperature")[0]
+            profile = problem.get_val("temperature_profile")[:, 0]
+            self.assertGreaterEqual(peak, np.max(profile))
+
+        def test_derivatives(self):
+            problem = _problem(tol=0.5)
+            problem.run_model()
+
+            data = problem.check_partials(method="cs", compact_print=True,
+                                          includes=["*transient*"])
+            assert_check_partials(data, atol=1e-6, rtol=1e-6)
+
+            data = problem.check_totals(of=["peak_winding_temperature",
+                                            "peak_magnet_temperature"],
+                                        wrt=["dc_loss_profile",
+                                             "slot_depth",
+                                             "h:in-slot-cooling",
+                                             "initial_temperature"],
+                                        method="cs", compact_print=True)
+            assert_check_totals(data, atol=1e-6, rtol=1e-6)
+
+    unittest.main()
@@ -12,7 +12,8 @@ class ThermalManagementSystem(om.ExplicitComponent):
         self.add_output("mass")
         self.add_output("power_req")
 
-        self.declare_partials('*', '*', method='cs')
+        self.declare_partials("mass", "total_loss", val=0.407e-3)
+        self.declare_partials("power_req", "total_loss", val=0.265)
 
     def compute(self, inputs, outputs):
         p_rej = inputs["total_loss"]
@@ -0,0 +1,79 @@
+import hashlib
+
+import numpy as np
+import openmdao.api as om
+
+
+def fingerprint(*arrays):
+    """
+    Hash a collection of arrays into a key used to decide if cached data is
+    still valid
+    """
+    digest = hashlib.sha1()
+    for array in arrays:
+        digest.update(np.ascontiguousarray(array, dtype=float).tobytes())
+    return digest.hexdigest()
+
+
+def design_var_dependents(system, names):
+    """
+    The subset of the absolute variable names that depend on a design variable
+    of the problem that system belongs to
+
+    Uses the problem's relevance graph, so it must be called after final
+    setup. Without any responses nothing is differentiated and the problem
+    has no relevance graph, so nothing depends on a design variable.
+    """
+    model = system._problem_meta["model_ref"]()
+    if not model.get_responses(get_sizes=False):
+        return []
+
+    dependents = set()
+    for meta in model.get_design_vars(get_sizes=False).values():
+        dependents.update(system._relevance.relevant_vars(meta["source"], "fwd"))
+    return [name for name in names if name in dependents]
+
+
+if __name__ == "__main__":
+    import unittest
+
+    class TestFingerprint(unittest.TestCase):
+        def test_fingerprint(self):
+            a = np.arange(4.0)
+            self.assertEqual(fingerprint(a, [1]), fingerprint(a.copy(), np.ones(1)))
+            self.assertNotEqual(fingerprint(a, [1]), fingerprint(a, [2]))
+
+    class TestDesignVarDependents(unittest.TestCase):
+        def test_dependents(self):
+            names = ["sink.a", "sink.b"]
+            found = {}
+
+            class Sink(om.ExplicitComponent):
+                def setup(self):
+                    self.add_input("a")
+                    self.add_input("b")
+                    self.add_output("y")
+
+                def compute(self, inputs, outputs):
+                    found["names"] = design_var_dependents(self, names)
+                    outputs["y"] = inputs["a"] * inputs["b"]
+
+            for design_vars, objective, expected in [([], True, []),
+                                                     (["p"], False, []),
+                                                     (["p"], True, ["sink.b"]),
+                                                     (["p", "x"], True, names)]:
+                prob = om.Problem(reports=False)
+                prob.model.add_subsystem("geometry", om.ExecComp("b = 2 * p"),
+                                         promotes=["*"])
+                prob.model.add_subsystem("sink", Sink(),
+                                         promotes_inputs=[("a", "x"), "b"],
+                                         promotes_outputs=["y"])
+                for design_var in design_vars:
+                    prob.model.add_design_var(design_var)
+                if objective:
+                    prob.model.add_objective("y")
+                prob.setup()
+                prob.run_model()
+                self.assertEqual(found["names"], expected)
+
+    unittest.main()
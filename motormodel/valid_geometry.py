@@ -14,6 +14,27 @@ def _greens_theorem_integral_arc(c, r, t0, t1):
          + r**2*(t1 - t0))
 
 
+def stator_yoke_fillet_angle(stator_ir,
+                             slot_depth,
+                             tooth_width,
+                             tooth_tip_thickness,
+                             slot_radius_stator):
+    """
+    Closed form solution of the StatorYokeFilletAngle residual
+
+    The fillet center is a distance tooth_width/2 + slot_radius_stator from the
+    tooth centerline, so the fillet meets the inside of the stator yoke where
+    cos(theta) = (tooth_width/2 + slot_radius_stator) / (R - slot_radius_stator),
+    with R the inner radius of the stator yoke. The root in (-pi, 0) is
+    returned, and nan where the fillet does not intersect the yoke.
+    """
+    yoke_ir = stator_ir + tooth_tip_thickness + slot_depth
+    srs_center_x = tooth_width / 2 + slot_radius_stator
+    ratio = srs_center_x / (yoke_ir - slot_radius_stator)
+    valid = (np.real(ratio) >= -1) & (np.real(ratio) <= 1)
+    return np.where(valid, -np.arccos(np.where(valid, ratio, 0.0)), np.nan)
+
+
 class StatorYokeFilletAngle(om.ImplicitComponent):
     def setup(self):
         self.add_input("stator_or",
@@ -51,6 +72,124 @@ class StatorYokeFilletAngle(om.ImplicitComponent):
         residuals["theta"] = srs_center_x + slot_radius_stator * \
             np.cos(theta) - (stator_or - stator_yoke_thickness)*np.cos(theta)
 
+    def guess_nonlinear(self, inputs, outputs, residuals):
+        theta = stator_yoke_fillet_angle(inputs["stator_ir"],
+                                         inputs["slot_depth"],
+                                         inputs["tooth_width"],
+                                         inputs["tooth_tip_thickness"],
+                                         inputs["slot_radius_stator"])
+        if np.all(np.isfinite(theta)):
+            outputs["theta"] = theta
+
+
+def tooth_lengths(stator_or,
+                  stator_ir,
+                  rotor_or,
+                  rotor_ir,
+                  magnet_thickness,
+                  slot_depth,
+                  tooth_width,
+                  tooth_tip_thickness,
+                  tooth_tip_angle,
+                  slot_radius_stator,
+                  slot_radius_tooth,
+                  shoe_spacing,
+                  num_slots,
+                  coolant_thickness,
+                  theta):
+    """
+    Evaluate the tooth and slot lengths and the slot area
+
+    The arguments may be scalars or arrays of the same shape to evaluate many
+    designs at once. Returns a dict of the ToothLengths outputs.
+    """
+    lengths = {}
+
+    stator_yoke_thickness = stator_or - \
+        (stator_ir + tooth_tip_thickness + slot_depth)
+    shoe_spacing_angle = shoe_spacing * 360 / (2 * np.pi*stator_ir)
+    shoe_angle = 360 / num_slots - shoe_spacing_angle
+
+    pt1_r = stator_ir + tooth_tip_thickness
+    pt1_theta = (-90 + shoe_angle/2)*np.pi / 180
+
+    pt1_x = pt1_r * np.cos(pt1_theta)
+    pt1_y = pt1_r * np.sin(pt1_theta)
+
+    srt_center_x = tooth_width / 2 + slot_radius_tooth
+    theta_1 = (shoe_angle / 2 + tooth_tip_angle) * np.pi / 180
+
+    pt2_x = srt_center_x + slot_radius_tooth * np.cos(np.pi/2 + theta_1)
+    pt2_y = pt1_y - np.tan(theta_1) * (pt1_x - pt2_x)
+
+    # print(f"pt1: [{pt1_x}, {pt1_y}], pt2: [{pt2_x}, {pt2_y}]")
+
+    lengths["shoe_inner_length"] = (pt1_x - pt2_x) / np.cos(theta_1)
+    # lengths["shoe_inner_length"] = np.sqrt(
+    #     ((pt1_x - pt2_x)**2 + (pt1_y - pt2_y)**2))
+
+    srt_center_y = pt2_y - slot_radius_tooth * np.sin(np.pi/2 + theta_1)
+
+    pt3_x = tooth_width / 2
+    pt3_y = srt_center_y
+
+    srs_center_y = (stator_or - stator_yoke_thickness) * \
+        np.sin(theta) - slot_radius_stator*np.sin(theta)
+    pt4_x = tooth_width / 2
+    pt4_y = srs_center_y
+    lengths["tooth_length"] = pt3_y - pt4_y
+
+    # print(f"pt3: [{pt3_x}, {pt3_y}], pt4: [{pt4_x}, {pt4_y}]")
+
+    lengths["stator_yoke_arc_length"] = (stator_or - stator_yoke_thickness) * \
+        (-np.pi/2 + np.pi/num_slots - theta) - coolant_thickness/2
+
+    lengths["slot_area"] = _greens_theorem_integral_segment(np.array([pt1_x, pt1_y]),
+                                                            np.array([pt2_x, pt2_y]))
+
+    lengths["slot_area"] += _greens_theorem_integral_arc(np.array([srt_center_x, srt_center_y]),
+                                                         slot_radius_tooth,
+                                                         np.pi/2 + theta_1,
+                                                         np.pi)
+
+    lengths["slot_area"] += _greens_theorem_integral_segment(np.array([pt3_x, pt3_y]),
+                                                             np.array([pt4_x, pt4_y]))
+
+    lengths["slot_area"] += _greens_theorem_integral_arc(np.array([srt_center_x, srs_center_y]),
+                                                         slot_radius_stator,
+                                                         -np.pi,
+                                                         theta)
+
+    coolant_thickness_angle = (-np.pi/2 + np.pi/num_slots -
+                               coolant_thickness/2/(stator_or - stator_yoke_thickness))
+    lengths["slot_area"] += _greens_theorem_integral_arc(np.array([0.0, 0.0]),
+                                                         (stator_or -
+                                                             stator_yoke_thickness),
+                                                         theta,
+                                                         coolant_thickness_angle)
+
+    pt6 = (stator_or - stator_yoke_thickness) * \
+        np.array([np.cos(coolant_thickness_angle),
+                 np.sin(coolant_thickness_angle)])
+    pt7 = (stator_ir + tooth_tip_thickness) * \
+        np.array([np.cos(coolant_thickness_angle),
+                 np.sin(coolant_thickness_angle)])
+    lengths["slot_area"] += _greens_theorem_integral_segment(pt6, pt7)
+
+    lengths["slot_area"] += _greens_theorem_integral_arc(np.array([0.0, 0.0]),
+                                                         (stator_ir +
+                                                             tooth_tip_thickness),
+                                                         coolant_thickness_angle,
+                                                         pt1_theta)
+
+    lengths['stator_yoke_thickness'] = stator_or - \
+        stator_ir - slot_depth - tooth_tip_thickness
+    lengths['rotor_yoke_thickness'] = rotor_or - \
+        magnet_thickness - rotor_ir
+    lengths['air_gap_thickness'] = stator_ir - rotor_or
+    lengths['coolant_spacing_margin'] = shoe_spacing - coolant_thickness
+    return lengths
+
 
 class ToothLengths(om.ExplicitComponent):
     def setup(self):
@@ -106,105 +245,107 @@ class ToothLengths(om.ExplicitComponent):
         self.declare_partials('*', '*', method='cs')
 
     def compute(self, inputs, outputs):
-        stator_or = inputs["stator_or"]
-        stator_ir = inputs["stator_ir"]
-        rotor_or = inputs["rotor_or"]
-        rotor_ir = inputs["rotor_ir"]
-        magnet_thickness = inputs['magnet_thickness']
-        slot_depth = inputs["slot_depth"]
-        tooth_width = inputs["tooth_width"]
-        tooth_tip_thickness = inputs["tooth_tip_thickness"]
-        tooth_tip_angle = inputs["tooth_tip_angle"]
-        slot_radius_stator = inputs["slot_radius_stator"]
-        slot_radius_tooth = inputs["slot_radius_tooth"]
-        shoe_spacing = inputs["shoe_spacing"]
-        num_slots = inputs["num_slots"]
-        coolant_thickness = inputs["coolant_thickness"]
-        theta = inputs["stator_yoke_fillet_angle"]
-
-        stator_yoke_thickness = stator_or - \
-            (stator_ir + tooth_tip_thickness + slot_depth)
-        shoe_spacing_angle = shoe_spacing * 360 / (2 * np.pi*stator_ir)
-        shoe_angle = 360 / num_slots - shoe_spacing_angle
-
-        pt1_r = stator_ir + tooth_tip_thickness
-        pt1_theta = (-90 + shoe_angle/2)*np.pi / 180
-
-        pt1_x = pt1_r * np.cos(pt1_theta)
-        pt1_y = pt1_r * np.sin(pt1_theta)
-
-        srt_center_x = tooth_width / 2 + slot_radius_tooth
-        theta_1 = (shoe_angle / 2 + tooth_tip_angle) * np.pi / 180
-
-        pt2_x = srt_center_x + slot_radius_tooth * np.cos(np.pi/2 + theta_1)
-        pt2_y = pt1_y - np.tan(theta_1) * (pt1_x - pt2_x)
-
-        # print(f"pt1: [{pt1_x}, {pt1_y}], pt2: [{pt2_x}, {pt2_y}]")
-
-        outputs["shoe_inner_length"] = (pt1_x - pt2_x) / np.cos(theta_1)
-        # outputs["shoe_inner_length"] = np.sqrt(
-        #     ((pt1_x - pt2_x)**2 + (pt1_y - pt2_y)**2))
-
-        srt_center_y = pt2_y - slot_radius_tooth * np.sin(np.pi/2 + theta_1)
-
-        pt3_x = tooth_width / 2
-        pt3_y = srt_center_y
-
-        srs_center_y = (stator_or - stator_yoke_thickness) * \
-            np.sin(theta) - slot_radius_stator*np.sin(theta)
-        pt4_x = tooth_width / 2
-        pt4_y = srs_center_y
-        outputs["tooth_length"] = pt3_y - pt4_y
-
-        # print(f"pt3: [{pt3_x}, {pt3_y}], pt4: [{pt4_x}, {pt4_y}]")
-
-        outputs["stator_yoke_arc_length"] = (stator_or - stator_yoke_thickness) * \
-            (-np.pi/2 + np.pi/num_slots - theta) - coolant_thickness/2
-
-        outputs["slot_area"] = _greens_theorem_integral_segment(np.array([pt1_x, pt1_y]),
-                                                                np.array([pt2_x, pt2_y]))
-
-        outputs["slot_area"] += _greens_theorem_integral_arc(np.array([srt_center_x, srt_center_y]),
-                                                             slot_radius_tooth,
-                                                             np.pi/2 + theta_1,
-                                                             np.pi)
-
-        outputs["slot_area"] += _greens_theorem_integral_segment(np.array([pt3_x, pt3_y]),
-                                                                 np.array([pt4_x, pt4_y]))
-
-        outputs["slot_area"] += _greens_theorem_integral_arc(np.array([srt_center_x, srs_center_y]),
-                                                             slot_radius_stator,
-                                                             -np.pi,
-                                                             theta)
-
-        coolant_thickness_angle = (-np.pi/2 + np.pi/num_slots -
-                                   coolant_thickness/2/(stator_or - stator_yoke_thickness))
-        outputs["slot_area"] += _greens_theorem_integral_arc(np.array([0.0, 0.0]),
-                                                             (stator_or -
-                                                                 stator_yoke_thickness),
-                                                             theta,
-                                                             coolant_thickness_angle)
-
-        pt6 = (stator_or - stator_yoke_thickness) * \
-            np.array([np.cos(coolant_thickness_angle),
-                     np.sin(coolant_thickness_angle)])
-        pt7 = (stator_ir + tooth_tip_thickness) * \
-            np.array([np.cos(coolant_thickness_angle),
-                     np.sin(coolant_thickness_angle)])
-        outputs["slot_area"] += _greens_theorem_integral_segment(pt6, pt7)
-
-        outputs["slot_area"] += _greens_theorem_integral_arc(np.array([0.0, 0.0]),
-                                                             (stator_ir +
-                                                                 tooth_tip_thickness),
-                                                             coolant_thickness_angle,
-                                                             pt1_theta)
-
-        outputs['stator_yoke_thickness'] = stator_or - \
-            stator_ir - slot_depth - tooth_tip_thickness
-        outputs['rotor_yoke_thickness'] = rotor_or - \
-            magnet_thickness - rotor_ir
-        outputs['air_gap_thickness'] = stator_ir - rotor_or
-        outputs['coolant_spacing_margin'] = shoe_spacing - coolant_thickness
+        lengths = tooth_lengths(inputs["stator_or"],
+                                inputs["stator_ir"],
+                                inputs["rotor_or"],
+                                inputs["rotor_ir"],
+                                inputs["magnet_thickness"],
+                                inputs["slot_depth"],
+                                inputs["tooth_width"],
+                                inputs["tooth_tip_thickness"],
+                                inputs["tooth_tip_angle"],
+                                inputs["slot_radius_stator"],
+                                inputs["slot_radius_tooth"],
+                                inputs["shoe_spacing"],
+                                inputs["num_slots"],
+                                inputs["coolant_thickness"],
+                                inputs["stator_yoke_fillet_angle"])
+        for name, value in lengths.items():
+            outputs[name] = value
+
+
+def screen_geometry(stator_or,
+                    stator_ir,
+                    rotor_or,
+                    rotor_ir,
+                    magnet_thickness,
+                    slot_depth,
+                    tooth_width,
+                    tooth_tip_thickness,
+                    tooth_tip_angle,
+                    slot_radius_stator,
+                    slot_radius_tooth,
+                    shoe_spacing,
+                    num_slots,
+                    coolant_thickness=0.0,
+                    min_margins=None):
+    """
+    Screen candidate designs for geometric validity without building them
+
+    Evaluates the same tooth, slot, and fillet relations as ValidLengths for
+    any number of designs at once. The arguments may be scalars or arrays that
+    broadcast against each other.
+
+    Parameters
+    ----------
+    min_margins : dict
+        Optional minimum value for each margin; defaults to zero
+
+    Returns
+    -------
+    feasible : np.ndarray
+        Boolean mask of the designs with every margin at or above its minimum
+    margins : dict
+        The ValidLengths outputs and the fillet intersection margin for every
+        design. Non-negative margins are feasible.
+    """
+    args = np.broadcast_arrays(*[np.asarray(arg, dtype=float) for arg in
+                                 (stator_or, stator_ir, rotor_or, rotor_ir,
+                                  magnet_thickness, slot_depth, tooth_width,
+                                  tooth_tip_thickness, tooth_tip_angle,
+                                  slot_radius_stator, slot_radius_tooth,
+                                  shoe_spacing, num_slots, coolant_thickness)])
+    (stator_or, stator_ir, rotor_or, rotor_ir, magnet_thickness, slot_depth,
+     tooth_width, tooth_tip_thickness, tooth_tip_angle, slot_radius_stator,
+     slot_radius_tooth, shoe_spacing, num_slots, coolant_thickness) = args
+
+    theta = stator_yoke_fillet_angle(stator_ir,
+                                     slot_depth,
+                                     tooth_width,
+                                     tooth_tip_thickness,
+                                     slot_radius_stator)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        margins = tooth_lengths(stator_or,
+                                stator_ir,
+                                rotor_or,
+                                rotor_ir,
+                                magnet_thickness,
+                                slot_depth,
+                                tooth_width,
+                                tooth_tip_thickness,
+                                tooth_tip_angle,
+                                slot_radius_stator,
+                                slot_radius_tooth,
+                                shoe_spacing,
+                                num_slots,
+                                coolant_thickness,
+                                theta)
+
+        # the fillet must reach the inside of the stator yoke
+        yoke_ir = stator_ir + tooth_tip_thickness + slot_depth
+        margins["fillet_margin"] = yoke_ir - 2 * slot_radius_stator - \
+            tooth_width / 2
+
+    if min_margins is None:
+        min_margins = {}
+
+    feasible = np.ones(theta.shape, dtype=bool)
+    for name, margin in margins.items():
+        # nan margins (no fillet intersection) compare as infeasible
+        feasible &= margin >= min_margins.get(name, 0.0)
+
+    return feasible, margins
 
 
 class ValidLengths(om.Group):
@@ -376,6 +517,10 @@ if __name__ == "__main__":
             data = problem.check_partials(form="central")
             assert_check_partials(data)
 
+        def test_stator_yoke_fillet_angle_closed_form(self):
+            theta = stator_yoke_fillet_angle(0.550/2, 0.044, 0.0125, 0.007, 0.005)
+            self.assertAlmostEqual(-1.5357424231, theta)
+
     class TestToothLengths(unittest.TestCase):
         def test_tooth_lengths(self):
 
@@ -443,6 +588,63 @@ if __name__ == "__main__":
             data = problem.check_partials(form="central")
             assert_check_partials(data)
 
+    class TestScreenGeometry(unittest.TestCase):
+        design = {
+            "stator_or": 0.659/2,
+            "stator_ir": 0.550/2,
+            "rotor_or": 0.270,
+            "rotor_ir": 0.200,
+            "magnet_thickness": 0.01,
+            "slot_depth": 0.044,
+            "tooth_width": 0.0125,
+            "tooth_tip_thickness": 0.007,
+            "tooth_tip_angle": 10,
+            "slot_radius_stator": 0.005,
+            "slot_radius_tooth": 0.005,
+            "shoe_spacing": 0.01,
+            "num_slots": 27,
+            "coolant_thickness": 0.01
+        }
+
+        def test_screen_geometry(self):
+            num_designs = 1000
+            rng = np.random.default_rng(0)
+            designs = {name: np.full(num_designs, value, dtype=float)
+                       for name, value in self.design.items()}
+            designs["tooth_width"] = rng.uniform(0.005, 0.03, num_designs)
+            designs["slot_radius_stator"] = rng.uniform(0.001, 0.01, num_designs)
+            designs["shoe_spacing"] = rng.uniform(0.002, 0.05, num_designs)
+
+            feasible, margins = screen_geometry(**designs)
+            self.assertEqual(feasible.shape, (num_designs,))
+            self.assertTrue(np.any(feasible))
+            self.assertTrue(np.any(~feasible))
+
+            # the screened margins match the OpenMDAO model
+            problem = om.Problem()
+            problem.model.add_subsystem("valid_lengths",
+                                        ValidLengths(),
+                                        promotes=["*"])
+            problem.model.valid_lengths.nonlinear_solver.options["iprint"] = -1
+            problem.setup()
+            for idx in range(3):
+                for name, values in designs.items():
+                    problem[name] = values[idx]
+                problem.run_model()
+                for name in ["shoe_inner_length",
+                             "tooth_length",
+                             "stator_yoke_arc_length",
+                             "slot_area",
+                             "coolant_spacing_margin"]:
+                    self.assertAlmostEqual(problem[name][0], margins[name][idx])
+
+        def test_no_fillet_intersection(self):
+            design = dict(self.design)
+            design["slot_radius_stator"] = np.array([0.005, 0.2])
+            feasible, margins = screen_geometry(**design)
+            np.testing.assert_array_equal(feasible, [True, False])
+            self.assertLess(margins["fillet_margin"][1], 0.0)
+
     class TestValidLengths(unittest.TestCase):
         def test_valid_lengths(self):
 
@@ -18,7 +18,7 @@ setup(name='motormodel',
       python_requires=">=3.8",
       install_requires=[
           'numpy>=1.21.4',
-          'openmdao>=3.18.0',
+          'openmdao>=3.45.1',
           'mphys>=0.4.0',
           'omESP'
       ],